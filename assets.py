@@ -0,0 +1,193 @@
+# assets.py
+# Static asset pipeline: every .css/.js under static/ is minified, written
+# to static/dist/ under a content-hashed name with .gz and .br siblings
+# (.br needs Brotli from requirements.txt), and listed in
+# static/dist/manifest.json. url_for('static', filename='css/style.css')
+# then yields the hashed file, which the static view serves precompressed
+# with Cache-Control: immutable, so repeat visits never ask for it again.
+#
+# The build runs at startup when a source changed (ASSETS_BUILD=startup) or
+# with `flask --app app build-assets`; ASSETS_BUILD=off serves whatever a
+# previous build left, and plain files when there is none.
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import current_app, request, send_file
+from werkzeug.security import safe_join
+from werkzeug.exceptions import NotFound
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+ASSETS_BUILD = os.environ.get("ASSETS_BUILD", "startup")  # startup, off
+DIST = "dist"
+MANIFEST = "manifest.json"
+SOURCE_TYPES = (".css", ".js")
+MAX_AGE = 365 * 24 * 3600
+
+
+# ----------------- Minifiers -----------------
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_STRING = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(source):
+    """Drop comments and redundant whitespace; strings are left alone."""
+    out = []
+    for i, part in enumerate(_CSS_STRING.split(_CSS_COMMENT.sub("", source))):
+        if i % 2:
+            out.append(part)
+            continue
+        part = _CSS_SPACE.sub(" ", part)
+        part = _CSS_PUNCT.sub(r"\1", part)
+        out.append(part.replace(": ", ":").replace(";}", "}"))
+    return "".join(out).strip()
+
+
+def minify_js(source):
+    """Line-level and conservative: strip indentation, blank lines and whole-line comments.
+
+    Newlines are kept, so automatic semicolon insertion is unaffected, and
+    lines inside a multi-line template literal are left untouched.
+    """
+    out = []
+    in_template = in_comment = False
+    for line in source.splitlines():
+        if in_template:
+            out.append(line)
+        else:
+            stripped = line.strip()
+            if in_comment:
+                in_comment = "*/" not in stripped
+                continue
+            if stripped.startswith("/*") and ("*/" not in stripped or stripped.endswith("*/")):
+                in_comment = "*/" not in stripped
+                continue
+            if not stripped or stripped.startswith("//"):
+                continue
+            out.append(stripped)
+        if (len(re.findall(r"(?<!\\)`", line)) % 2) == 1:
+            in_template = not in_template
+    return "\n".join(out) + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+# ----------------- Build -----------------
+def _sources(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        rel_root = os.path.relpath(root, static_folder)
+        if rel_root.split(os.sep)[0] == DIST:
+            dirs[:] = []
+            continue
+        for name in sorted(files):
+            if name.endswith(SOURCE_TYPES):
+                yield os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, "/")
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_stale(static_folder, manifest=None):
+    manifest = manifest or load_manifest(static_folder)
+    if manifest is None:
+        return True
+    current = {}
+    for name in _sources(static_folder):
+        with open(os.path.join(static_folder, name), "rb") as f:
+            current[name] = _digest(f.read())
+    return current != manifest.get("sources")
+
+
+def build(static_folder):
+    """Minify, fingerprint and precompress every source; returns the manifest."""
+    dist = os.path.join(static_folder, DIST)
+    files, sources, stats = {}, {}, {}
+    if brotli is None:
+        print("[WARN] Brotli is not installed: static assets are precompressed with gzip only")
+    for name in _sources(static_folder):
+        with open(os.path.join(static_folder, name), "rb") as f:
+            raw = f.read()
+        sources[name] = _digest(raw)
+        stem, ext = os.path.splitext(name)
+        data = MINIFIERS[ext](raw.decode("utf-8")).encode("utf-8")
+        hashed = f"{stem}.{_digest(data)}{ext}"
+        out = os.path.join(dist, hashed)
+        if not os.path.exists(out):
+            _write(out, data)
+            _write(out + ".gz", gzip.compress(data, 9, mtime=0))
+        if brotli is not None and not os.path.exists(out + ".br"):   # also for builds made before it was installed
+            _write(out + ".br", brotli.compress(data, quality=11))
+        files[name] = hashed
+        stats[name] = {"source": len(raw), "minified": len(data)}
+
+    # Older hashed files are kept: pages cached before a deploy still point at them.
+    manifest = {"files": files, "sources": sources, "sizes": stats}
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+# ----------------- Flask integration -----------------
+def init_app(app):
+    manifest = load_manifest(app.static_folder)
+    if ASSETS_BUILD == "startup" and is_stale(app.static_folder, manifest):
+        manifest = build(app.static_folder)
+    app.extensions["assets"] = (manifest or {}).get("files", {})
+
+    @app.url_defaults
+    def fingerprinted_static(endpoint, values):
+        if endpoint == "static":
+            hashed = app.extensions["assets"].get(values.get("filename"))
+            if hashed:
+                values["filename"] = f"{DIST}/{hashed}"
+
+    app.view_functions["static"] = send_static
+
+
+def send_static(filename):
+    """The static view; fingerprinted files go out precompressed and immutable."""
+    if not filename.startswith(DIST + "/"):
+        return current_app.send_static_file(filename)
+
+    path = safe_join(current_app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    encodings = [("br", ".br")] if brotli is not None else []
+    for encoding, suffix in encodings + [("gzip", ".gz")]:
+        if request.accept_encodings[encoding] and os.path.isfile(path + suffix):
+            res = send_file(path + suffix, mimetype=mimetype, conditional=True, max_age=MAX_AGE)
+            res.headers["Content-Encoding"] = encoding
+            break
+    else:
+        res = send_file(path, mimetype=mimetype, conditional=True, max_age=MAX_AGE)
+    res.vary.add("Accept-Encoding")
+    res.cache_control.public = True
+    res.cache_control.immutable = True
+    return res
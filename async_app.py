@@ -0,0 +1,262 @@
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+from flask import render_template
+from multidict import CIMultiDict
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+from catalog import ingest_search_results, local_search_results
+from search_index import LOCAL_SEARCH_MIN_HITS
+from search_views import (search_params, render_search_results, artist_results, artist_calls,
+                          artist_page, album_page)
+import autocomplete as autocomplete_index
+import conditional
+from saavn import saavn, UpstreamError
+
+# Async serving path for the upstream-bound pages: /search, /search/artist,
+# /artist/<id>, /album/<id> and /autocomplete run on an aiohttp event loop,
+# so a request waiting on saavn.dev costs a coroutine instead of a worker.
+# Their database and template steps (sub-millisecond on SQLite) run on a
+# small thread pool inside a Flask request context; every other path is
+# handed to the unchanged Flask app on the same pool.
+#
+#   python async_app.py --port 8081
+#   gunicorn async_app:web_app --worker-class aiohttp.GunicornWebWorker
+
+ASYNC_WORKER_THREADS = int(os.environ.get("ASYNC_WORKER_THREADS", 8))
+STREAM_CHUNK_BYTES = 64 * 1024   # fallback bodies larger than this are streamed, this much per pool hop
+_HOP_HEADERS = {"content-length", "transfer-encoding", "connection"}
+
+
+# ----------------- Bridge to the Flask app -----------------
+def _environ(request, body=b""):
+    environ = EnvironBuilder(
+        path=request.path, method=request.method, query_string=request.query_string,
+        headers=list(request.headers.items()), data=body,
+    ).get_environ()
+    environ["REMOTE_ADDR"] = request.remote or ""
+    environ["wsgi.url_scheme"] = request.scheme
+    return environ
+
+
+def _to_response(status, headers, chunks):
+    headers = CIMultiDict((k, v) for k, v in headers if k.lower() not in _HOP_HEADERS)
+    return web.Response(status=int(status.split(" ", 1)[0]), headers=headers, body=b"".join(chunks))
+
+
+async def in_flask(request, fn, *args):
+    """Run ``fn(*args)`` on the worker pool inside a Flask request context for ``request``."""
+    flask_app = request.app["flask"]
+
+    def call():
+        with flask_app.request_context(_environ(request)):
+            return fn(*args)
+
+    return await asyncio.get_running_loop().run_in_executor(request.app["pool"], call)
+
+
+async def render(request, fn, *args):
+    """Like :func:`in_flask`, turning the view-style return value into a response."""
+    flask_app = request.app["flask"]
+
+    def call():
+        with flask_app.request_context(_environ(request)):
+            res = flask_app.make_response(fn(*args))
+            return res.status, res.headers.to_wsgi_list(), [res.get_data()]
+
+    return _to_response(*await asyncio.get_running_loop().run_in_executor(request.app["pool"], call))
+
+
+def _pull(app_iter):
+    """Up to STREAM_CHUNK_BYTES of ``app_iter``; ``(chunks, done)``."""
+    chunks, size = [], 0
+    for chunk in app_iter:
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_CHUNK_BYTES:
+            return chunks, False
+    return chunks, True
+
+
+async def wsgi_fallback(request):
+    """Every non-async path: the Flask app, run on the worker pool.
+
+    Small bodies are sent as one response; larger ones (/stream audio, /img,
+    static files) are streamed, so a track is never held in memory whole.
+    """
+    flask_app = request.app["flask"]
+    environ = _environ(request, await request.read())
+    loop = asyncio.get_running_loop()
+    pool = request.app["pool"]
+
+    def call():
+        app_iter, status, headers = run_wsgi_app(flask_app.wsgi_app, environ)
+        chunks, done = _pull(app_iter)
+        if done and hasattr(app_iter, "close"):
+            app_iter.close()
+        return app_iter, status, headers.to_wsgi_list(), chunks, done
+
+    app_iter, status, headers, chunks, done = await loop.run_in_executor(pool, call)
+    if done:
+        return _to_response(status, headers, chunks)
+
+    try:
+        res = web.StreamResponse(
+            status=int(status.split(" ", 1)[0]),
+            headers=CIMultiDict((k, v) for k, v in headers if k.lower() not in ("transfer-encoding", "connection")),
+        )
+        await res.prepare(request)
+        while True:
+            for chunk in chunks:
+                await res.write(chunk)   # waits for the client to drain
+            if done:
+                break
+            chunks, done = await loop.run_in_executor(pool, _pull, app_iter)
+        await res.write_eof()
+        return res
+    finally:
+        if hasattr(app_iter, "close"):
+            await loop.run_in_executor(pool, app_iter.close)
+
+
+def session_user(request):
+    """The logged-in user id from the Flask session cookie, or None."""
+    flask_app = request.app["flask"]
+    cookie = request.cookies.get(flask_app.config["SESSION_COOKIE_NAME"])
+    if not cookie:
+        return None
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        return serializer.loads(cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds())).get("user_id")
+    except Exception:
+        return None
+
+
+# ----------------- Async views (same behaviour as search_views.py) -----------------
+async def search(request):
+    user_id = session_user(request)
+    if user_id is None:
+        raise web.HTTPFound("/login")
+
+    query, page, sort_by, mode = search_params(request.query)
+    if not query:
+        return web.Response(text="No search query provided", status=400)
+
+    local_songs = []
+    try:
+        if mode == 'local':
+            local_songs = await in_flask(request, local_search_results, query, user_id, page)
+            if len(local_songs) >= LOCAL_SEARCH_MIN_HITS:
+                return await render(request, render_search_results, query, local_songs, page, sort_by)
+
+        try:
+            data = await saavn.aget_json("search/songs", {"query": query, "page": page})
+        except UpstreamError as e:
+            print(f"[ERROR] HTTP Request failed: {e}")
+            if local_songs:
+                return await render(request, render_search_results, query, local_songs, page, sort_by)
+            return web.Response(text="Failed to fetch data from Saavn API", status=500)
+
+        results = data.get("data", {}).get("results", [])
+        if not results:
+            return await render(request, render_search_results, query, local_songs, page, sort_by)
+        return await render(request, lambda: render_search_results(
+            query, ingest_search_results(results, user_id), page, sort_by))
+    except Exception as e:
+        print(f"[ERROR] General error in /search: {e}")
+        return web.Response(text="An error occurred while searching", status=500)
+
+
+async def autocomplete(request):
+    query = request.query.get("q", "").strip()
+    if not query:
+        return web.json_response([])
+
+    suggestions = await in_flask(request, autocomplete_index.suggest, query, 5)
+    if suggestions:
+        return web.json_response(suggestions)
+
+    # Cold miss: nothing local starts with this, ask upstream
+    try:
+        data = await saavn.aget_json("search/songs", {"query": query, "limit": 5}, timeout=5)
+    except Exception:
+        return web.json_response([])
+    return web.json_response([s.get("name") for s in data.get("data", {}).get("results", []) if s.get("name")])
+
+
+async def search_artist(request):
+    query = request.query.get("q", "").strip()
+    artists = []
+    error = None
+    if query:
+        try:
+            artists = artist_results(await saavn.aget_json("search/artists", {"query": query, "page": 0, "limit": 10}))
+        except UpstreamError:
+            error = "Error fetching artists. Please try again later."
+
+    return await render(request, lambda: render_template(
+        "search_artist.html", artists=artists, query=query, error=error))
+
+
+async def artist_detail(request):
+    artist_id = request.match_info["artist_id"]
+    try:
+        artist_res, albums_res = await saavn.aget_many(artist_calls(artist_id))
+        artist = artist_page(artist_id, artist_res, albums_res)
+    except Exception as e:
+        return await render(request, lambda: render_template(
+            "artist_detail.html", error=f"Error fetching artist: {str(e)}"))
+    return await render(request, lambda: render_template("artist_detail.html", artist=artist))
+
+
+async def album_detail(request):
+    album_id = request.match_info["album_id"]
+    try:
+        res = web.json_response(album_page(album_id, await saavn.aget_json("albums", {"id": album_id})))
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+    tag = conditional.body_etag(res.body)   # as search_views.album_detail
+    headers = {"ETag": f'"{tag}"', "Cache-Control": "public, no-cache"}
+    if any(e.value == tag and not e.is_weak for e in request.if_none_match or ()):
+        return web.Response(status=304, headers=headers)
+    res.headers.update(headers)
+    return res
+
+
+# ----------------- App -----------------
+def create_async_app(flask_app=None, threads=ASYNC_WORKER_THREADS):
+    if flask_app is None:
+        from app import app as flask_app
+
+    app = web.Application()
+    app["flask"] = flask_app
+    app["pool"] = ThreadPoolExecutor(threads, thread_name_prefix="async-worker")
+    app.router.add_get("/search", search)
+    app.router.add_get("/search/artist", search_artist)
+    app.router.add_get("/artist/{artist_id}", artist_detail)
+    app.router.add_get("/album/{album_id}", album_detail)
+    app.router.add_get("/autocomplete", autocomplete)
+    app.router.add_route("*", "/{tail:.*}", wsgi_fallback)
+
+    async def close(app):
+        await saavn.aclose()
+        app["pool"].shutdown(wait=False)
+
+    app.on_cleanup.append(close)
+    return app
+
+
+async def web_app():
+    """Entry point for ``gunicorn --worker-class aiohttp.GunicornWebWorker``."""
+    return create_async_app()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+    web.run_app(create_async_app(), host=args.host, port=args.port)
@@ -0,0 +1,356 @@
+# audio_cache.py
+# /stream/<song_id> proxies the CDN audio through a size-bounded on-disk
+# cache. Each upstream file is a sparse data file filled in fixed-size
+# chunks plus a small JSON index of which chunks are present, so a seek only
+# fetches the chunks it lands on. Fully cached ranges go out through
+# send_file (sendfile(2) under gunicorn); anything else streams while the
+# missing chunks are fetched with upstream Range requests. Concurrent
+# listeners of one track wait on the same chunk fetch instead of each going
+# to the CDN. Whole tracks are evicted least recently used first,
+# skipping ones still being fetched or read.
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Response, request, send_file, url_for
+
+from saavn import saavn, UpstreamError
+
+STREAM_PROXY = os.environ.get("STREAM_PROXY", "1").lower() in ("1", "true")
+AUDIO_CACHE_DIR = os.environ.get("AUDIO_CACHE_DIR", os.path.join("instance", "audio_cache"))
+AUDIO_CACHE_MAX_MB = int(os.environ.get("AUDIO_CACHE_MAX_MB", 2048))
+AUDIO_CHUNK_KB = int(os.environ.get("AUDIO_CHUNK_KB", 256))
+AUDIO_FETCH_CHUNKS = int(os.environ.get("AUDIO_FETCH_CHUNKS", 16))  # chunks per upstream request
+AUDIO_FETCH_THREADS = int(os.environ.get("AUDIO_FETCH_THREADS", 8))
+UPSTREAM_TIMEOUT = 15
+DEFAULT_TYPE = "audio/mp4"
+
+
+class Track:
+    """One upstream file: its sparse data file and which chunks of it are filled."""
+
+    def __init__(self, key, directory):
+        self.key = key
+        self.path = os.path.join(directory, key + ".data")
+        self.index_path = os.path.join(directory, key + ".json")
+        self.url = None
+        self.size = None
+        self.content_type = DEFAULT_TYPE
+        self.filled = set()
+        self.inflight = {}   # chunk index -> Event set when its fetch ends
+        self.readers = 0     # read() generators in progress; guarded by AudioCache._lock
+        self.lock = threading.Lock()
+        self.probe_lock = threading.Lock()  # first request learns the size
+
+    def load(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not os.path.exists(self.path):
+            return False
+        self.url = index["url"]
+        self.size = index["size"]
+        self.content_type = index.get("type") or DEFAULT_TYPE
+        self.filled = set(index["chunks"])
+        return True
+
+    def save(self):
+        with self.lock:
+            index = {"url": self.url, "size": self.size, "type": self.content_type,
+                     "chunks": sorted(self.filled)}
+        tmp = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_path)
+
+
+class AudioCache:
+    def __init__(self, directory=AUDIO_CACHE_DIR, max_bytes=AUDIO_CACHE_MAX_MB * 1024 * 1024,
+                 chunk_size=AUDIO_CHUNK_KB * 1024, fetch_chunks=AUDIO_FETCH_CHUNKS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.fetch_chunks = fetch_chunks
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.upstream_requests = 0
+        self.upstream_bytes = 0
+        self.evictions = 0
+        self._tracks = OrderedDict()   # key -> Track, least recently used first
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(AUDIO_FETCH_THREADS, thread_name_prefix="audio-fetch")
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Pick up tracks cached by earlier runs, oldest access first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                path = os.path.join(self.directory, name)
+                entries.append((os.path.getmtime(path), name[:-5]))
+        for _, key in sorted(entries):
+            track = Track(key, self.directory)
+            if track.load():
+                self._tracks[key] = track
+                self.used += self._track_bytes(track)
+
+    def _chunk_bytes(self, track, idx):
+        return min(self.chunk_size, track.size - idx * self.chunk_size)
+
+    def _track_bytes(self, track):
+        return sum(self._chunk_bytes(track, idx) for idx in track.filled)
+
+    def chunk_count(self, track):
+        return -(-track.size // self.chunk_size)
+
+    # ---------- lookup ----------
+    def track(self, url, offset=0):
+        """The Track for ``url`` (a new url is a new entry), learning its size on first use.
+
+        The size comes with the chunk at ``offset``, the first one the caller wants.
+        """
+        key = hashlib.sha1(url.encode()).hexdigest()
+        with self._lock:
+            track = self._tracks.get(key)
+            if track is None:
+                track = self._tracks[key] = Track(key, self.directory)
+                track.url = url
+            self._tracks.move_to_end(key)
+        if track.size is None:
+            with track.probe_lock:
+                if track.size is None:
+                    idx = offset // self.chunk_size
+                    try:
+                        self._fetch(track, idx, idx, probe=True)   # one chunk, so the first byte isn't held up
+                    except UpstreamError:
+                        with self._lock:
+                            self._tracks.pop(track.key, None)
+                        raise
+        return track
+
+    def is_cached(self, track, start, stop):
+        first, last = start // self.chunk_size, (stop - 1) // self.chunk_size
+        with track.lock:
+            return all(idx in track.filled for idx in range(first, last + 1))
+
+    # ---------- filling ----------
+    def ensure(self, track, idx, last):
+        """Block until chunk ``idx`` is on disk, starting a fetch of it (and the run after it, up to chunk ``last``) if none is running.
+
+        Runs are fetched on the pool and every chunk is released as soon as it
+        is written, so listeners, including the one that started the run,
+        stream chunk by chunk.
+        """
+        for _ in range(3):
+            with track.lock:
+                if idx in track.filled:
+                    return
+                waiter = track.inflight.get(idx)
+                if waiter is None:
+                    claimed = []
+                    for n in range(idx, min(idx + self.fetch_chunks, last + 1, self.chunk_count(track))):
+                        if n in track.filled or n in track.inflight:
+                            break
+                        track.inflight[n] = threading.Event()
+                        claimed.append(n)
+                    waiter = track.inflight[idx]
+                    self._pool.submit(self._fetch_run, track, claimed)
+            waiter.wait(UPSTREAM_TIMEOUT)
+        with track.lock:
+            if idx not in track.filled:
+                raise UpstreamError(f"chunk {idx} of {track.url} could not be fetched")
+
+    def _fetch_run(self, track, claimed):
+        try:
+            self._fetch(track, claimed[0], claimed[-1])
+        except Exception as e:
+            print(f"[ERROR] Audio fetch failed: {e}")
+        finally:
+            with track.lock:
+                for n in claimed:
+                    track.inflight.pop(n).set()
+
+    def _fetch(self, track, first, last, probe=False):
+        """GET chunks ``first``..``last`` with one Range request and write them as they arrive."""
+        start = first * self.chunk_size
+        stop = (last + 1) * self.chunk_size
+        if track.size is not None:
+            stop = min(stop, track.size)
+        with self._lock:
+            self.upstream_requests += 1
+
+        try:
+            res = saavn.session.get(track.url, headers={"Range": f"bytes={start}-{stop - 1}"},
+                                    stream=True, timeout=UPSTREAM_TIMEOUT)
+        except Exception as e:
+            raise UpstreamError(f"GET {track.url} failed: {e}") from e
+        with res:
+            if res.status_code == 206:
+                total = res.headers.get("Content-Range", "").rpartition("/")[2]
+                offset = start
+            elif res.status_code == 200:
+                total = res.headers.get("Content-Length", "")
+                offset = 0   # upstream ignored Range; skip to the chunks we want
+            else:
+                raise UpstreamError(f"GET {track.url} returned HTTP {res.status_code}")
+            if not total.isdigit():
+                raise UpstreamError(f"GET {track.url}: unknown length")
+
+            if probe:
+                size = int(total)
+                track.content_type = res.headers.get("Content-Type") or DEFAULT_TYPE
+                with open(track.path, "ab") as f:
+                    f.truncate(size)
+                stop = min(stop, size)
+
+            fd = os.open(track.path, os.O_WRONLY)
+            try:
+                buf = bytearray()
+                for block in res.iter_content(64 * 1024):
+                    with self._lock:
+                        self.upstream_bytes += len(block)
+                    if offset + len(buf) + len(block) <= start:
+                        offset += len(block)
+                        continue
+                    if offset < start:
+                        block = block[start - offset:]
+                        offset = start
+                    buf += block[:stop - offset - len(buf)]   # never a partial chunk past stop
+                    while len(buf) >= self.chunk_size or (buf and offset + len(buf) >= stop):
+                        n = min(self.chunk_size, len(buf))
+                        self._write_chunk(track, fd, offset, bytes(buf[:n]))
+                        del buf[:n]
+                        offset += n
+                    if offset >= stop:
+                        break
+            finally:
+                os.close(fd)
+        if probe:
+            track.size = size   # published once chunk 0 is on disk, so nobody fetches it twice
+        track.save()
+        self._evict(keep=track)
+
+    def _write_chunk(self, track, fd, offset, data):
+        os.pwrite(fd, data, offset)
+        idx = offset // self.chunk_size
+        with track.lock:
+            if idx in track.filled:
+                return
+            track.filled.add(idx)
+            waiter = track.inflight.get(idx)
+        if waiter is not None:
+            waiter.set()   # listeners streaming this chunk can go on before the run ends
+        with self._lock:
+            self.used += len(data)
+
+    def _evict(self, keep):
+        with self._lock:
+            while self.used > self.max_bytes:
+                victim = next((t for t in self._tracks.values()
+                               if t is not keep and not t.inflight and not t.readers), None)
+                if victim is None:
+                    return
+                del self._tracks[victim.key]
+                self.used -= self._track_bytes(victim)
+                self.evictions += 1
+                for path in (victim.path, victim.index_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    # ---------- reading ----------
+    def read(self, track, start, stop):
+        """Yield bytes ``start``..``stop`` of the track, filling missing chunks on the way.
+
+        The track can't be evicted while this runs.
+        """
+        with self._lock:
+            track.readers += 1
+        try:
+            with open(track.path, "rb") as f:
+                pos = start
+                last = (stop - 1) // self.chunk_size
+                while pos < stop:
+                    idx = pos // self.chunk_size
+                    self.ensure(track, idx, last)
+                    end = min(stop, (idx + 1) * self.chunk_size)
+                    yield os.pread(f.fileno(), end - pos, pos)
+                    pos = end
+        finally:
+            with self._lock:
+                track.readers -= 1
+
+    def count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        return {
+            "tracks": len(self._tracks),
+            "used_bytes": self.used,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "upstream_requests": self.upstream_requests,
+            "upstream_bytes": self.upstream_bytes,
+            "evictions": self.evictions,
+        }
+
+
+audio_cache = None
+_init_lock = threading.Lock()
+
+
+def get_cache():
+    global audio_cache
+    if audio_cache is None:
+        with _init_lock:
+            if audio_cache is None:
+                audio_cache = AudioCache()
+    return audio_cache
+
+
+# ----------------- Response -----------------
+def stream_url(song_id, audio_url):
+    """What the player should load: /stream/<song_id>, or the CDN url itself with STREAM_PROXY off."""
+    if not audio_url or not STREAM_PROXY:
+        return audio_url
+    return url_for("playback.stream_song", song_id=song_id)
+
+
+def serve(url):
+    """Response for the current request (Range or not) of the audio at ``url``; raises UpstreamError."""
+    cache = get_cache()
+    first = request.range.ranges[0][0] if request.range else 0
+    track = cache.track(url, max(first, 0))   # suffix ranges (bytes=-N) are negative
+
+    byte_range = request.range.range_for_length(track.size) if request.range else None
+    if request.range and byte_range is None and len(request.range.ranges) == 1:
+        return Response(status=416, headers={"Content-Range": f"bytes */{track.size}"})
+    start, stop = byte_range or (0, track.size)
+
+    hit = cache.is_cached(track, start, stop)
+    cache.count(hit)
+    if hit:
+        # werkzeug answers the Range itself and hands the file to wsgi.file_wrapper
+        res = send_file(track.path, mimetype=track.content_type, conditional=True, max_age=86400)
+        res.cache_control.public = False   # behind a login: browsers may keep it, shared caches may not
+        res.cache_control.private = True
+        return res
+
+    headers = {"Accept-Ranges": "bytes", "Content-Length": str(stop - start)}
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{track.size}"
+    return Response(cache.read(track, start, stop), status=206 if byte_range else 200,
+                    headers=headers, mimetype=track.content_type, direct_passthrough=True)
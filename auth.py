@@ -1,29 +1,72 @@
-from flask import Blueprint, request, jsonify
-from models import db, User
-from werkzeug.security import check_password_hash
-import jwt
+# Session login for the web pages, plus a JSON token API for other clients.
 import datetime
-from flask_cors import CORS
 
-auth_bp = Blueprint('auth', __name__)
-CORS(auth_bp)
+from flask import Blueprint, request, render_template, session, redirect, url_for, flash, jsonify, current_app
+from flask_cors import cross_origin
+
+from extensions import db
+from models import User
 
-SECRET_KEY = 'your_secret_key'  # Same as in app config
+auth_bp = Blueprint('auth', __name__)
 
 
-@auth_bp.route('/register', methods=['POST'])
+@auth_bp.route('/register', methods=['GET', 'POST'])
 def register():
-    data = request.get_json()
+    if request.method == 'POST':
+        username = request.form['username']
+        email = request.form['email']
+        password = request.form['password']
+
+        if User.query.filter_by(username=username).first():
+            return "Username already exists"
+        if User.query.filter_by(email=email).first():
+            return "Email already exists"
+
+        user = User(username=username, email=email)
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+        return redirect(url_for('auth.login'))
+
+    return render_template('register.html')
+
+@auth_bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        user = User.query.filter_by(username=username).first()
+        if user and user.check_password(password):
+            session['user_id'] = user.id
+            return redirect(url_for('library.index'))
+        return "Invalid credentials"
+    return render_template('login.html')
+
+@auth_bp.route('/logout')
+def logout():
+    session.pop('user_id', None)
+    flash("Logged out successfully!", "success")
+    return redirect(url_for('auth.login'))
+
+
+# ----------------- Token API (/api/auth) -----------------
+@auth_bp.route('/api/auth/register', methods=['POST'])
+@cross_origin()
+def api_register():
+    data = request.get_json() or {}
     username = data.get('username')
+    email = data.get('email')
     password = data.get('password')
 
-    if not username or not password:
-        return jsonify({'message': 'Username and password are required'}), 400
+    if not username or not email or not password:
+        return jsonify({'message': 'Username, email and password are required'}), 400
 
     if User.query.filter_by(username=username).first():
         return jsonify({'message': 'Username already exists'}), 409
+    if User.query.filter_by(email=email).first():
+        return jsonify({'message': 'Email already exists'}), 409
 
-    new_user = User(username=username)
+    new_user = User(username=username, email=email)
     new_user.set_password(password)
     db.session.add(new_user)
     db.session.commit()
@@ -31,20 +74,26 @@ def register():
     return jsonify({'message': 'User registered successfully'}), 201
 
 
-@auth_bp.route('/login', methods=['POST'])
-def login():
-    data = request.get_json()
+@auth_bp.route('/api/auth/login', methods=['POST'])
+@cross_origin()
+def api_login():
+    try:
+        import jwt  # only token clients need PyJWT
+    except ImportError:
+        return jsonify({'message': 'Token login needs PyJWT installed'}), 501
+
+    data = request.get_json() or {}
     username = data.get('username')
     password = data.get('password')
 
     user = User.query.filter_by(username=username).first()
 
-    if not user or not check_password_hash(user.password, password):
+    if not user or not user.check_password(password or ''):
         return jsonify({'message': 'Invalid username or password'}), 401
 
     token = jwt.encode({
         'user_id': user.id,
         'exp': datetime.datetime.utcnow() + datetime.timedelta(days=1)
-    }, SECRET_KEY, algorithm='HS256')
+    }, current_app.secret_key, algorithm='HS256')
 
     return jsonify({'token': token, 'user_id': user.id, 'username': user.username}), 200
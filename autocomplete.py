@@ -0,0 +1,327 @@
+import atexit
+import bisect
+import gc
+from contextlib import contextmanager
+import os
+import pickle
+import threading
+import time
+import unicodedata
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from models import db, Song, Artist, UserFavorites
+from history import play_counts
+
+SNAPSHOT_PATH = os.environ.get("AUTOCOMPLETE_SNAPSHOT", os.path.join("instance", "autocomplete.pickle"))
+AUTOCOMPLETE_WARM = os.environ.get("AUTOCOMPLETE_WARM", "1").lower() in ("1", "true")  # load at startup
+AUTOCOMPLETE_REFRESH = int(os.environ.get("AUTOCOMPLETE_REFRESH", 3600))  # seconds between weight refreshes, 0 disables
+SNAPSHOT_EVERY = 500       # incremental inserts between snapshots
+MAX_PREFIX = 12            # longest prefix with its own bucket
+BUCKET_SIZE = 50           # candidates kept per prefix, best first
+FAVORITE_WEIGHT = 3        # one favorite counts as this many plays
+_SNAPSHOT_VERSION = 2
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
+@contextmanager
+def _no_gc():
+    """Pause the cycle collector while creating millions of small lists."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _word_suffixes(norm):
+    """``"tum hi ho"`` -> ``["tum hi ho", "hi ho", "ho"]`` so any word can start a match."""
+    words = norm.split(" ")
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+# ----------------- Prefix index -----------------
+class PrefixIndex:
+    """Weighted top-k prefix lookup over song and artist names.
+
+    Every prefix (up to ``MAX_PREFIX`` chars) of every word-suffix of an
+    entry maps to a short list of entry ids ordered by weight, so a query is
+    one dict lookup plus a slice. Longer queries filter their bucket.
+    """
+
+    def __init__(self):
+        self.texts = []          # entry id -> display text
+        self.weights = []        # entry id -> popularity weight
+        self.ids = {}            # normalized text -> entry id
+        self.buckets = {}        # prefix -> [entry id, ...] best first
+        self.max_song_id = 0     # catalog high-water mark covered by the index
+        self.dirty = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _prefixes(self, norm):
+        keys = set()
+        for suffix in _word_suffixes(norm):
+            for end in range(1, min(len(suffix), MAX_PREFIX) + 1):
+                keys.add(suffix[:end])
+        return keys
+
+    def _sort_key(self, entry_id):
+        return -self.weights[entry_id]
+
+    def bulk_load(self, entries):
+        """Replace the contents with ``(text, weight)`` pairs in one pass."""
+        with _no_gc():
+            texts, weights, ids, buckets = self._build(entries)
+        with self._lock:
+            self.texts, self.weights, self.ids, self.buckets = texts, weights, ids, buckets
+
+    def _build(self, entries):
+        texts, weights, ids, buckets = [], [], {}, {}
+        for text, weight in entries:
+            norm = normalize(text)
+            if not norm:
+                continue
+            if norm in ids:
+                weights[ids[norm]] += weight
+                continue
+            ids[norm] = len(texts)
+            texts.append(text)
+            weights.append(weight)
+
+        for norm, entry_id in ids.items():
+            for key in self._prefixes(norm):
+                buckets.setdefault(key, []).append(entry_id)
+        for key, bucket in buckets.items():
+            bucket.sort(key=lambda i: -weights[i])
+            del bucket[BUCKET_SIZE:]
+        return texts, weights, ids, buckets
+
+    def add(self, text, weight=1):
+        """Insert ``text`` or raise its weight by ``weight``."""
+        norm = normalize(text)
+        if not norm:
+            return
+        with self._lock:
+            entry_id = self.ids.get(norm)
+            if entry_id is None:
+                entry_id = self.ids[norm] = len(self.texts)
+                self.texts.append(text)
+                self.weights.append(weight)
+            else:
+                self.weights[entry_id] += weight
+
+            for key in self._prefixes(norm):
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    self.buckets[key] = [entry_id]
+                    continue
+                if entry_id in bucket:
+                    bucket.remove(entry_id)
+                bisect.insort(bucket, entry_id, key=self._sort_key)
+                del bucket[BUCKET_SIZE:]
+            self.dirty += 1
+
+    def suggest(self, query, k=5):
+        """Top-``k`` display texts starting with ``query`` at any word."""
+        norm = normalize(query)
+        if not norm:
+            return []
+        bucket = self.buckets.get(norm[:MAX_PREFIX], ())
+        if len(norm) <= MAX_PREFIX:
+            return [self.texts[i] for i in bucket[:k]]
+
+        results = []
+        for entry_id in bucket:
+            if any(s.startswith(norm) for s in _word_suffixes(normalize(self.texts[entry_id]))):
+                results.append(self.texts[entry_id])
+                if len(results) == k:
+                    break
+        return results
+
+    # ---------- snapshot ----------
+    def save(self, path=SNAPSHOT_PATH):
+        with self._lock:
+            state = {
+                "version": _SNAPSHOT_VERSION,
+                "texts": self.texts,
+                "weights": self.weights,
+                "ids": self.ids,
+                "buckets": self.buckets,
+                "max_song_id": self.max_song_id,
+            }
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self.dirty = 0
+
+    def load(self, path=SNAPSHOT_PATH):
+        """Restore from a snapshot written by :meth:`save`; False if there isn't a usable one."""
+        try:
+            with open(path, "rb") as f, _no_gc():
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False
+        if state.get("version") != _SNAPSHOT_VERSION:
+            return False
+        with self._lock:
+            self.texts = state["texts"]
+            self.weights = state["weights"]
+            self.buckets = state["buckets"]
+            self.ids = state["ids"]
+            self.max_song_id = state["max_song_id"]
+            self.dirty = 0
+        return True
+
+
+# ----------------- Catalog wiring -----------------
+_index = PrefixIndex()
+_ready = False
+_ready_lock = threading.Lock()
+_warm_pid = None           # process whose background load is running or done
+_warm_lock = threading.Lock()
+
+
+def _catalog_entries(after_song_id=0):
+    """``(text, weight)`` pairs for songs with id > ``after_song_id`` and their artists.
+
+    The weights are only aggregated for those songs, so topping up a loaded
+    snapshot costs index range scans, not full GROUP BYs.
+    """
+    plays = play_counts(after_song_id)
+    favorites = dict(db.session.execute(
+        select(UserFavorites.song_id, func.count())
+        .where(UserFavorites.song_id > after_song_id)
+        .group_by(UserFavorites.song_id)
+    ).all())
+
+    rows = db.session.execute(
+        select(Song.id, Song.name, Artist.name)
+        .outerjoin(Artist, Artist.id == Song.artist_id)
+        .where(Song.id > after_song_id)
+    ).all()
+
+    entries, artist_weights, max_id = [], {}, after_song_id
+    for song_id, song_name, artist_name in rows:
+        weight = 1 + plays.get(song_id, 0) + FAVORITE_WEIGHT * favorites.get(song_id, 0)
+        entries.append((song_name, weight))
+        if artist_name:
+            artist_weights[artist_name] = artist_weights.get(artist_name, 0) + weight
+        max_id = max(max_id, song_id)
+    entries.extend(artist_weights.items())
+    return entries, max_id
+
+
+def build_index():
+    """Rebuild the index from the database and snapshot it."""
+    global _ready
+    entries, max_id = _catalog_entries()
+    _index.bulk_load(entries)
+    _index.max_song_id = max_id
+    _top_up()   # songs ingested while the aggregates ran
+    _index.save()
+    _ready = True
+    return _index
+
+
+def _top_up():
+    entries, max_id = _catalog_entries(after_song_id=_index.max_song_id)
+    for text, weight in entries:
+        _index.add(text, weight)
+    _index.max_song_id = max_id
+
+
+def get_index():
+    """The process-wide index, loaded from the snapshot (plus newer songs) or built on first use."""
+    global _ready
+    if _ready:
+        return _index
+    with _ready_lock:
+        if not _ready:
+            if _index.load():
+                _top_up()
+            else:
+                build_index()
+            _ready = True
+    return _index
+
+
+def warm(app=None):
+    """Load the index on a background thread, once per process, then keep its weights fresh."""
+    global _warm_pid
+    with _warm_lock:
+        if _ready or _warm_pid == os.getpid():
+            return
+        _warm_pid = os.getpid()
+    app = app or current_app._get_current_object()
+    threading.Thread(target=_warm, args=(app,), name="autocomplete-warm", daemon=True).start()
+
+
+def _warm(app):
+    global _warm_pid
+    try:
+        with app.app_context():
+            get_index()
+    except Exception as e:
+        print(f"[ERROR] Loading the autocomplete index failed: {e}")
+        with _warm_lock:
+            _warm_pid = None   # the next suggest() tries again
+        return
+
+    # weights come from plays and favorites, which keep changing after the build
+    while AUTOCOMPLETE_REFRESH:
+        time.sleep(AUTOCOMPLETE_REFRESH)
+        try:
+            with app.app_context():
+                build_index()
+        except Exception as e:
+            print(f"[ERROR] Refreshing autocomplete weights failed: {e}")
+
+
+def init_app(app):
+    # `flask db upgrade` and friends don't serve suggestions (`flask run` warms on first use)
+    if AUTOCOMPLETE_WARM and not os.environ.get("FLASK_RUN_FROM_CLI"):
+        warm(app)
+
+
+def add_songs(songs):
+    """Feed newly ingested ``(song_id, name, artist_name)`` rows into a loaded index."""
+    if not _ready:
+        return  # picked up from the database when the index is first built
+    for song_id, name, artist_name in songs:
+        _index.add(name)
+        if artist_name:
+            _index.add(artist_name)
+        _index.max_song_id = max(_index.max_song_id, song_id)
+    if _index.dirty >= SNAPSHOT_EVERY:
+        _index.save()
+
+
+def suggest(query, k=5):
+    """Suggestions from the index; [] (the caller asks upstream) while it is still loading."""
+    if not _ready:
+        warm()
+        return []
+    return _index.suggest(query, k)
+
+
+@atexit.register
+def _save_on_exit():
+    if _ready and _index.dirty:
+        try:
+            _index.save()
+        except OSError:
+            pass
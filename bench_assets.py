@@ -0,0 +1,77 @@
+# bench_assets.py
+# CSS/JS bytes and requests per page view, with the static files served
+# plain (ASSETS_BUILD=off, no build) and fingerprinted from static/dist/.
+# A first visit downloads every stylesheet and script the page links; a
+# repeat visit revalidates whatever the browser may not reuse outright
+# (plain files carry no max-age, fingerprinted ones are immutable).
+#
+#   python bench_assets.py
+
+import os
+import re
+import tempfile
+
+PAGES = ["/", "/favorites", "/recently-played", "/playlists", "/profile"]
+ASSET = re.compile(r"""(?:href|src)=["'](/static/[^"']+\.(?:css|js))["']""")
+
+
+def visit(client, page, etags, encoding):
+    """(html bytes, asset requests, asset bytes) for one view of ``page``."""
+    html = client.get(page)
+    requests = size = 0
+    for url in dict.fromkeys(ASSET.findall(html.get_data(as_text=True))):
+        cached = etags.get(url)
+        if cached == "immutable":
+            continue
+        headers = {"Accept-Encoding": encoding}
+        if cached:
+            headers["If-None-Match"] = cached
+        res = client.get(url, headers=headers)
+        requests += 1
+        size += len(res.get_data())
+        immutable = "immutable" in res.headers.get("Cache-Control", "")
+        etags[url] = "immutable" if immutable else res.headers.get("ETag")
+        res.close()
+    return len(html.get_data()), requests, size
+
+
+def main():
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update({
+        "DATABASE_URL": "sqlite:///" + os.path.join(tmp.name, "bench.db"),
+        "AUTOCOMPLETE_SNAPSHOT": os.path.join(tmp.name, "autocomplete.pickle"),
+        "AUTOCOMPLETE_WARM": "0",
+        "PLAYBACK_STORE": "memory",
+        "PLAY_COMPACT_INTERVAL": "0",
+        "PROFILING": "0",
+    })
+    from werkzeug.security import generate_password_hash
+    from app import app
+    from models import db, User
+
+    with app.app_context():
+        db.create_all()
+        user = User(username="bench", email="bench@example.com", password_hash=generate_password_hash("bench"))
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    built = app.extensions["assets"]
+    print(f"{'':<18}{'first visit':>26}{'repeat visit':>26}")
+    for label, files, encoding in (("plain", {}, "identity"), ("fingerprinted", built, "gzip, deflate, br")):
+        app.extensions["assets"] = files
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["user_id"] = user_id
+        etags = {}
+        first = [visit(client, page, etags, encoding) for page in PAGES]
+        repeat = [visit(client, page, etags, encoding) for page in PAGES]
+        print(f"  {label:<16}"
+              + "".join(f"{sum(r for _, r, _ in v):>6} requests {sum(s for _, _, s in v) / 1024:>7.1f} KB"
+                        for v in (first, repeat)))
+    app.extensions["assets"] = built
+    print(f"\n  over {len(PAGES)} pages: {', '.join(PAGES)}")
+
+
+if __name__ == "__main__":
+    main()
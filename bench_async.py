@@ -0,0 +1,204 @@
+# bench_async.py
+# Concurrent /search load against the sync Flask app and the async
+# aiohttp path (async_app.py), each in one process, with saavn.dev replaced
+# by a local stub that answers after --latency-ms (asyncio, so it never
+# becomes the bottleneck). The sync server models one gthread worker:
+# --sync-threads requests in flight, the rest wait for a thread.
+#
+# For each concurrency level, every virtual user issues searches back to
+# back for --seconds; reported are throughput, p50/p99 and errors, and per
+# server the highest level that kept p99 under --slo-ms without errors,
+# i.e. how many concurrent searches one process (one core) can carry.
+#
+#   python bench_async.py [--levels 8 32 128 512 1024] [--latency-ms 200]
+#                         [--sync-threads 8] [--seconds 5] [--slo-ms 1000]
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from bench_routes import FIXTURES, WORDS, _fixture_for, seed
+
+
+def serve_stub(latency, port_queue):
+    from aiohttp import web
+
+    payloads = {name: open(os.path.join(FIXTURES, name), "rb").read() for name in os.listdir(FIXTURES)}
+
+    async def handle(request):
+        await asyncio.sleep(latency)
+        body = payloads.get(_fixture_for(request.path))
+        return web.Response(status=200 if body else 404, body=body or b'{"success": false}',
+                            content_type="application/json")
+
+    async def main():
+        app = web.Application()
+        app.router.add_route("GET", "/{tail:.*}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, backlog=4096)
+        await site.start()
+        port_queue.put(site._server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def serve_sync(env, threads, port_queue):
+    """The Flask app on werkzeug, at most ``threads`` requests in flight (a gthread worker)."""
+    os.environ.update(env)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    from werkzeug.serving import make_server
+    from app import app
+
+    slots = threading.BoundedSemaphore(threads)
+
+    def bounded(environ, start_response):
+        with slots:
+            return list(app(environ, start_response))
+
+    server = make_server("127.0.0.1", 0, bounded, threaded=True)
+    server.socket.listen(4096)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def serve_async(env, port_queue):
+    os.environ.update(env)
+    from aiohttp import web
+    from async_app import create_async_app
+
+    async def main():
+        runner = web.AppRunner(create_async_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, backlog=4096)
+        await site.start()
+        port_queue.put(site._server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def start_process(target, *args):
+    ctx = multiprocessing.get_context("spawn")
+    port_queue = ctx.Queue()
+    proc = ctx.Process(target=target, args=(*args, port_queue), daemon=True)
+    proc.start()
+    return proc, port_queue.get(timeout=60)
+
+
+def seed_database(env, users, songs):
+    os.environ.update(env)
+    from argparse import Namespace
+    from app import app
+
+    args = Namespace(users=users, songs=songs, favorites=20, queue=5, plays=10, playlists=1, playlist_size=5)
+    with app.app_context():
+        seed(args, random.Random(7))
+    cookies = {}
+    for u in range(1, users + 1):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["user_id"] = u
+        cookies[u] = client.get_cookie("session").value
+    return cookies
+
+
+async def load(base_url, cookies, concurrency, seconds):
+    import aiohttp
+
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http:
+        async def user(n):
+            nonlocal errors
+            rng = random.Random(n)
+            cookie = cookies[n % len(cookies) + 1]
+            while time.perf_counter() < deadline:
+                q = f"{rng.choice(WORDS)} {rng.randrange(100000)}"
+                start = time.perf_counter()
+                try:
+                    async with http.get(f"{base_url}/search", params={"q": q},
+                                        cookies={"session": cookie}, allow_redirects=False) as res:
+                        await res.read()
+                        failed = res.status != 200
+                except Exception:
+                    failed = True
+                latencies.append(time.perf_counter() - start)
+                errors += failed
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "req_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", type=int, nargs="+", default=[8, 32, 128, 512, 1024])
+    parser.add_argument("--latency-ms", type=float, default=200, help="stub saavn.dev latency")
+    parser.add_argument("--sync-threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--slo-ms", type=float, default=1000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--songs", type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    stub, stub_port = start_process(serve_stub, args.latency_ms / 1000)
+    env = {
+        "DATABASE_URL": "sqlite:///" + os.path.join(tmp.name, "bench.db"),
+        "SAAVN_BASE_URL": f"http://127.0.0.1:{stub_port}/api",
+        "SAAVN_CACHE_BACKEND": "off",   # every search waits on the upstream
+        "AUTOCOMPLETE_SNAPSHOT": os.path.join(tmp.name, "autocomplete.pickle"),
+        "AUTOCOMPLETE_WARM": "0",
+        "PLAYBACK_STORE": "memory",
+        "PLAY_COMPACT_INTERVAL": "0",
+        "PROFILING": "0",
+    }
+    cookies = seed_database(env, args.users, args.songs)
+
+    servers = {
+        f"sync ({args.sync_threads} threads)": (serve_sync, (env, args.sync_threads)),
+        "async": (serve_async, (env,)),
+    }
+    best = {}
+    for name, (target, target_args) in servers.items():
+        proc, port = start_process(target, *target_args)
+        print(f"\n=== {name}, upstream {args.latency_ms:g} ms ===")
+        best[name] = 0
+        try:
+            for level in args.levels:
+                r = asyncio.run(load(f"http://127.0.0.1:{port}", cookies, level, args.seconds))
+                ok = r["errors"] == 0 and r["p99_ms"] <= args.slo_ms
+                if ok:
+                    best[name] = level
+                print(f"  {level:>5} concurrent  {r['req_per_s']:>8.1f} req/s  p50 {r['p50_ms']:>8.1f}  "
+                      f"p99 {r['p99_ms']:>8.1f} ms  {r['errors']} errors{'' if ok else '  (over SLO)'}")
+        finally:
+            proc.terminate()
+
+    stub.terminate()
+    print(f"\nmax concurrent searches per process within p99 {args.slo_ms:g} ms:")
+    for name, level in best.items():
+        print(f"  {name:<20}{level}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# bench_db_concurrency.py
+# Mixed reads and writes from several worker processes (as gunicorn would
+# run them) against one SQLite file, once per DB_PROFILE:
+#   development  SQLAlchemy defaults: rollback journal, one engine
+#   production   WAL, synchronous=NORMAL, busy_timeout, read-only reader pool
+# Each worker runs threads that drive the app through the test client with
+# a write share of toggle_favorite / POST /queue and reads of /queue,
+# /recently-played, /profile and /api/songs. Reports throughput, read and
+# write latency, and failed requests ("database is locked" shows up here).
+#
+#   python bench_db_concurrency.py [--workers 4] [--threads 4] [--seconds 5]
+#                                  [--write-ratio 0.2] [--profiles development production]
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+READS = ["/queue", "/recently-played", "/profile", "/api/songs?after={after}"]
+
+
+def seed_database(path, users, songs, seed):
+    os.environ.update({"DATABASE_URL": "sqlite:///" + path, "DB_PROFILE": "development",
+                       "PLAY_COMPACT_INTERVAL": "0"})
+    from app import app
+    from bench_routes import seed as seed_rows
+
+    args = SimpleNamespace(users=users, songs=songs, favorites=50, queue=50, plays=100,
+                           playlists=1, playlist_size=20)
+    with app.app_context():
+        seed_rows(args, random.Random(seed))
+
+
+def worker(env, args, worker_id, results):
+    os.environ.update(env)
+    from app import app
+    from flask import has_request_context  # noqa: F401  (app import must come first)
+    import threading
+
+    logging.getLogger(app.logger.name).setLevel(logging.CRITICAL)  # failed requests are counted
+    deadline = time.perf_counter() + args.seconds
+    lock = threading.Lock()
+    reads, writes, errors = [], [], [0]
+
+    def run(thread_id):
+        rng = random.Random(args.seed * 1000 + worker_id * 100 + thread_id)
+        client = app.test_client()
+        user_id = rng.randint(1, args.users)
+        with client.session_transaction() as sess:
+            sess["user_id"] = user_id
+        mine_r, mine_w, failed = [], [], 0
+        while time.perf_counter() < deadline:
+            write = rng.random() < args.write_ratio
+            start = time.perf_counter()
+            if write and rng.random() < 0.5:
+                res = client.post("/toggle_favorite", json={"song_id": rng.randint(1, args.songs)})
+            elif write:
+                res = client.post("/queue", json={"song_id": rng.randint(1, args.songs)})
+            else:
+                res = client.get(rng.choice(READS).format(after=rng.randint(0, args.songs)))
+            res.get_data()
+            res.close()
+            (mine_w if write else mine_r).append(time.perf_counter() - start)
+            failed += res.status_code >= 500
+        with lock:
+            reads.extend(mine_r)
+            writes.extend(mine_w)
+            errors[0] += failed
+
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(args.threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put((reads, writes, errors[0]))
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def run_profile(profile, db_path, args):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    env = {"DATABASE_URL": "sqlite:///" + db_path, "DB_PROFILE": profile,
+           "PLAY_COMPACT_INTERVAL": "0", "PLAYBACK_STORE": "memory", "PROFILING": "0"}
+    procs = [ctx.Process(target=worker, args=(env, args, w, results)) for w in range(args.workers)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    collected = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - start
+
+    reads = [t for r, _, _ in collected for t in r]
+    writes = [t for _, w, _ in collected for t in w]
+    errors = sum(e for _, _, e in collected)
+    ops = len(reads) + len(writes)
+    print(f"{profile:<12}{ops / args.seconds:>9.0f} req/s   "
+          f"read p50 {percentile(reads, 0.5):6.2f} p99 {percentile(reads, 0.99):7.2f} ms   "
+          f"write p50 {percentile(writes, 0.5):6.2f} p99 {percentile(writes, 0.99):7.2f} ms   "
+          f"{errors} failed   (wall {elapsed:.1f}s)")
+    if reads:
+        return statistics.median(reads)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4, help="processes")
+    parser.add_argument("--threads", type=int, default=4, help="per worker")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--songs", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--profiles", nargs="+", default=["development", "production"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "base.db")
+        ctx = multiprocessing.get_context("spawn")
+        seeder = ctx.Process(target=seed_database, args=(base, args.users, args.songs, args.seed))
+        seeder.start()
+        seeder.join()
+
+        print(f"{args.workers} workers x {args.threads} threads, {args.seconds:g}s, "
+              f"{args.write_ratio:.0%} writes")
+        for profile in args.profiles:
+            path = os.path.join(tmp, f"{profile}.db")
+            shutil.copy(base, path)   # each profile starts from the same rollback-journal file
+            run_profile(profile, path, args)
+
+
+if __name__ == "__main__":
+    main()
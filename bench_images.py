@@ -0,0 +1,165 @@
+# bench_images.py
+# Bytes and latency of album art on card pages: hotlinking the 500 px
+# original (what every page did) against /img/<song_id>?w= thumbnails.
+# A local server stands in for the image CDN and serves saavn.dev-style
+# -50x50/-150x150/-500x500 renditions (real JPEGs when Pillow is
+# installed, otherwise random bytes of typical sizes).
+#
+#   python bench_images.py [--cards 10] [--latency-ms 40] [--songs 200]
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from bench_routes import start_process
+
+# typical saavn.dev JPEG sizes per rendition
+RENDITION_BYTES = {50: 2_500, 150: 12_000, 500: 90_000}
+
+
+def rendition(name, size):
+    try:
+        from PIL import Image
+    except ImportError:
+        return random.Random(f"{name}{size}").randbytes(RENDITION_BYTES[size])
+    from io import BytesIO
+
+    rng = random.Random(name)
+    image = Image.new("RGB", (size, size), tuple(rng.randrange(256) for _ in range(3)))
+    out = BytesIO()
+    image.save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+def serve_cdn(latency, port_queue):
+    from aiohttp import web
+
+    served = {"requests": 0, "bytes": 0}
+
+    async def handle(request):
+        name, size = request.match_info["name"], int(request.match_info["size"])
+        if size not in RENDITION_BYTES:
+            raise web.HTTPNotFound()
+        await asyncio.sleep(latency)
+        body = rendition(name, size)
+        served["requests"] += 1
+        served["bytes"] += len(body)
+        return web.Response(body=body, content_type="image/jpeg")
+
+    async def stats(request):
+        return web.json_response(served)
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/_stats", stats)
+        app.router.add_get(r"/art/{name}-{size:\d+}x{size2:\d+}.jpg", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port_queue.put(site._server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=10, help="thumbnails per page")
+    parser.add_argument("--width", type=int, default=64)
+    parser.add_argument("--songs", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=40, help="image CDN latency")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    cdn, port = start_process(serve_cdn, args.latency_ms / 1000)
+    cdn_url = f"http://127.0.0.1:{port}"
+    os.environ.update({
+        "DATABASE_URL": "sqlite:///" + os.path.join(tmp.name, "bench.db"),
+        "IMAGE_CACHE_DIR": os.path.join(tmp.name, "image_cache"),
+        "AUTOCOMPLETE_SNAPSHOT": os.path.join(tmp.name, "autocomplete.pickle"),
+        "AUTOCOMPLETE_WARM": "0",
+        "PLAYBACK_STORE": "memory",
+        "PLAY_COMPACT_INTERVAL": "0",
+        "PROFILING": "0",
+    })
+    import requests
+    from werkzeug.security import generate_password_hash
+    from app import app
+    from models import db, User, Song
+    import images
+
+    with app.app_context():
+        db.create_all()
+        user = User(username="bench", email="bench@example.com", password_hash=generate_password_hash("bench"))
+        db.session.add(user)
+        songs = [Song(name=f"Song {n}", image_url=f"{cdn_url}/art/song{n}-500x500.jpg") for n in range(args.songs)]
+        db.session.add_all(songs)
+        db.session.commit()
+        catalog = [(s.id, s.image_url) for s in songs]
+        user_id = user.id
+
+    def cdn_stats():
+        return requests.get(f"{cdn_url}/_stats").json()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"] = user_id
+    with app.test_request_context():
+        urls = {song_id: images.thumb_url(song_id, url, args.width) for song_id, url in catalog}
+
+    def page(ids, headers=None):
+        """Load one page's thumbnails; (per-image ms, bytes, statuses)."""
+        times, size, statuses = [], 0, []
+        for song_id in ids:
+            start = time.perf_counter()
+            res = client.get(urls[song_id], headers=(headers or {}).get(song_id, {}))
+            body = res.get_data()
+            times.append((time.perf_counter() - start) * 1000)
+            size += len(body)
+            statuses.append(res.status_code)
+            res.close()
+        return times, size, statuses
+
+    def report(label, times, size, note=""):
+        print(f"  {label:<22}{statistics.median(times):>8.2f} ms p50 per image {size / 1024:>9.1f} KB per page  {note}")
+
+    print(f"{args.cards} cards of {args.width} px per page, image CDN {args.latency_ms:g} ms, "
+          f"resizer: {images.get_store().stats()['resizer']}\n")
+
+    original = sum(len(rendition(f"song{n}", 500)) for n in range(args.cards))
+    print(f"  {'hotlinked 500 px':<22}{'':>23}{original / 1024:>9.1f} KB per page")
+
+    first = [song_id for song_id, _ in catalog[:args.cards]]
+    before = cdn_stats()
+    times, size, _ = page(first)
+    report("cold /img", times, size, f"CDN {cdn_stats()['bytes'] - before['bytes']:,} bytes")
+    times, size, statuses = page(first)
+    etags = {}
+    for song_id in first:
+        res = client.get(urls[song_id])
+        etags[song_id] = {"If-None-Match": res.headers["ETag"]}
+        res.close()
+    report("warm /img", times, size, f"Cache-Control: {client.get(urls[first[0]]).headers['Cache-Control']}")
+    times, size, statuses = page(first, etags)
+    report("revalidated (304)", times, size, f"{statuses.count(304)}/{len(statuses)} not modified")
+
+    # freshly ingested songs: thumbnails generated in the background before the page asks
+    fresh = [(song_id, url) for song_id, url in catalog[args.cards:args.cards * 2]]
+    images.prefetch([url for _, url in fresh])
+    images.get_store()._pool.shutdown(wait=True)
+    images.get_store()._pool = None
+    hits = images.get_store().hits
+    times, size, _ = page([song_id for song_id, _ in fresh])
+    report("prefetched /img", times, size, f"{images.get_store().hits - hits}/{args.cards} served from cache")
+
+    print(f"\n  store: {images.get_store().stats()}")
+    cdn.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# bench_indexes.py
+# Seeds a scratch SQLite DB (1M play events by default) and prints
+# EXPLAIN QUERY PLAN + timings for the hot lookups, without and with
+# the indexes from migrations c4f2a9d17e35 and e81b3c5d9a20.
+#
+#   python bench_indexes.py [--plays 1000000] [--users 5000] [--songs 50000]
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from models import db
+
+INDEXES = [
+    'uq_song_name_artist_id',
+    'uq_favorite_user_id_song_id',
+    'ix_recently_played_user_id_timestamp',
+    'ix_queue_item_user_id_position',
+    'ix_playlist_user_id',
+    'ix_song_tag_song_id',
+]
+
+QUERIES = {
+    "/recently-played": (
+        "SELECT song_id FROM recently_played WHERE user_id = :user ORDER BY timestamp DESC LIMIT 25", {}),
+    "/queue": (
+        "SELECT song_id FROM queue_item WHERE user_id = :user ORDER BY position", {}),
+    "/playlists": (
+        "SELECT id, name FROM playlist WHERE user_id = :user", {}),
+    "search() song lookup": (
+        "SELECT id FROM song WHERE name = :name AND artist_id = :artist", {"name": "Song 123", "artist": 123 % 500 + 1}),
+    "favorite check": (
+        "SELECT id FROM favorite WHERE user_id = :user AND song_id = :song", {"song": 42}),
+    "song tags": (
+        "SELECT tag FROM song_tag WHERE song_id = :song", {"song": 42}),
+}
+
+
+def create_schema(path):
+    """Build the current models' schema, then strip the indexes under test."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.engine.dispose()
+
+    conn = sqlite3.connect(path)
+    for name in INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    return conn
+
+
+def seed(conn, plays, users, songs):
+    rng = random.Random(7)
+    start = datetime(2025, 1, 1)
+    conn.executemany("INSERT INTO user (id, username, email, password_hash) VALUES (?, ?, ?, 'x')",
+                     ((u, f"user{u}", f"user{u}@example.com") for u in range(1, users + 1)))
+    conn.executemany("INSERT INTO artist (id, name) VALUES (?, ?)",
+                     ((a, f"Artist {a}") for a in range(1, 501)))
+    conn.executemany("INSERT INTO song (id, name, artist_id) VALUES (?, ?, ?)",
+                     ((s, f"Song {s}", s % 500 + 1) for s in range(1, songs + 1)))
+    conn.executemany("INSERT INTO recently_played (user_id, song_id, timestamp) VALUES (?, ?, ?)",
+                     ((rng.randint(1, users), rng.randint(1, songs),
+                       (start + timedelta(seconds=i * 7)).isoformat(" ")) for i in range(plays)))
+    conn.executemany("INSERT INTO queue_item (user_id, song_id, added_at, position) VALUES (?, ?, ?, ?)",
+                     ((rng.randint(1, users), rng.randint(1, songs),
+                       (start + timedelta(seconds=i)).isoformat(" "), 1024 * (i + 1)) for i in range(users * 20)))
+    conn.executemany("INSERT INTO playlist (name, user_id) VALUES (?, ?)",
+                     ((f"Playlist {i}", rng.randint(1, users)) for i in range(users * 3)))
+    conn.executemany("INSERT INTO favorite (user_id, song_id) VALUES (?, ?)",
+                     {(rng.randint(1, users), rng.randint(1, songs)) for _ in range(users * 30)})
+    conn.executemany("INSERT INTO song_tag (song_id, tag) VALUES (?, ?)",
+                     ((rng.randint(1, songs), rng.choice(["pop", "rock", "lofi", "indie"])) for _ in range(songs * 2)))
+    conn.commit()
+
+
+def measure(conn, label, repeat=50):
+    print(f"\n=== {label} ===")
+    for name, (sql, extra) in QUERIES.items():
+        params = {"user": 1234, **extra}
+        plan = "; ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params).fetchall()
+        ms = (time.perf_counter() - start) * 1000 / repeat
+        print(f"{name:<22}{ms:>9.3f} ms   {plan}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plays", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--songs", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        conn = create_schema(path)
+        start = time.perf_counter()
+        seed(conn, args.plays, args.users, args.songs)
+        print(f"seeded {args.plays} plays, {args.users} users, {args.songs} songs "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        conn.execute("ANALYZE")
+        measure(conn, "before (no indexes)")
+
+        start = time.perf_counter()
+        conn.execute("CREATE UNIQUE INDEX uq_song_name_artist_id ON song (name, artist_id)")
+        conn.execute("CREATE UNIQUE INDEX uq_favorite_user_id_song_id ON favorite (user_id, song_id)")
+        conn.execute("CREATE INDEX ix_recently_played_user_id_timestamp ON recently_played (user_id, timestamp)")
+        conn.execute("CREATE INDEX ix_queue_item_user_id_position ON queue_item (user_id, position)")
+        conn.execute("CREATE INDEX ix_playlist_user_id ON playlist (user_id)")
+        conn.execute("CREATE INDEX ix_song_tag_song_id ON song_tag (song_id)")
+        conn.execute("ANALYZE")
+        print(f"\nindexes built in {time.perf_counter() - start:.1f}s")
+        measure(conn, "after (indexes from migrations)")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
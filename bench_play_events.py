@@ -0,0 +1,70 @@
+# bench_play_events.py
+# Records play events from concurrent threads against a scratch SQLite DB:
+# one INSERT + commit per play (the naive path) versus play_events' buffered
+# executemany flusher. Reports plays/s as seen by request threads.
+#
+#   python bench_play_events.py [--threads 16] [--plays 500]
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func, select
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmp.name, "bench.db")
+
+from app import app  # noqa: E402  (needs DATABASE_URL first)
+from models import db, RecentlyPlayed  # noqa: E402
+import play_events  # noqa: E402
+
+
+def commit_each(user_id, song_id):
+    with app.app_context():
+        db.session.add(RecentlyPlayed(user_id=user_id, song_id=song_id))
+        db.session.commit()
+
+
+def run(label, record, threads, plays):
+    def worker(user_id):
+        for i in range(plays):
+            record(user_id, i % 50 + 1)
+
+    pool = [threading.Thread(target=worker, args=(t + 1,)) for t in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{threads * plays / elapsed:>10.0f} plays/s   ({elapsed:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--plays", type=int, default=500)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+
+    run("insert + commit per play", commit_each, args.threads, args.plays)
+
+    buffer = play_events.PlayEventBuffer()
+    buffer.init_app(app)
+    run("write-behind buffer", buffer.record, args.threads, args.plays)
+    start = time.perf_counter()
+    buffer.close()
+    print(f"final flush {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"{buffer.flushed} events in batches of up to {buffer.batch}")
+
+    with app.app_context():
+        total = db.session.execute(select(func.count()).select_from(RecentlyPlayed)).scalar()
+    print(f"rows written: {total} (expected {2 * args.threads * args.plays})")
+
+
+if __name__ == "__main__":
+    main()
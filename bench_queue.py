@@ -0,0 +1,103 @@
+# bench_queue.py
+# Times queue edits on one user's large queue (10k items by default) and
+# counts the rows each one writes: gap-key moves/inserts/removes from
+# play_queue.py against renumbering every position on each drag-and-drop.
+#
+#   python bench_queue.py [--items 10000] [--ops 200]
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import event, select, update
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmp.name, "bench.db")
+
+from app import app  # noqa: E402  (needs DATABASE_URL first)
+from models import db, User, Song, QueueItem, Playlist, PlaylistSong  # noqa: E402
+import play_queue  # noqa: E402
+
+
+def seed(items):
+    user = User(username="bench", email="bench@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    db.session.execute(db.insert(Song), [{"name": f"Song {i}"} for i in range(items)])
+    song_ids = db.session.execute(select(Song.id)).scalars().all()
+    playlist = Playlist(name="Big", user_id=user.id)
+    db.session.add(playlist)
+    db.session.flush()
+    db.session.execute(db.insert(PlaylistSong), [{"playlist_id": playlist.id, "song_id": s} for s in song_ids])
+    db.session.commit()
+    return user.id, playlist.id, song_ids
+
+
+def item_ids(user_id):
+    return db.session.execute(
+        select(QueueItem.id).where(QueueItem.user_id == user_id).order_by(QueueItem.position)
+    ).scalars().all()
+
+
+def renumber_move(user_id, item_id, after_item_id):
+    """The naive approach: rebuild the order in Python and rewrite every row."""
+    if item_id == after_item_id:
+        return
+    order = item_ids(user_id)
+    order.remove(item_id)
+    order.insert(order.index(after_item_id) + 1 if after_item_id else 0, item_id)
+    db.session.execute(update(QueueItem), [{"id": i, "position": n} for n, i in enumerate(order, 1)])
+
+
+def run(label, ops, fn):
+    counts = {"statements": 0, "rows": 0}
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counts["statements"] += 1
+        counts["rows"] += max(cursor.rowcount, 0)
+
+    event.listen(db.engine, "after_cursor_execute", count)
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn()
+        db.session.commit()
+    ms = (time.perf_counter() - start) * 1000 / ops
+    event.remove(db.engine, "after_cursor_execute", count)
+    print(f"{label:<34}{ms:>9.3f} ms/op  {counts['statements'] / ops:>6.1f} stmts/op"
+          f"  {counts['rows'] / ops:>9.1f} rows/op")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--ops", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    with app.app_context():
+        db.create_all()
+        user_id, playlist_id, song_ids = seed(args.items)
+
+        start = time.perf_counter()
+        play_queue.enqueue_playlist(user_id, playlist_id)
+        db.session.commit()
+        print(f"enqueued {args.items}-song playlist in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        ids = item_ids(user_id)
+        run("move (gap keys)", args.ops,
+            lambda: play_queue.move(user_id, rng.choice(ids), rng.choice(ids)))
+        run("insert next (gap keys)", args.ops,
+            lambda: play_queue.enqueue(user_id, [rng.choice(song_ids)], rng.choice(ids), at_end=False))
+        run("insert at front, same slot", args.ops,
+            lambda: play_queue.enqueue(user_id, [rng.choice(song_ids)], None, at_end=False))
+        ids = item_ids(user_id)
+        run("remove (gap keys)", args.ops, lambda: play_queue.remove(user_id, ids.pop()))
+        ids = item_ids(user_id)
+        run("move (renumber whole queue)", max(args.ops // 10, 1),
+            lambda: renumber_move(user_id, rng.choice(ids), rng.choice(ids)))
+
+
+if __name__ == "__main__":
+    main()
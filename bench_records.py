@@ -0,0 +1,149 @@
+# bench_records.py
+# Parse throughput for Saavn song payloads: the per-view dict parsing the
+# search page used to do, records.parse_song (cold), and records.song_record
+# with its memo on a request-like stream where popular songs repeat.
+#
+# The corpus is the recorded responses in bench_fixtures/saavn/ (search
+# results, album songs, artist top songs) cloned under fresh song ids.
+#
+#   python bench_records.py [--songs 20000] [--requests 200000] [--memo 8192]
+
+import argparse
+import copy
+import json
+import os
+import random
+import time
+import tracemalloc
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures", "saavn")
+
+
+def legacy_parse(song_data):
+    """catalog.parse_search_result before records.py."""
+    title = song_data.get("name") or "Unknown Title"
+
+    primary_artists = song_data.get("primary_artists") or []
+    if isinstance(primary_artists, str):
+        artist_name = primary_artists
+    elif isinstance(primary_artists, list):
+        artist_name = ", ".join(primary_artists)
+    else:
+        artist_name = "Unknown Artist"
+
+    image_data = song_data.get("image")
+    image_url = image_data[-1]["url"] if isinstance(image_data, list) else image_data or ""
+
+    album = song_data.get("album", {}).get("name") or "Unknown Album"
+
+    download_url = song_data.get("downloadUrl")
+    audio_url = ""
+    if isinstance(download_url, list):
+        for item in reversed(download_url):
+            if isinstance(item, dict) and "url" in item:
+                audio_url = item["url"]
+                break
+    elif isinstance(download_url, dict):
+        audio_url = download_url.get("320") or download_url.get("128", "")
+
+    lyrics = song_data.get("lyrics") or "Lyrics not available"
+
+    return {"title": title, "artist": artist_name, "album": album, "url": audio_url,
+            "image": image_url, "lyrics": lyrics}
+
+
+def recorded_songs():
+    def load(name):
+        with open(os.path.join(FIXTURES, name)) as f:
+            return json.load(f)["data"]
+
+    songs = list(load("search_songs.json")["results"])
+    songs += load("album.json")["songs"]
+    songs += load("artist.json")["topSongs"]
+    # legacy_parse only understood search results: give every song their "url" image entries
+    for s in songs:
+        s["image"] = [{"quality": i.get("quality"), "url": i.get("url") or i.get("link")} for i in s["image"]]
+        s.setdefault("primary_artists", "Arijit Singh")
+    return songs
+
+
+def corpus(size):
+    base = recorded_songs()
+    out = []
+    for n in range(size):
+        song = copy.deepcopy(base[n % len(base)])
+        song["id"] = f"s{n}"
+        out.append(song)
+    return out
+
+
+def rate(fn, payloads, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for p in payloads:
+            fn(p)
+        best = min(best, time.perf_counter() - start)
+    return len(payloads) / best, best / len(payloads) * 1e6
+
+
+def footprint(fn, payloads):
+    tracemalloc.start()
+    kept = [fn(p) for p in payloads]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(kept)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--songs", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--memo", type=int, default=8192)
+    args = parser.parse_args()
+
+    os.environ["RECORD_MEMO_SIZE"] = str(args.memo)
+    import records
+
+    songs = corpus(args.songs)
+    # request stream: popularity ~ 1/rank, like repeat searches for hit songs
+    weights = [1 / (rank + 1) for rank in range(len(songs))]
+    stream = random.Random(7).choices(songs, weights=weights, k=args.requests)
+
+    print(f"{len(songs)} distinct songs, {len(stream)} parsed payloads, memo {args.memo}\n")
+    print(f"{'path':<34}{'payloads/s':>12}{'us/payload':>12}")
+    rows = [
+        ("legacy dict parse", legacy_parse),
+        ("records.parse_song (no memo)", records.parse_song),
+    ]
+    for label, fn in rows:
+        per_s, us = rate(fn, stream)
+        print(f"{label:<34}{per_s:>12,.0f}{us:>12.2f}")
+
+    # memo from cold: the first pass over the stream, counting parses
+    misses = 0
+
+    def counting(payload):
+        nonlocal misses
+        misses += 1
+        return parse(payload)
+
+    parse, records.parse_song = records.parse_song, counting
+    records.clear_memo()
+    per_s, us = rate(records.song_record, stream, repeat=1)
+    records.parse_song = parse
+    label = f"records.song_record ({1 - misses / len(stream):.0%} hits)"
+    print(f"{label:<34}{per_s:>12,.0f}{us:>12.2f}")
+
+    hot = stream[:len(stream) // 10]
+    for p in hot:
+        records.song_record(p)
+    per_s, us = rate(records.song_record, hot)
+    print(f"{'records.song_record (all hits)':<34}{per_s:>12,.0f}{us:>12.2f}")
+
+    print(f"\nbytes per parsed song: dict {footprint(legacy_parse, songs[:5000]):.0f}, "
+          f"SongRecord {footprint(records.parse_song, songs[:5000]):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+# bench_routes.py
+# Offline benchmark of the hot routes in app.py. A local stub replays the
+# recorded saavn.dev responses in bench_fixtures/saavn/ (with configurable
+# latency), a scratch SQLite DB is seeded with synthetic users, songs,
+# favorites, queues, playlists and play history, and each route is driven
+#   1. through the Flask test client (latency + SQL statements per request)
+#   2. over HTTP by a multi-threaded load generator (throughput + latency)
+# The JSON report (sorted keys, one entry per route) diffs cleanly between
+# commits; --compare prints the change against an earlier report.
+#
+#   python bench_routes.py [--users 200] [--songs 20000] [--requests 200]
+#                          [--threads 8] [--latency-ms 20] [--out bench_report.json]
+#                          [--compare old_report.json] [--no-http]
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures", "saavn")
+WORDS = ["tum", "kesariya", "love", "night", "arijit", "pasoori", "heeriye", "dil", "raat", "sapna",
+         "chaleya", "ishq", "yaad", "zindagi", "safar", "baarish", "tera", "mera", "pyaar", "khwab"]
+
+
+# ----------------- Saavn stand-in -----------------
+def _fixture_for(path):
+    """Recorded file for an upstream path like /api/search/songs or /api/artists/x/albums."""
+    parts = path.split("?", 1)[0].strip("/").split("/")[1:]  # drop the "api" prefix
+    if parts[:2] == ["search", "songs"]:
+        return "search_songs.json"
+    if parts[:2] == ["search", "artists"]:
+        return "search_artists.json"
+    if parts[:1] == ["artists"]:
+        return "artist_albums.json" if parts[-1] == "albums" else "artist.json"
+    if parts[:1] == ["albums"]:
+        return "album.json"
+    return None
+
+
+def serve_stub(latency, port_queue):
+    payloads = {name: open(os.path.join(FIXTURES, name), "rb").read() for name in os.listdir(FIXTURES)}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            body = payloads.get(_fixture_for(self.path))
+            self.send_response(200 if body else 404)
+            body = body or b'{"success": false}'
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.request_queue_size = 128
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def serve_app(env, port_queue):
+    """Run app.py on a threaded werkzeug server in its own process."""
+    os.environ.update(env)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    from werkzeug.serving import make_server
+    from app import app
+
+    app.debug = False
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def start_process(target, *args):
+    ctx = multiprocessing.get_context("spawn")
+    port_queue = ctx.Queue()
+    proc = ctx.Process(target=target, args=(*args, port_queue), daemon=True)
+    proc.start()
+    return proc, port_queue.get(timeout=60)
+
+
+# ----------------- Seeding -----------------
+def seed(args, rng):
+    """Synthetic catalog and per-user data, written with executemany."""
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from models import (db, User, Artist, Song, UserFavorites, QueueItem, Playlist, PlaylistSong,
+                        RecentlyPlayed, RecentSong)
+    import history
+    import stats
+
+    password = generate_password_hash("bench")
+    now = datetime.utcnow()
+    db.create_all()
+    run = db.session.execute
+    run(insert(User), [{"id": u, "username": f"bench{u}", "email": f"bench{u}@example.com",
+                        "password_hash": password} for u in range(1, args.users + 1)])
+    run(insert(Artist), [{"id": a, "name": f"Artist {a}"} for a in range(1, args.songs // 20 + 2)])
+    run(insert(Song), [{
+        "id": s, "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {s}",
+        "artist_id": s % (args.songs // 20 + 1) + 1,
+        "album": f"Album {s // 12}", "youtube_url": f"https://aac.example/{s}.mp4",
+        "image_url": f"https://img.example/{s}.jpg",
+    } for s in range(1, args.songs + 1)])
+
+    favorites, queue, plays, recent, playlists, playlist_songs = [], [], [], [], [], []
+    playlist_id = 0
+    for u in range(1, args.users + 1):
+        for s in rng.sample(range(1, args.songs + 1), args.favorites):
+            favorites.append({"user_id": u, "song_id": s})
+        for i, s in enumerate(rng.choices(range(1, args.songs + 1), k=args.queue)):
+            queue.append({"user_id": u, "song_id": s, "position": 1024 * (i + 1), "added_at": now})
+        played = rng.choices(range(1, args.songs + 1), k=args.plays)  # newest first
+        counts, latest = Counter(played), {}
+        for i, s in enumerate(played):
+            plays.append({"user_id": u, "song_id": s, "timestamp": now - timedelta(minutes=i)})
+            latest.setdefault(s, now - timedelta(minutes=i))
+        for s, at in list(latest.items())[:history.RECENT_HISTORY_SIZE]:
+            recent.append({"user_id": u, "song_id": s, "played_at": at, "play_count": counts[s]})
+        for _ in range(args.playlists):
+            playlist_id += 1
+            playlists.append({"id": playlist_id, "name": f"Mix {playlist_id}", "user_id": u})
+            for s in rng.sample(range(1, args.songs + 1), args.playlist_size):
+                playlist_songs.append({"playlist_id": playlist_id, "song_id": s})
+
+    for model, rows in ((UserFavorites, favorites), (QueueItem, queue), (RecentlyPlayed, plays),
+                        (RecentSong, recent), (Playlist, playlists), (PlaylistSong, playlist_songs)):
+        if rows:
+            run(insert(model), rows)
+    db.session.commit()
+    stats.reconcile(db.engine)
+    return {u: [p["id"] for p in playlists if p["user_id"] == u] for u in range(1, args.users + 1)}
+
+
+# ----------------- Scenarios -----------------
+def scenarios(playlists_by_user):
+    """name -> (method, make_request(rng, user_id) -> (path, json_body))."""
+    return {
+        "GET /search": ("GET", lambda rng, u: (f"/search?q={rng.choice(WORDS)}+{rng.randint(1, 50)}", None)),
+        "GET /search?mode=local": ("GET", lambda rng, u: (f"/search?q={rng.choice(WORDS)}&mode=local", None)),
+        "GET /autocomplete": ("GET", lambda rng, u: (f"/autocomplete?q={rng.choice(WORDS)[:rng.randint(1, 4)]}", None)),
+        "GET /queue": ("GET", lambda rng, u: ("/queue", None)),
+        "POST /queue": ("POST", lambda rng, u: ("/queue", {"song_id": rng.randint(1, 1000)})),
+        "GET /queue/next": ("GET", lambda rng, u: ("/queue/next", None)),
+        "GET /queue/previous": ("GET", lambda rng, u: ("/queue/previous", None)),
+        "GET /queue/current": ("GET", lambda rng, u: ("/queue/current", None)),
+        "GET /favorites": ("GET", lambda rng, u: ("/favorites", None)),
+        "GET /playlists/<id>": ("GET", lambda rng, u: (f"/playlists/{rng.choice(playlists_by_user[u])}", None)),
+        "GET /recently-played": ("GET", lambda rng, u: ("/recently-played", None)),
+        "GET /profile": ("GET", lambda rng, u: ("/profile", None)),
+    }
+
+
+def summarize(latencies, elapsed=None, statements=None, errors=0):
+    ms = sorted(x * 1000 for x in latencies)
+    pct = lambda p: round(ms[min(len(ms) - 1, int(len(ms) * p))], 3)
+    result = {"requests": len(ms), "errors": errors, "p50_ms": pct(0.50), "p95_ms": pct(0.95),
+              "p99_ms": pct(0.99), "mean_ms": round(statistics.fmean(ms), 3)}
+    if elapsed:
+        result["req_per_s"] = round(len(ms) / elapsed, 1)
+    if statements is not None:
+        result["sql_per_request"] = round(statistics.fmean(statements), 2)
+        result["sql_max"] = max(statements)
+    return result
+
+
+def run_test_client(app, routes, users, n, rng):
+    """Sequential requests through the test client, counting SQL statements."""
+    from sqlalchemy import event
+    from models import db
+
+    clients = {}
+    for u in users:
+        clients[u] = app.test_client()
+        with clients[u].session_transaction() as sess:
+            sess["user_id"] = u
+
+    counter = [0]
+
+    def count(*_):
+        counter[0] += 1
+
+    with app.app_context():
+        engines = list(db.engines.values())  # primary and read-only pool
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count)
+    results = {}
+    try:
+        for name, (method, make) in routes.items():
+            latencies, statements, errors = [], [], 0
+            for _ in range(n):
+                u = rng.choice(users)
+                path, body = make(rng, u)
+                counter[0] = 0
+                start = time.perf_counter()
+                res = clients[u].open(path, method=method, json=body)
+                res.get_data()
+                res.close()
+                latencies.append(time.perf_counter() - start)
+                statements.append(counter[0])
+                errors += res.status_code >= 500
+            results[name] = summarize(latencies, sum(latencies), statements, errors)
+            print(f"  {name:<24}{results[name]['p50_ms']:>9.2f} ms p50  "
+                  f"{results[name]['sql_per_request']:>6.1f} sql/req  {errors} errors")
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", count)
+    return results
+
+
+def run_http(base_url, cookies, routes, users, n, threads, rng_seed):
+    """Each route hammered by ``threads`` keep-alive clients over real HTTP."""
+    results = {}
+    local = threading.local()
+
+    def http_session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    for name, (method, make) in routes.items():
+        rng = random.Random(rng_seed)
+        jobs = [(u, *make(rng, u)) for u in (rng.choice(users) for _ in range(n))]
+
+        def call(job):
+            u, path, body = job
+            start = time.perf_counter()
+            res = http_session().request(method, base_url + path, json=body,
+                                         cookies={"session": cookies[u]}, allow_redirects=False)
+            return time.perf_counter() - start, res.status_code >= 500
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            outcomes = list(pool.map(call, jobs))
+        elapsed = time.perf_counter() - start
+        results[name] = summarize([t for t, _ in outcomes], elapsed, errors=sum(e for _, e in outcomes))
+        print(f"  {name:<24}{results[name]['req_per_s']:>9.1f} req/s  "
+              f"p50 {results[name]['p50_ms']:.2f}  p99 {results[name]['p99_ms']:.2f} ms  "
+              f"{results[name]['errors']} errors")
+    return results
+
+
+def compare(old_path, report):
+    old = json.load(open(old_path))
+    print(f"\n=== vs {old_path} ({old['meta'].get('commit', '?')}) ===")
+    for name, now in report["routes"].items():
+        before = old["routes"].get(name)
+        if not before:
+            continue
+        line = f"{name:<24}"
+        for mode, key in (("test_client", "p50_ms"), ("test_client", "sql_per_request"),
+                          ("http", "req_per_s"), ("http", "p99_ms")):
+            a, b = before.get(mode, {}).get(key), now.get(mode, {}).get(key)
+            if a and b is not None:
+                line += f"  {mode}.{key} {a} -> {b} ({(b - a) / a:+.0%})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--songs", type=int, default=20000)
+    parser.add_argument("--favorites", type=int, default=200, help="per user")
+    parser.add_argument("--queue", type=int, default=100, help="per user")
+    parser.add_argument("--plays", type=int, default=500, help="per user")
+    parser.add_argument("--playlists", type=int, default=3, help="per user")
+    parser.add_argument("--playlist-size", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="per route and mode")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20, help="stub saavn.dev latency")
+    parser.add_argument("--saavn-cache", default="off", help="SAAVN_CACHE_BACKEND for the run")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-http", action="store_true")
+    parser.add_argument("--out", default="bench_report.json")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    tmp = tempfile.TemporaryDirectory()
+    stub, stub_port = start_process(serve_stub, args.latency_ms / 1000)
+    env = {
+        "DATABASE_URL": "sqlite:///" + os.path.join(tmp.name, "bench.db"),
+        "SAAVN_BASE_URL": f"http://127.0.0.1:{stub_port}/api",
+        "SAAVN_CACHE_BACKEND": args.saavn_cache,
+        "AUTOCOMPLETE_SNAPSHOT": os.path.join(tmp.name, "autocomplete.pickle"),
+        "AUTOCOMPLETE_WARM": "0",   # built below, after seeding
+        "PLAYBACK_STORE": "memory",
+        "PLAY_COMPACT_INTERVAL": "0",
+    }
+    os.environ.update(env)
+    from app import app  # noqa: E402  (configured by the environment above)
+    from models import db  # noqa: E402
+    import search_index  # noqa: E402
+    import autocomplete  # noqa: E402
+
+    start = time.perf_counter()
+    with app.app_context():
+        playlists_by_user = seed(args, rng)
+        search_index.rebuild_index()
+        autocomplete.build_index()
+        db.session.commit()
+    print(f"seeded {args.users} users / {args.songs} songs in {time.perf_counter() - start:.1f}s")
+
+    routes = scenarios(playlists_by_user)
+    users = list(range(1, args.users + 1))
+    report = {
+        "meta": {
+            "commit": subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                     text=True).stdout.strip() or None,
+            "date": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        },
+        "routes": {name: {} for name in routes},
+    }
+
+    print("\n=== test client (sequential) ===")
+    for name, result in run_test_client(app, routes, users, args.requests, rng).items():
+        report["routes"][name]["test_client"] = result
+
+    if not args.no_http:
+        cookies = {}
+        for u in users:
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess["user_id"] = u
+            cookies[u] = client.get_cookie("session").value
+        server, port = start_process(serve_app, {**env, "AUTOCOMPLETE_WARM": "1"})
+        print(f"\n=== HTTP, {args.threads} threads ===")
+        try:
+            for name, result in run_http(f"http://127.0.0.1:{port}", cookies, routes, users,
+                                         args.requests, args.threads, args.seed).items():
+                report["routes"][name]["http"] = result
+        finally:
+            server.terminate()
+
+    stub.terminate()
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nwrote {args.out}")
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
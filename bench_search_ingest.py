@@ -0,0 +1,105 @@
+# bench_search_ingest.py
+# Compares the old per-row /search ingestion with catalog.ingest_search_results.
+# Reports SQL statements and wall time per search page.
+#
+#   python bench_search_ingest.py [--pages 50] [--page-size 10]
+
+import argparse
+import os
+import tempfile
+import time
+
+from flask import Flask
+from sqlalchemy import event
+
+from models import db, User, Artist, Song, UserFavorites
+from catalog import ingest_search_results
+from records import parse_song
+
+
+def fake_results(page, page_size, artists=25):
+    """Saavn-shaped search results; every other page repeats songs already stored."""
+    results = []
+    for i in range(page_size):
+        n = (page // 2) * page_size + i
+        results.append({
+            "id": f"s{n}",
+            "name": f"Song {n}",
+            "primary_artists": f"Artist {n % artists}",
+            "album": {"name": f"Album {n // 12}"},
+            "image": [{"quality": "50x50", "url": f"https://img/{n}-50.jpg"},
+                      {"quality": "500x500", "url": f"https://img/{n}-500.jpg"}],
+            "downloadUrl": [{"quality": "96kbps", "url": f"https://aac/{n}_96.mp4"},
+                            {"quality": "320kbps", "url": f"https://aac/{n}_320.mp4"}],
+        })
+    return results
+
+
+def legacy_ingest(results, user_id):
+    """The per-result lookup/insert/commit loop /search used to run."""
+    songs = []
+    for song_data in results:
+        p = parse_song(song_data)
+
+        artist_obj = Artist.query.filter_by(name=p.artist).first()
+        if not artist_obj:
+            artist_obj = Artist(name=p.artist)
+            db.session.add(artist_obj)
+            db.session.commit()
+
+        song_obj = Song.query.filter_by(name=p.title, artist_id=artist_obj.id).first()
+        if not song_obj:
+            song_obj = Song(name=p.title, artist_id=artist_obj.id, album=p.album,
+                            youtube_url=p.audio_url, image_url=p.image_url, lyrics=p.lyrics)
+            db.session.add(song_obj)
+            db.session.commit()
+
+        is_favorite = UserFavorites.query.filter_by(user_id=user_id, song_id=song_obj.id).first() is not None
+        songs.append({"id": song_obj.id, "title": p.title, "favorite": is_favorite})
+    return songs
+
+
+def run(ingest, pages, page_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            user = User(username="bench", email="bench@example.com")
+            user.set_password("bench")
+            db.session.add(user)
+            db.session.commit()
+
+            counter = {"statements": 0}
+
+            def count(*_):
+                counter["statements"] += 1
+
+            event.listen(db.engine, "before_cursor_execute", count)
+            start = time.perf_counter()
+            for page in range(pages):
+                ingest(fake_results(page, page_size), user.id)
+            elapsed = time.perf_counter() - start
+            event.remove(db.engine, "before_cursor_execute", count)
+            db.session.remove()
+
+    return counter["statements"] / pages, elapsed * 1000 / pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.pages} pages x {args.page_size} results\n")
+    print(f"{'path':<10}{'queries/page':>15}{'ms/page':>12}")
+    for name, ingest in (("before", legacy_ingest), ("after", ingest_search_results)):
+        queries, ms = run(ingest, args.pages, args.page_size)
+        print(f"{name:<10}{queries:>15.1f}{ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
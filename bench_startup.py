@@ -0,0 +1,123 @@
+# bench_startup.py
+# Cold-start cost of a worker: a fresh interpreter imports app, builds the
+# app and serves its first requests (/login renders a template, /api/songs
+# runs the first query). Each run is a new process, like a forked or
+# autoscaled worker without --preload. Also lists the slowest imports from
+# ``python -X importtime``.
+#
+#   python bench_startup.py [--runs 7] [--top 15] [--ref HEAD~1]
+#
+# --ref measures a git revision too (checked out into a temporary worktree).
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+import app as module
+t1 = time.perf_counter()
+application = module.app
+t2 = time.perf_counter()
+client = application.test_client()
+client.get("/login").get_data()
+t3 = time.perf_counter()
+from models import db
+with application.app_context():
+    db.create_all()
+with client.session_transaction() as sess:
+    sess["user_id"] = 1
+t4 = time.perf_counter()
+client.get("/api/songs").get_data()
+t5 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_page": t3 - t2, "first_query": t5 - t4}))
+"""
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def child_env(tmp):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": "sqlite:///" + os.path.join(tmp, "startup.db"),
+        "PLAYBACK_STORE": "memory",
+        "SAAVN_CACHE_BACKEND": "memory",
+        "AUTOCOMPLETE_SNAPSHOT": os.path.join(tmp, "autocomplete.pickle"),
+        "AUTOCOMPLETE_WARM": "0",
+        "PROFILING": "0",
+    })
+    return env
+
+
+def measure(tree, runs):
+    phases, walls = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = child_env(tmp)
+        for _ in range(runs):
+            start = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", CHILD], cwd=tree, env=env,
+                                 capture_output=True, text=True, check=True).stdout
+            walls.append(time.perf_counter() - start)
+            phases.append(json.loads(out.strip().splitlines()[-1]))
+    result = {name: statistics.median(p[name] for p in phases) * 1000 for name in phases[0]}
+    result["process_total"] = statistics.median(walls) * 1000
+    return result
+
+
+def slowest_imports(tree, top):
+    with tempfile.TemporaryDirectory() as tmp:
+        err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app; app.app"],
+                             cwd=tree, env=child_env(tmp), capture_output=True, text=True).stderr
+    rows = []
+    for line in err.splitlines():
+        m = IMPORT_LINE.match(line)
+        if m and len(m.group(3)) <= 2:   # modules imported directly by app and its first level
+            rows.append((int(m.group(2)) / 1000, m.group(4)))
+    return sorted(rows, reverse=True)[:top]
+
+
+def report(label, tree, args):
+    timings = measure(tree, args.runs)
+    print(f"\n=== {label} (median of {args.runs} fresh processes) ===")
+    for name, ms in timings.items():
+        print(f"  {name:<14}{ms:>9.1f} ms")
+    print("  slowest imports (cumulative):")
+    for ms, name in slowest_imports(tree, args.top):
+        print(f"    {ms:>8.1f} ms  {name}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--ref", help="also measure this git revision")
+    args = parser.parse_args()
+
+    now = report("working tree", HERE, args)
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            tree = os.path.join(tmp, "tree")
+            subprocess.run(["git", "worktree", "add", "--detach", tree, args.ref], cwd=HERE,
+                           check=True, capture_output=True)
+            try:
+                before = report(args.ref, tree, args)
+            finally:
+                subprocess.run(["git", "worktree", "remove", "--force", tree], cwd=HERE, capture_output=True)
+        print(f"\n=== {args.ref} -> working tree ===")
+        for name, ms in now.items():
+            change = f" ({(ms - before[name]) / before[name]:+.0%})" if before[name] >= 1 else ""
+            print(f"  {name:<14}{before[name]:>9.1f} -> {ms:.1f} ms{change}")
+
+
+if __name__ == "__main__":
+    main()
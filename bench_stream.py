@@ -0,0 +1,241 @@
+# bench_stream.py
+# /stream/<song_id> against the CDN it fronts. A local file server stands
+# in for the CDN (Range support, --latency-ms before the first byte,
+# --cdn-mbps per connection) and counts what it sends; the app runs on a
+# threaded werkzeug server with the audio cache in a temporary directory.
+#
+# Scenarios, each on tracks nobody has played yet unless noted:
+#   direct        full download straight from the CDN (what the player did before)
+#   cold play     full GET /stream/<id>
+#   warm play     the same track again, from the cache
+#   cold seeks    --seeks random 64 KB Range requests into uncached tracks
+#   warm seeks    the same ranges again
+#   shared        --listeners concurrent players of one uncached track
+# Every response body is compared with the source file.
+#
+#   python bench_stream.py [--track-mb 5] [--latency-ms 80] [--cdn-mbps 40]
+#                          [--seeks 20] [--listeners 8]
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from bench_routes import serve_app, start_process
+
+SEEK_BYTES = 64 * 1024
+
+
+def serve_cdn(directory, latency, bytes_per_s, port_queue):
+    from aiohttp import web
+
+    served = {"requests": 0, "bytes": 0}
+
+    async def handle(request):
+        path = os.path.join(directory, request.match_info["name"])
+        if not os.path.exists(path):
+            raise web.HTTPNotFound()
+        size = os.path.getsize(path)
+        start, stop, status = 0, size, 200
+        if request.http_range.start is not None or request.http_range.stop is not None:
+            r = request.http_range
+            start = r.start or 0
+            stop = min(r.stop, size) if r.stop is not None else size
+            status = 206
+        served["requests"] += 1
+        await asyncio.sleep(latency)
+
+        res = web.StreamResponse(status=status)
+        res.content_type = "audio/mp4"
+        res.content_length = stop - start
+        if status == 206:
+            res.headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+        await res.prepare(request)
+        with open(path, "rb") as f:
+            f.seek(start)
+            left = stop - start
+            while left > 0:
+                block = f.read(min(64 * 1024, left))
+                await res.write(block)
+                served["bytes"] += len(block)
+                left -= len(block)
+                await asyncio.sleep(len(block) / bytes_per_s)
+        return res
+
+    async def stats(request):
+        return web.json_response(served)
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/_stats", stats)
+        app.router.add_get("/audio/{name}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port_queue.put(site._server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def seed_tracks(env, count, cdn):
+    """(song ids, session cookie of a signed-in listener)."""
+    os.environ.update(env)
+    from werkzeug.security import generate_password_hash
+    from app import app
+    from models import db, User, Song
+
+    with app.app_context():
+        db.create_all()
+        user = User(username="bench", email="bench@example.com", password_hash=generate_password_hash("bench"))
+        songs = [Song(name=f"Track {n}", album="Bench", youtube_url=f"{cdn}/audio/track{n}.mp4")
+                 for n in range(count)]
+        db.session.add(user)
+        db.session.add_all(songs)
+        db.session.commit()
+        user_id, ids = user.id, [s.id for s in songs]
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"] = user_id
+    return ids, client.get_cookie("session").value
+
+
+class Runner:
+    def __init__(self, http, app_url, cdn_url, sources, cookie):
+        self.http = http
+        self.app_url = app_url
+        self.cdn_url = cdn_url
+        self.auth = {"Cookie": f"session={cookie}"}   # /stream needs a session
+        self.sources = sources   # song id -> file bytes
+        self.errors = 0
+
+    async def cdn_stats(self):
+        async with self.http.get(f"{self.cdn_url}/_stats") as res:
+            return await res.json()
+
+    async def get(self, url, expected, headers=None):
+        """(seconds to first byte, seconds total); counts a mismatch as an error."""
+        start = time.perf_counter()
+        first = None
+        body = bytearray()
+        async with self.http.get(url, headers=headers or {}) as res:
+            async for block in res.content.iter_any():
+                if first is None:
+                    first = time.perf_counter() - start
+                body += block
+            ok = res.status in (200, 206)
+        if not ok or bytes(body) != expected:
+            self.errors += 1
+        return first or 0, time.perf_counter() - start
+
+    async def play(self, song_id, direct=False):
+        n = song_id - 1
+        url = f"{self.cdn_url}/audio/track{n}.mp4" if direct else f"{self.app_url}/stream/{song_id}"
+        return await self.get(url, self.sources[song_id], None if direct else self.auth)
+
+    async def seek(self, song_id, offset):
+        data = self.sources[song_id]
+        return await self.get(f"{self.app_url}/stream/{song_id}", data[offset:offset + SEEK_BYTES],
+                              {**self.auth, "Range": f"bytes={offset}-{offset + SEEK_BYTES - 1}"})
+
+
+def summary(label, timings, upstream):
+    ttfb = [t[0] * 1000 for t in timings]
+    total = [t[1] * 1000 for t in timings]
+    print(f"  {label:<14}ttfb p50 {statistics.median(ttfb):>8.1f} ms   total p50 {statistics.median(total):>8.1f} ms"
+          f"   CDN {upstream['requests']:>4} requests {upstream['bytes'] / 1e6:>8.1f} MB")
+
+
+async def run(args, app_port, cdn_port, ids, sources, cookie):
+    import aiohttp
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=300)) as http:
+        r = Runner(http, f"http://127.0.0.1:{app_port}", f"http://127.0.0.1:{cdn_port}", sources, cookie)
+        rng = random.Random(7)
+        pool = iter(ids)
+
+        async def scenario(label, calls):
+            before = await r.cdn_stats()
+            timings = []
+            for call in calls:
+                timings.extend(await call())
+            after = await r.cdn_stats()
+            summary(label, timings, {k: after[k] - before[k] for k in after})
+
+        def sequential(coros):
+            async def go():
+                return [await c for c in coros]
+            return go
+
+        direct_ids = [next(pool) for _ in range(3)]
+        await scenario("direct", [sequential([r.play(i, direct=True) for i in direct_ids])])
+
+        play_ids = [next(pool) for _ in range(3)]
+        await scenario("cold play", [sequential([r.play(i) for i in play_ids])])
+        await scenario("warm play", [sequential([r.play(i) for i in play_ids])])
+
+        size = args.track_mb * 1024 * 1024
+        seek_ids = [next(pool) for _ in range(args.seeks)]
+        seeks = [(i, rng.randrange(0, size - SEEK_BYTES)) for i in seek_ids]
+        await scenario("cold seeks", [sequential([r.seek(i, o) for i, o in seeks])])
+        await scenario("warm seeks", [sequential([r.seek(i, o) for i, o in seeks])])
+
+        shared_id = next(pool)
+
+        async def listeners():
+            return await asyncio.gather(*(r.play(shared_id) for _ in range(args.listeners)))
+        await scenario(f"shared x{args.listeners}", [listeners])
+
+        print(f"\n  {r.errors} responses differed from the source file")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--track-mb", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=80, help="CDN time to first byte")
+    parser.add_argument("--cdn-mbps", type=float, default=40, help="CDN bandwidth per connection")
+    parser.add_argument("--seeks", type=int, default=20)
+    parser.add_argument("--listeners", type=int, default=8)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    audio_dir = os.path.join(tmp.name, "cdn")
+    os.makedirs(audio_dir)
+    tracks = 3 + 3 + args.seeks + 1
+    rng = random.Random(7)
+    sources = {}
+    for n in range(tracks):
+        data = rng.randbytes(args.track_mb * 1024 * 1024)
+        with open(os.path.join(audio_dir, f"track{n}.mp4"), "wb") as f:
+            f.write(data)
+        sources[n + 1] = data
+
+    cdn, cdn_port = start_process(serve_cdn, audio_dir, args.latency_ms / 1000, args.cdn_mbps * 1e6 / 8)
+    env = {
+        "DATABASE_URL": "sqlite:///" + os.path.join(tmp.name, "bench.db"),
+        "AUDIO_CACHE_DIR": os.path.join(tmp.name, "audio_cache"),
+        "AUTOCOMPLETE_SNAPSHOT": os.path.join(tmp.name, "autocomplete.pickle"),
+        "AUTOCOMPLETE_WARM": "0",
+        "PLAYBACK_STORE": "memory",
+        "PLAY_COMPACT_INTERVAL": "0",
+        "PROFILING": "0",
+    }
+    ids, cookie = seed_tracks(env, tracks, f"http://127.0.0.1:{cdn_port}")
+    assert ids == list(range(1, tracks + 1))
+    app, app_port = start_process(serve_app, env)
+
+    print(f"{args.track_mb} MB tracks, CDN {args.latency_ms:g} ms to first byte, {args.cdn_mbps:g} Mbit/s per connection\n")
+    try:
+        asyncio.run(run(args, app_port, cdn_port, ids, sources, cookie))
+    finally:
+        app.terminate()
+        cdn.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# bench_templates.py
+# What templating.py saves.
+#
+#   compile     loading every template in a fresh process: compiling the
+#               sources vs reading the Jinja bytecode cache a previous
+#               process (or `flask --app app compile-templates`) wrote
+#   pages       template time per page from the Server-Timing header
+#               (PROFILING=1) with the fragment cache off and warm: the home
+#               page and /play/<id> (sidebar and playlist dropdown, for a
+#               user with --playlists playlists) and a page of --cards
+#               search result cards
+#
+#   python bench_templates.py [--runs 200] [--playlists 30] [--cards 20]
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = r"""
+import json, time
+from app import app
+import templating
+t1 = time.perf_counter()
+templating.compile_all(app)
+print(json.dumps({"templates": time.perf_counter() - t1}))
+"""
+
+TPL = re.compile(r'tpl;dur=([\d.]+)')
+
+
+def compile_times(env, runs=5):
+    """(cold, warm) seconds to load every template in a new process."""
+    def run():
+        out = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True)
+        return json.loads(out.stdout.strip().splitlines()[-1])["templates"]
+
+    cold, warm = [], []
+    for _ in range(runs):
+        for name in os.listdir(env["JINJA_CACHE_DIR"]):
+            os.remove(os.path.join(env["JINJA_CACHE_DIR"], name))
+        cold.append(run())
+        warm.append(run())
+    return statistics.median(cold), statistics.median(warm)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--playlists", type=int, default=30)
+    parser.add_argument("--cards", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": "sqlite:///" + os.path.join(tmp.name, "bench.db"),
+        "JINJA_CACHE_DIR": os.path.join(tmp.name, "jinja_cache"),
+        "AUTOCOMPLETE_SNAPSHOT": os.path.join(tmp.name, "autocomplete.pickle"),
+        "AUTOCOMPLETE_WARM": "0",
+        "PLAYBACK_STORE": "memory",
+        "PLAY_COMPACT_INTERVAL": "0",
+        "PROFILING": "1",
+        "PROFILING_LOG": "0",
+    })
+    os.makedirs(env["JINJA_CACHE_DIR"])
+    cold, warm = compile_times(env)
+    print(f"  {'load all templates':<24}compiled {cold * 1000:>7.1f} ms   from bytecode cache {warm * 1000:>7.1f} ms\n")
+
+    os.environ.update(env)
+    from werkzeug.security import generate_password_hash
+    from app import app
+    from models import db, User, Song, Playlist
+    from search_views import render_search_results
+    import templating
+
+    with app.app_context():
+        db.create_all()
+        user = User(username="bench", email="bench@example.com", password_hash=generate_password_hash("bench"))
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all(Playlist(name=f"Playlist {n}", user_id=user.id) for n in range(args.playlists))
+        songs = [Song(name=f"Song {n}", album=f"Album {n}", image_url=f"https://c.saavncdn.com/{n}/cover-500x500.jpg")
+                 for n in range(args.cards)]
+        db.session.add_all(songs)
+        db.session.commit()
+        user_id, song_id = user.id, songs[0].id
+        cards = [{"id": s.id, "title": s.name, "artist": f"Artist {s.id}", "album": s.album, "image": s.image_url}
+                 for s in songs]
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"] = user_id
+
+    def page_ms(url):
+        res = client.get(url)
+        res.get_data()
+        return float(TPL.search(res.headers["Server-Timing"]).group(1))
+
+    def cards_ms():
+        with app.test_request_context("/search"):
+            start = time.perf_counter()
+            render_search_results("song", list(cards), 1, "default")
+            return (time.perf_counter() - start) * 1000
+
+    pages = [("/", lambda: page_ms("/")),
+             (f"/play/{song_id}", lambda: page_ms(f"/play/{song_id}")),
+             (f"{args.cards} search cards", cards_ms)]
+    size = templating.fragments.max_entries
+    print(f"  {'template ms, p50':<24}{'fragments off':>14}{'warm':>10}")
+    for label, measure in pages:
+        results = []
+        for entries in (0, size):
+            templating.fragments.max_entries = entries
+            templating.fragments.clear()
+            measure()
+            results.append(statistics.median(measure() for _ in range(args.runs)))
+        print(f"  {label:<24}{results[0]:>14.3f}{results[1]:>10.3f}")
+    print(f"\n  fragment cache: {templating.fragments.stats()}")
+
+
+if __name__ == "__main__":
+    main()
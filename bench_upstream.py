@@ -0,0 +1,128 @@
+# bench_upstream.py
+# Latency/throughput of saavn.dev calls against a local stub server:
+# one requests.get per call (old views) vs the pooled SaavnClient (sync and async).
+#
+#   python bench_upstream.py [--requests 2000] [--concurrency 32] [--latency-ms 5]
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from saavn import SaavnClient
+
+PAYLOAD = json.dumps({"success": True, "data": {"results": [{"name": f"Song {i}"} for i in range(10)]}}).encode()
+
+
+def serve_stub(latency, port_queue):
+    """Keep-alive JSON server standing in for saavn.dev."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(PAYLOAD)))
+            self.end_headers()
+            self.wfile.write(PAYLOAD)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.request_queue_size = 128
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_stub(latency):
+    """Run the stub in its own process so it doesn't share our GIL."""
+    port_queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=serve_stub, args=(latency, port_queue), daemon=True)
+    proc.start()
+    return proc, f"http://127.0.0.1:{port_queue.get()}/api"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_threads(call, total, concurrency):
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(lambda _: timed(call), range(total)))
+    return latencies, time.perf_counter() - start
+
+
+def run_async(client, total, concurrency):
+    async def main():
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with gate:
+                start = time.perf_counter()
+                await client.aget_json("search/songs", {"query": "x"})
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+        await client.aclose()
+        return latencies, elapsed
+
+    return asyncio.run(main())
+
+
+def report(name, latencies, elapsed):
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{name:<22}{q[49] * 1000:>10.2f}{q[98] * 1000:>10.2f}{len(latencies) / elapsed:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    stub, base_url = start_stub(args.latency_ms / 1000)
+    client = SaavnClient(base_url=base_url, pool_size=args.concurrency, max_per_host=args.concurrency)
+
+    print(f"{args.requests} calls, concurrency {args.concurrency}, stub latency {args.latency_ms} ms\n")
+    print(f"{'client':<22}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>12}")
+
+    report("requests.get (before)", *run_threads(
+        lambda: requests.get(f"{base_url}/search/songs?query=x", timeout=10).json(),
+        args.requests, args.concurrency))
+    report("pooled sync", *run_threads(
+        lambda: client.get_json("search/songs", {"query": "x"}),
+        args.requests, args.concurrency))
+    report("pooled async", *run_async(client, args.requests, args.concurrency))
+
+    # Artist page: artist + albums, sequential (before) vs fan-out
+    pages = max(args.requests // 10, 1)
+    calls = [("artists", {"id": "1"}), ("artists/1/albums", None)]
+    report("artist page sequential", *run_threads(
+        lambda: [requests.get(client.url(path), params=params, timeout=10).json() for path, params in calls],
+        pages, args.concurrency))
+    report("artist page fan-out", *run_threads(lambda: client.get_many(calls), pages, args.concurrency))
+
+    client.close()
+    stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds each saavn.dev endpoint stays fresh; endpoints not listed are never cached.
+ENDPOINT_TTLS = {
+    "search/songs": 10 * 60,
+    "search/artists": 60 * 60,
+    "artists": 6 * 60 * 60,
+    "artists/albums": 6 * 60 * 60,
+    "albums": 24 * 60 * 60,
+}
+
+# A hit on the sqlite backend only refreshes accessed_at once this share of
+# the entry's remaining lifetime has passed since the last refresh, so hot
+# keys are read without taking the database's write lock on every hit.
+TOUCH_FRACTION = 0.1
+
+_MISSING = object()
+
+
+def endpoint_name(path):
+    """Collapse ids out of a path so ``artists/123/albums`` shares one TTL."""
+    parts = path.strip("/").split("/")
+    if len(parts) == 3 and parts[0] == "artists":
+        return "artists/" + parts[2]
+    return "/".join(parts)
+
+
+def cache_key(path, params=None):
+    """Normalized key: endpoint path + sorted params, search text case/space folded."""
+    items = []
+    for name, value in sorted((params or {}).items()):
+        value = str(value)
+        if name == "query":
+            value = " ".join(value.lower().split())
+        items.append(f"{name}={value}")
+    return path.strip("/") + "?" + "&".join(items)
+
+
+# ----------------- Backends -----------------
+class MemoryBackend:
+    """Per-process LRU dict with expiry."""
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the stored value, or ``_MISSING`` on a miss or expiry."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        """Store ``value``; returns how many entries were evicted to make room."""
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteBackend:
+    """On-disk LRU shared by every worker process that points at the same file."""
+
+    def __init__(self, path, max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn().execute(
+            "CREATE INDEX IF NOT EXISTS ix_response_cache_accessed ON response_cache (accessed_at)"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT value, expires_at, accessed_at FROM response_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return _MISSING
+        value, expires_at, accessed_at = row
+        if now - accessed_at > (expires_at - accessed_at) * TOUCH_FRACTION:
+            self._conn().execute(
+                "UPDATE response_cache SET accessed_at = ? WHERE key = ? AND accessed_at = ?", (now, key, accessed_at)
+            )
+        return json.loads(value)
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now + ttl, now),
+        )
+        # Trimming needs a COUNT(*), so only check every few writes.
+        self._writes += 1
+        if self._writes % 64:
+            return 0
+        conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+        overflow = len(self) - self.max_entries
+        if overflow <= 0:
+            return 0
+        conn.execute(
+            "DELETE FROM response_cache WHERE key IN"
+            " (SELECT key FROM response_cache ORDER BY accessed_at LIMIT ?)",
+            (overflow,),
+        )
+        return overflow
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+    def clear(self):
+        self._conn().execute("DELETE FROM response_cache")
+
+
+# ----------------- Response cache -----------------
+class ResponseCache:
+    """TTL + LRU cache for upstream JSON with in-process request coalescing.
+
+    Concurrent misses for the same key wait on the first caller's fetch
+    instead of each going upstream.
+    """
+
+    def __init__(self, backend, ttls=None):
+        self.backend = backend
+        self.ttls = dict(ENDPOINT_TTLS if ttls is None else ttls)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._ainflight = {}
+
+    def ttl_for(self, path):
+        return self.ttls.get(endpoint_name(path))
+
+    def _lookup(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def _store(self, key, value, ttl):
+        evicted = self.backend.set(key, value, ttl)
+        if evicted:
+            with self._lock:
+                self.evictions += evicted
+
+    def get_or_fetch(self, path, params, fetch):
+        """Return the cached payload for ``path``/``params`` or call ``fetch()`` once."""
+        ttl = self.ttl_for(path)
+        if not ttl:
+            return fetch()
+
+        key = cache_key(path, params)
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            waiter = self._inflight.get(key)
+            if waiter is None:
+                waiter = self._inflight[key] = {"done": threading.Event()}
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            waiter["done"].wait()
+            if "error" in waiter:
+                raise waiter["error"]
+            return waiter["value"]
+
+        try:
+            # Another caller may have stored it between our miss and taking the lead.
+            value = self.backend.get(key)
+            if value is _MISSING:
+                value = fetch()
+                self._store(key, value, ttl)
+            waiter["value"] = value
+            return value
+        except BaseException as e:
+            waiter["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            waiter["done"].set()
+
+    async def aget_or_fetch(self, path, params, fetch):
+        """Async counterpart of :meth:`get_or_fetch`; ``fetch`` returns an awaitable."""
+        ttl = self.ttl_for(path)
+        if not ttl:
+            return await fetch()
+
+        key = cache_key(path, params)
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        inflight_key = (asyncio.get_running_loop(), key)
+        future = self._ainflight.get(inflight_key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._ainflight[inflight_key] = future
+        try:
+            value = await fetch()
+            self._store(key, value, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._ainflight[inflight_key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "max_entries": self.backend.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "coalesced": self.coalesced,
+        }
+
+    def clear(self):
+        self.backend.clear()
+
+
+def cache_from_env():
+    """Build the cache selected by ``SAAVN_CACHE_BACKEND`` (memory, sqlite or off)."""
+    kind = os.environ.get("SAAVN_CACHE_BACKEND", "memory").lower()
+    if kind in ("off", "none", ""):
+        return None
+    max_entries = int(os.environ.get("SAAVN_CACHE_MAX_ENTRIES", 2048))
+    if kind == "sqlite":
+        path = os.environ.get("SAAVN_CACHE_PATH", os.path.join("instance", "saavn_cache.db"))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return ResponseCache(SQLiteBackend(path, max_entries))
+    if kind == "memory":
+        return ResponseCache(MemoryBackend(max_entries))
+    raise ValueError(f"SAAVN_CACHE_BACKEND must be memory, sqlite or off, not {kind!r}")
@@ -0,0 +1,153 @@
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects import sqlite
+
+from models import db, Artist, Song
+import autocomplete
+import favorites
+import images
+import search_index
+from records import song_record
+
+
+# ----------------- Bulk upsert helpers -----------------
+def _insert_ignore(model):
+    """INSERT ... ON CONFLICT DO NOTHING for the bound dialect."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        from sqlalchemy.dialects import postgresql  # imported lazily, SQLite deployments never need it
+
+        return postgresql.insert(model).on_conflict_do_nothing()
+    return model.__table__.insert()
+
+
+def _resolve_artists(names):
+    """Map artist name -> id, creating the missing ones in one statement."""
+    artist_ids = dict(db.session.execute(
+        select(Artist.name, Artist.id).where(Artist.name.in_(names))
+    ).all())
+
+    missing = [name for name in names if name not in artist_ids]
+    if missing:
+        db.session.execute(_insert_ignore(Artist), [{"name": name} for name in missing])
+        artist_ids.update(db.session.execute(
+            select(Artist.name, Artist.id).where(Artist.name.in_(missing))
+        ).all())
+    return artist_ids
+
+
+def _resolve_songs(records, artist_ids):
+    """Map (name, artist_id) -> song id, inserting the missing songs in one statement.
+
+    Also returns the ids of the songs that were created.
+    """
+    keys = list(dict.fromkeys((r.title, artist_ids[r.artist]) for r in records))
+    key_cols = tuple_(Song.name, Song.artist_id)
+
+    song_ids = {
+        (name, artist_id): song_id
+        for song_id, name, artist_id in db.session.execute(
+            select(Song.id, Song.name, Song.artist_id).where(key_cols.in_(keys))
+        ).all()
+    }
+
+    new_ids = []
+    missing = [key for key in keys if key not in song_ids]
+    if missing:
+        first_by_key = {}
+        for r in records:
+            first_by_key.setdefault((r.title, artist_ids[r.artist]), r)
+        db.session.execute(_insert_ignore(Song), [_song_row(first_by_key[key], key[1]) for key in missing])
+        for song_id, name, artist_id in db.session.execute(
+            select(Song.id, Song.name, Song.artist_id).where(key_cols.in_(missing))
+        ).all():
+            if (name, artist_id) not in song_ids:
+                song_ids[(name, artist_id)] = song_id
+                new_ids.append(song_id)
+    return song_ids, new_ids
+
+
+def _song_row(record, artist_id):
+    """Song columns for a SongRecord; the resolved fields are stored so nothing re-parses the payload."""
+    return {
+        "name": record.title,
+        "artist_id": artist_id,
+        "album": record.album,
+        "youtube_url": record.audio_url,
+        "image_url": record.image_url,
+        "lyrics": record.lyrics,
+        "saavn_id": record.saavn_id,
+        "saavn_album_id": record.album_id,
+        "saavn_artist_ids": record.artist_ids or None,
+        "duration": record.duration,
+    }
+
+
+def favorite_song_ids(user_id, song_ids):
+    """Subset of ``song_ids`` the user has favorited, from the per-user cache."""
+    if not song_ids or not user_id:
+        return set()
+    return favorites.favorite_ids(user_id).intersection(song_ids)
+
+
+# ----------------- Search page ingestion -----------------
+def ingest_search_results(results, user_id):
+    """Store a page of Saavn search results and return the song dicts for the template.
+
+    The whole page is resolved with a handful of set-based statements and a
+    single commit instead of a lookup/insert/commit per result.
+    """
+    records = [song_record(song_data) for song_data in results]
+    if not records:
+        return []
+
+    search_index.ensure_index()
+    artist_ids = _resolve_artists(list(dict.fromkeys(r.artist for r in records)))
+    song_ids, new_ids = _resolve_songs(records, artist_ids)
+    search_index.index_songs(new_ids)
+    liked = favorite_song_ids(user_id, list(song_ids.values()))
+    db.session.commit()
+
+    songs = []
+    new_songs = set(new_ids)
+    added = []
+    for r in records:
+        song_id = song_ids[(r.title, artist_ids[r.artist])]
+        if song_id in new_songs:
+            new_songs.discard(song_id)
+            added.append((song_id, r.title, r.artist))
+        songs.append({
+            "id": song_id,
+            "title": r.title,
+            "artist": r.artist,
+            "album": r.album,
+            "url": r.audio_url,
+            "image": r.image_url,
+            "duration": r.duration,
+            "favorite": song_id in liked,
+        })
+    autocomplete.add_songs(added)
+    fresh = set(new_ids)
+    images.prefetch([song["image"] for song in songs if song["id"] in fresh])
+    return songs
+
+
+# ----------------- Local catalog search -----------------
+def local_search_results(query, user_id, page=1, per_page=10):
+    """Search-results dicts for ``query`` served from the local FTS index."""
+    songs = search_index.search_songs(query, limit=per_page, offset=(page - 1) * per_page)
+    liked = favorite_song_ids(user_id, [song.id for song in songs])
+    return [
+        {
+            "id": song.id,
+            "title": song.name,
+            "artist": song.artist_obj.name if song.artist_obj else "Unknown Artist",
+            "album": song.album,
+            "url": song.youtube_url,
+            "image": song.image_url,
+            "duration": song.duration,
+            "favorite": song.id in liked,
+        }
+        for song in songs
+    ]
@@ -0,0 +1,81 @@
+# check_play_buffer.py
+# Fails (exit 1) when a full play-event buffer stops behaving: with the
+# database down, record() must give up within a bounded time and drop the
+# event instead of blocking the request; with the database back, an event
+# that finds the buffer full must be written inline.
+#
+#   python check_play_buffer.py
+
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmp.name, "check.db")
+os.environ["AUTOCOMPLETE_SNAPSHOT"] = os.path.join(_tmp.name, "autocomplete.pickle")
+os.environ["AUTOCOMPLETE_WARM"] = "0"
+os.environ["PLAY_COMPACT_INTERVAL"] = "0"
+
+from app import app  # noqa: E402  (needs DATABASE_URL first)
+from models import db, User, Song, RecentlyPlayed  # noqa: E402
+import play_events  # noqa: E402
+
+play_events.PLAY_BUFFER_WAIT = 0.05
+play_events.INLINE_RETRY_DELAY = 0.01
+TIME_LIMIT = 2.0   # seconds record() may take with the database down
+
+
+class DownEngine:
+    def begin(self):
+        raise OperationalError("BEGIN", {}, Exception("database is down"))
+
+
+def main():
+    failures = []
+    with app.app_context():
+        db.create_all()
+        user = User(username="check", email="check@example.com")
+        user.set_password("x")
+        song = Song(name="Song")
+        db.session.add_all([user, song])
+        db.session.commit()
+        user_id, song_id = user.id, song.id
+
+        buffer = play_events.PlayEventBuffer(max_size=2, flush_ms=10, batch=100, compact_every=0)
+        buffer.engine = DownEngine()
+        with buffer._flush_lock:   # hold the flusher back so the buffer stays full throughout
+            buffer.record(user_id, song_id)
+            buffer.record(user_id, song_id)
+            start = time.perf_counter()
+            buffer.record(user_id, song_id)
+            took = time.perf_counter() - start
+            status = "ok" if took < TIME_LIMIT and buffer.dropped == 1 else "FAIL"
+            print(f"{status:<5}database down, buffer full: record() returned in {took:.2f}s, "
+                  f"{buffer.dropped} dropped, {len(buffer.pending(user_id))} still buffered")
+            if status != "ok":
+                failures.append(f"record() with the database down took {took:.2f}s and dropped {buffer.dropped}")
+
+            buffer.engine = db.engine
+            buffer.record(user_id, song_id)
+            written = db.session.execute(select(RecentlyPlayed).where(RecentlyPlayed.user_id == user_id)).all()
+            status = "ok" if len(written) == 1 and buffer.dropped == 1 else "FAIL"
+            print(f"{status:<5}database up, buffer full: {len(written)} written inline")
+            if status != "ok":
+                failures.append(f"event finding the buffer full was not written inline ({len(written)} rows)")
+
+        buffer.close()
+        written = db.session.execute(select(RecentlyPlayed).where(RecentlyPlayed.user_id == user_id)).all()
+        if len(written) != 3:
+            failures.append(f"close() left {3 - len(written)} buffered events unwritten")
+
+    if failures:
+        print("\n".join(["", "Play buffer regressions:"] + failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
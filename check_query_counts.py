@@ -0,0 +1,114 @@
+# check_query_counts.py
+# Fails (exit 1) when a list endpoint's SQL statement count grows with the
+# length of the list, i.e. when an N+1 query sneaks back in, or when a
+# revalidation (If-None-Match, see conditional.py) does more than look up
+# the library version.
+#
+#   python check_query_counts.py
+
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+
+# endpoint -> max statements per request, whatever the list length
+# (the library pages read their version first, then the list)
+BUDGETS = {
+    "/queue": 2,
+    "/favorites": 2,
+    "/recently-played": 2,
+    "/profile": 1,
+}
+REVALIDATE_BUDGET = 1
+LIST_SIZES = (3, 60)
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmp.name, "check.db")
+os.environ["AUTOCOMPLETE_SNAPSHOT"] = os.path.join(_tmp.name, "autocomplete.pickle")
+os.environ["AUTOCOMPLETE_WARM"] = "0"
+
+from app import app  # noqa: E402  (needs DATABASE_URL first)
+from models import db, User, Artist, Song, QueueItem, RecentSong, UserFavorites  # noqa: E402
+
+
+@contextmanager
+def count_statements():
+    counter = {"n": 0}
+
+    def count(*_):
+        counter["n"] += 1
+
+    engines = list(db.engines.values())  # primary and read-only pool
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count)
+    try:
+        yield counter
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", count)
+
+
+def seed_user(n):
+    """A user with ``n`` songs (each by its own artist) queued, liked and played."""
+    user = User(username=f"user{n}", email=f"user{n}@example.com")
+    user.set_password("x")
+    db.session.add(user)
+    db.session.flush()
+    for i in range(n):
+        artist = Artist(name=f"Artist {n}-{i}")
+        song = Song(name=f"Song {n}-{i}", artist_obj=artist)
+        db.session.add_all([artist, song])
+        db.session.flush()
+        db.session.add_all([
+            QueueItem(user_id=user.id, song_id=song.id),
+            RecentSong(user_id=user.id, song_id=song.id, played_at=datetime.utcnow()),
+            UserFavorites(user_id=user.id, song_id=song.id),
+        ])
+    db.session.commit()
+    return user.id
+
+
+def main():
+    failures = []
+    with app.app_context():
+        db.create_all()
+        users = {n: seed_user(n) for n in LIST_SIZES}
+
+        client = app.test_client()
+        for endpoint, budget in BUDGETS.items():
+            counts = []
+            for n, user_id in users.items():
+                with client.session_transaction() as sess:
+                    sess["user_id"] = user_id
+                with count_statements() as counter:
+                    res = client.get(endpoint)
+                    res.get_data()  # drain streamed templates inside the count
+                    res.close()
+                if res.status_code != 200:
+                    failures.append(f"{endpoint}: HTTP {res.status_code} with {n} items")
+                counts.append(counter["n"])
+
+                etag = res.headers.get("ETag")
+                if etag:
+                    with count_statements() as counter:
+                        res = client.get(endpoint, headers={"If-None-Match": etag})
+                        res.close()
+                    if res.status_code != 304 or counter["n"] > REVALIDATE_BUDGET:
+                        failures.append(f"{endpoint}: revalidation answered HTTP {res.status_code} "
+                                        f"in {counter['n']} statements, budget {REVALIDATE_BUDGET}")
+
+            status = "ok" if max(counts) <= budget and len(set(counts)) == 1 else "FAIL"
+            print(f"{status:<5}{endpoint:<20} statements for {LIST_SIZES}: {counts} (budget {budget})")
+            if status != "ok":
+                failures.append(f"{endpoint}: {counts} statements, budget {budget}")
+
+    if failures:
+        print("\n".join(["", "Query count regressions:"] + failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
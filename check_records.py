@@ -0,0 +1,50 @@
+# check_records.py
+# Fails (exit 1) when the record memo hands out a song parsed from an
+# artist or album page (no artist fields) to a later search result for the
+# same song, which would ingest it under "Unknown Artist".
+#
+#   python check_records.py
+
+import json
+import os
+import sys
+
+import records
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures", "saavn")
+
+
+def load(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)["data"]
+
+
+def main():
+    search = {s["id"]: s for s in load("search_songs.json")["results"]}
+    pages = [("artist page", load("artist.json")["topSongs"]), ("album page", load("album.json")["songs"])]
+    failures = []
+    for label, songs in pages:
+        records.clear_memo()
+        shared = [s for s in songs if s["id"] in search]
+        for song in shared:
+            records.song_record(song)
+        for song in shared:
+            record = records.song_record(search[song["id"]])
+            expected = records.parse_song(search[song["id"]])
+            if record != expected:
+                failures.append(f"{label} then search, {song['id']}: got artist {record.artist!r}, "
+                                f"expected {expected.artist!r}")
+        # the page that follows a search gets the complete record, not a fresh partial one
+        for song in shared:
+            if records.song_record(song).artist == records.UNKNOWN_ARTIST:
+                failures.append(f"search then {label}, {song['id']}: complete record was replaced")
+        status = "ok" if not failures else "FAIL"
+        print(f"{status:<5}{label} then search: {len(shared)} shared songs")
+
+    if failures:
+        print("\n".join(["", "Record memo regressions:"] + failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
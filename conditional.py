@@ -0,0 +1,97 @@
+# conditional.py
+# Conditional GET for the per-user library: /queue, /favorites,
+# /playlists/<id> and /recently-played. Each is versioned by a counter in
+# user_stats that every write to that part of the library bumps in the same
+# transaction (see stats.py), so the ETag is computed from one primary-key
+# read and a matching If-None-Match is answered with a 304 before the view
+# loads any rows. Tags also cover the user and the deployed templates and
+# assets, and responses are marked private, no-cache so browsers (and
+# queue.html's polling fetch) revalidate every time.
+import hashlib
+import json
+import os
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from sqlalchemy import select
+
+from models import db, Playlist, UserStats
+import play_events
+
+
+# ----------------- What each page depends on -----------------
+def _versions(user_id, *columns):
+    row = db.session.execute(select(*columns).where(UserStats.user_id == user_id)).first()
+    return tuple(row) if row is not None else (0,) * len(columns)   # no stats row: nothing written yet
+
+
+def queue_version(user_id):
+    return _versions(user_id, UserStats.queue_version)
+
+
+def favorites_version(user_id):
+    return _versions(user_id, UserStats.favorites_version)
+
+
+def history_version(user_id):
+    # plays still in this process's write-behind buffer are on the page too
+    return _versions(user_id, UserStats.history_version) + (len(play_events.buffer.pending(user_id)),)
+
+
+def playlist_version(user_id, playlist_id):
+    """The owner's playlists version; None when there is no such playlist (the view 404s)."""
+    row = db.session.execute(
+        select(Playlist.user_id, UserStats.playlists_version)
+        .outerjoin(UserStats, UserStats.user_id == Playlist.user_id)
+        .where(Playlist.id == playlist_id)
+    ).first()
+    if row is None:
+        return None
+    return row.user_id, row.playlists_version or 0
+
+
+# ----------------- ETags -----------------
+def _build():
+    """Digest of the templates and fingerprinted assets, so a deploy changes every tag."""
+    token = current_app.extensions.get("conditional_build")
+    if token is None:
+        digest = hashlib.sha1()
+        folder = os.path.join(current_app.root_path, current_app.template_folder)
+        for name in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, name), "rb") as f:
+                digest.update(name.encode() + f.read())
+        digest.update(json.dumps(current_app.extensions.get("assets", {}), sort_keys=True).encode())
+        token = current_app.extensions["conditional_build"] = digest.hexdigest()[:12]
+    return token
+
+
+def body_etag(data):
+    """Strong ETag for a response body, for pages with no version to go by."""
+    return hashlib.sha1(data).hexdigest()[:20]
+
+
+def etag(version):
+    """Decorate a view whose response only changes with ``version(user_id, **view_args)``."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if "user_id" not in session:
+                return view(**kwargs)
+            user_id = session["user_id"]
+            parts = version(user_id, **kwargs)
+            if parts is None:
+                return view(**kwargs)
+            tag = hashlib.sha1(repr((_build(), request.endpoint, user_id, kwargs, parts)).encode()).hexdigest()[:20]
+
+            if request.if_none_match.contains(tag):
+                res = current_app.response_class(status=304)
+            else:
+                res = make_response(view(**kwargs))
+                if res.status_code != 200:
+                    return res
+            res.set_etag(tag)
+            res.cache_control.private = True
+            res.cache_control.no_cache = True
+            return res
+        return wrapper
+    return decorator
@@ -0,0 +1,152 @@
+import os
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, TextClause, event
+from sqlalchemy.engine import make_url
+
+# Engine settings for the app database, picked by DB_PROFILE:
+#   production   SQLite in WAL mode with synchronous=NORMAL, a page cache,
+#                mmap and a busy timeout; reads go through a separate
+#                read-only pool so they never wait on the writer
+#   development  SQLAlchemy's defaults, one engine
+# DATABASE_URL may point at Postgres instead; DATABASE_READ_URL then names
+# an optional read replica (reads may lag it by the replication delay).
+
+DB_PROFILE = os.environ.get("DB_PROFILE", "production")
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///spotify_clone.db")
+DATABASE_READ_URL = os.environ.get("DATABASE_READ_URL")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_MB = int(os.environ.get("SQLITE_CACHE_MB", 64))
+SQLITE_MMAP_MB = int(os.environ.get("SQLITE_MMAP_MB", 256))
+
+READER = "reader"   # bind key of the read-only engine
+UPSERT_DIALECTS = ("sqlite", "postgresql")   # stats.py and history.py write with ON CONFLICT
+
+
+def normalize_url(url):
+    """Accept the ``postgres://`` scheme many hosts hand out."""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def _is_file_sqlite(url):
+    url = make_url(url)
+    return (url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+            and url.query.get("mode") != "memory")
+
+
+def engine_options(url, profile=DB_PROFILE):
+    if profile != "production":
+        return {}
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    if make_url(url).get_backend_name() == "postgresql":
+        options.update(pool_pre_ping=True, pool_recycle=DB_POOL_RECYCLE)
+    elif not _is_file_sqlite(url):
+        return {}   # in-memory SQLite needs its single shared connection
+    return options
+
+
+def configure(app, url=None, read_url=None, profile=DB_PROFILE):
+    """Fill in the SQLALCHEMY_* config for ``profile``; call before ``db.init_app``."""
+    url = normalize_url(url or DATABASE_URL)
+    read_url = normalize_url(read_url or DATABASE_READ_URL or "")
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(url, profile)
+    app.config["DB_PROFILE"] = profile
+
+    if profile == "production":
+        if read_url:
+            reader = read_url
+        elif _is_file_sqlite(url):
+            reader = url   # same file, opened with query_only (see _sqlite_pragmas)
+        else:
+            reader = None
+        if reader:
+            app.config.setdefault("SQLALCHEMY_BINDS", {})[READER] = {
+                "url": reader, **engine_options(reader, profile)
+            }
+
+
+def init_app(app):
+    """Check the backend and install the SQLite pragmas on the engines ``db.init_app`` created."""
+    from models import db
+
+    with app.app_context():
+        engines = dict(db.engines)
+    dialect = engines[None].dialect.name
+    if dialect not in UPSERT_DIALECTS:
+        # refuse here rather than fail in the flush hook and the play flusher
+        raise RuntimeError(
+            f"DATABASE_URL uses {dialect}, but the play history and user stats writers need "
+            f"INSERT ... ON CONFLICT, which is only built for {' and '.join(UPSERT_DIALECTS)}"
+        )
+
+    if app.config.get("DB_PROFILE") != "production":
+        return
+    for key, engine in engines.items():
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _sqlite_pragmas(read_only=key == READER))
+
+
+def _sqlite_pragmas(read_only):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")   # persistent; readers find it set
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size={-SQLITE_CACHE_MB * 1024}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    return on_connect
+
+
+# ----------------- Read/write routing -----------------
+def _is_read(clause):
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() == "SELECT"
+    return False
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to the reader engine until the transaction writes.
+
+    Anything else (flushes, DML, text that isn't a SELECT, bare
+    ``session.connection()``) goes to the primary, and once a transaction
+    has touched the primary every later statement in it does too, so it
+    reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get("writing") and _is_read(clause):
+            reader = self._db.engines.get(READER)
+            if reader is not None:
+                return reader
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_begin")
+def _mark_writing(session, transaction, connection):
+    reader = session._db.engines.get(READER)
+    if connection.engine is not reader:
+        session.info["writing"] = True
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _clear_writing(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("writing", None)
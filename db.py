@@ -1,2 +0,0 @@
-from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()
\ No newline at end of file
@@ -1,4 +0,0 @@
-# extensions.py
-from flask_sqlalchemy import SQLAlchemy
-
-db = SQLAlchemy()
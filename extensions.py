@@ -1,4 +1,21 @@
 # extensions.py
+# The one registry of Flask extensions; models and blueprints import from here.
+import click
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from database import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def init_migrate(app):
+    """Register Flask-Migrate, but only under the ``flask`` CLI.
+
+    Alembic is the heaviest import the app has and is only needed for
+    ``flask db ...``; web workers never pay for it.
+    """
+    if click.get_current_context(silent=True) is None:
+        return
+    from flask_migrate import Migrate
+
+    Migrate(app, db)
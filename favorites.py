@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import db, UserFavorites, UserStats
+
+FAVORITES_CACHE_USERS = int(os.environ.get("FAVORITES_CACHE_USERS", 1024))
+FAVORITES_RECHECK_SECONDS = float(os.environ.get("FAVORITES_RECHECK_SECONDS", 2))
+
+
+# ----------------- Per-user favorite sets -----------------
+class FavoritesCache:
+    """LRU of ``user_id -> set(song_id)`` validated against user_stats.favorites_version.
+
+    A cached set is trusted for ``recheck`` seconds, so annotating search
+    results costs no SQL; after that one primary-key read of the version
+    tells whether another worker changed the user's likes, and only then is
+    the set reloaded. Commits in this process are applied to the set
+    directly (see the session hooks below).
+    """
+
+    def __init__(self, max_users=FAVORITES_CACHE_USERS, recheck=FAVORITES_RECHECK_SECONDS):
+        self.max_users = max_users
+        self.recheck = recheck
+        self._entries = OrderedDict()  # user_id -> [song_ids, version, checked_at]
+        self._lock = threading.Lock()
+        self.hits = self.validations = self.loads = 0
+
+    def _version(self, user_id):
+        return db.session.execute(
+            select(UserStats.favorites_version).where(UserStats.user_id == user_id)
+        ).scalar() or 0
+
+    def get(self, user_id, fresh=False):
+        """The user's favorite song ids; ``fresh`` forces a version check (use before writes)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+                if not fresh and now - entry[2] < self.recheck:
+                    self.hits += 1
+                    return entry[0]
+
+        version = self._version(user_id)
+        if entry is not None and entry[1] == version:
+            with self._lock:
+                self.validations += 1
+                entry[2] = now
+            return entry[0]
+
+        # version first: a like committed in between makes the next check reload again
+        song_ids = set(db.session.execute(
+            select(UserFavorites.song_id).where(UserFavorites.user_id == user_id)
+        ).scalars())
+        with self._lock:
+            self.loads += 1
+            self._entries[user_id] = [song_ids, version, now]
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return song_ids
+
+    def contains(self, user_id, song_id):
+        return song_id in self.get(user_id)
+
+    def apply(self, changes):
+        """Fold committed ``(user_id, song_id, added)`` changes into cached sets."""
+        with self._lock:
+            for user_id, song_id, added in changes:
+                song_id = int(song_id)
+                entry = self._entries.get(user_id)
+                if entry is None:
+                    continue
+                # copy-on-write so readers holding the old set never see it change
+                entry[0] = entry[0] | {song_id} if added else entry[0] - {song_id}
+                entry[1] += 1
+
+    def stats(self):
+        with self._lock:
+            return {"users": len(self._entries), "hits": self.hits,
+                    "validations": self.validations, "loads": self.loads}
+
+
+cache = FavoritesCache()
+
+
+def favorite_ids(user_id, fresh=False):
+    return cache.get(user_id, fresh)
+
+
+def is_favorite(user_id, song_id):
+    return cache.contains(user_id, song_id)
+
+
+# ----------------- Keep this process's cache in step with commits -----------------
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    changes = [(obj.user_id, obj.song_id, True) for obj in session.new if isinstance(obj, UserFavorites)]
+    changes += [(obj.user_id, obj.song_id, False) for obj in session.deleted if isinstance(obj, UserFavorites)]
+    if changes:
+        session.info.setdefault("favorite_changes", []).extend(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    changes = session.info.pop("favorite_changes", None)
+    if changes:
+        cache.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_changes(session):
+    session.info.pop("favorite_changes", None)
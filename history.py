@@ -0,0 +1,136 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, delete, func, insert, select, text
+from sqlalchemy.dialects import sqlite
+
+from models import db, RecentlyPlayed, RecentSong, PlayDaily
+import stats
+
+RECENT_HISTORY_SIZE = int(os.environ.get("RECENT_HISTORY_SIZE", 50))
+PLAY_ARCHIVE_DAYS = int(os.environ.get("PLAY_ARCHIVE_DAYS", 30))
+PLAY_COMPACT_INTERVAL = int(os.environ.get("PLAY_COMPACT_INTERVAL", 3600))
+_COMPACT_LOCK_KEY = 0x706C6179  # pg advisory lock id ("play")
+
+# Play history is kept in three shapes:
+#   recent_song      capped per-user set, one row per song, newest first (reads)
+#   recently_played  append-only raw play log for the last PLAY_ARCHIVE_DAYS
+#   play_daily       (day, user, song) -> plays, what compaction folds the log into
+
+
+def _dialect_insert(conn, model):
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    if dialect == "postgresql":
+        from sqlalchemy.dialects import postgresql
+
+        return postgresql.insert(model)
+    raise NotImplementedError(f"play history needs upserts, not available on {dialect}")
+
+
+# ----------------- Recording -----------------
+def record_batch(conn, events):
+    """Write ``(user_id, song_id, played_at)`` events on ``conn`` (one transaction).
+
+    Appends them to the raw log, moves each song to the front of its user's
+    recent set, trims the touched users' sets back to RECENT_HISTORY_SIZE and
+    bumps their play counters and history versions.
+    """
+    if not events:
+        return
+    conn.execute(insert(RecentlyPlayed), [
+        {"user_id": u, "song_id": s, "timestamp": t} for u, s, t in events
+    ])
+
+    # one row per (user, song) so a batch never upserts the same key twice
+    latest = {}
+    for user_id, song_id, played_at in events:
+        last, count = latest.get((user_id, song_id), (played_at, 0))
+        latest[(user_id, song_id)] = (max(last, played_at), count + 1)
+
+    upsert = _dialect_insert(conn, RecentSong)
+    newest = func.max if conn.dialect.name == "sqlite" else func.greatest
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[RecentSong.user_id, RecentSong.song_id],
+        set_={
+            "played_at": newest(RecentSong.played_at, upsert.excluded.played_at),
+            "play_count": RecentSong.play_count + upsert.excluded.play_count,
+        },
+    )
+    conn.execute(upsert, [
+        {"user_id": u, "song_id": s, "played_at": t, "play_count": n}
+        for (u, s), (t, n) in latest.items()
+    ])
+    trim(conn, {u for u, _ in latest})
+
+    plays = {}
+    for user_id, _, _ in events:
+        plays[user_id] = plays.get(user_id, 0) + 1
+    stats.bump(conn, {user_id: {"play_count": n, "history_version": 1} for user_id, n in plays.items()})
+
+
+def trim(conn, user_ids):
+    """Drop recent_song rows past the newest RECENT_HISTORY_SIZE for each user."""
+    uid = bindparam("uid")
+    keep = (
+        select(RecentSong.id)
+        .where(RecentSong.user_id == uid)
+        .order_by(RecentSong.played_at.desc())
+        .limit(RECENT_HISTORY_SIZE)
+    )
+    conn.execute(
+        delete(RecentSong).where(RecentSong.user_id == uid, RecentSong.id.not_in(keep)),
+        [{"uid": user_id} for user_id in user_ids],
+    )
+
+
+# ----------------- Reading -----------------
+def play_counts(after_song_id=0):
+    """``{song_id: lifetime plays}`` across the raw log and the daily aggregates, for songs with id > ``after_song_id``."""
+    counts = dict(db.session.execute(
+        select(PlayDaily.song_id, func.sum(PlayDaily.plays))
+        .where(PlayDaily.song_id > after_song_id)
+        .group_by(PlayDaily.song_id)
+    ).all())
+    for song_id, n in db.session.execute(
+        select(RecentlyPlayed.song_id, func.count())
+        .where(RecentlyPlayed.song_id > after_song_id)
+        .group_by(RecentlyPlayed.song_id)
+    ).all():
+        counts[song_id] = counts.get(song_id, 0) + n
+    return counts
+
+
+# ----------------- Compaction -----------------
+def compact(engine, now=None, keep_days=PLAY_ARCHIVE_DAYS):
+    """Fold raw plays from before the cutoff day into play_daily and delete them.
+
+    Plays of deleted songs (song_id NULL) have no play_daily key, so they
+    stay in the raw log, where reconcile() still counts them. Runs in one
+    transaction, so a crash leaves either both or neither. Returns how many
+    raw rows were folded.
+    """
+    now = now or datetime.utcnow()
+    cutoff = datetime(now.year, now.month, now.day) - timedelta(days=keep_days)
+
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _COMPACT_LOCK_KEY})
+
+        day = func.date(RecentlyPlayed.timestamp)
+        folded = (
+            select(day, RecentlyPlayed.user_id, RecentlyPlayed.song_id, func.count())
+            .where(RecentlyPlayed.timestamp < cutoff, RecentlyPlayed.song_id.isnot(None))
+            .group_by(day, RecentlyPlayed.user_id, RecentlyPlayed.song_id)
+        )
+        upsert = _dialect_insert(conn, PlayDaily).from_select(
+            ["day", "user_id", "song_id", "plays"], folded
+        )
+        conn.execute(upsert.on_conflict_do_update(
+            index_elements=[PlayDaily.day, PlayDaily.user_id, PlayDaily.song_id],
+            set_={"plays": PlayDaily.plays + upsert.excluded.plays},
+        ))
+        return conn.execute(
+            delete(RecentlyPlayed).where(RecentlyPlayed.timestamp < cutoff, RecentlyPlayed.song_id.isnot(None))
+        ).rowcount
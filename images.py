@@ -0,0 +1,266 @@
+# images.py
+# Album-art thumbnails for /img/<song_id>?w=64|150|500. Each (image url,
+# width) is fetched once, resized to the width bucket and stored under the
+# hash of its bytes, so songs sharing a cover share one file; a small key
+# file maps the source to that hash. Responses carry the hash as ETag and,
+# since thumb_url() versions the URL by its source, can be cached forever
+# in the browser (privately: /img needs a session).
+# The store is capped at IMAGE_CACHE_MAX_MB, oldest files evicted first.
+#
+# Resizing uses Pillow (in requirements.txt). Without it the store keeps
+# saavn.dev's own 50/150/500 px rendition closest above the bucket, which
+# is still a fraction of the 500 px original on small cards.
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from flask import send_file, url_for
+
+from saavn import saavn, UpstreamError
+
+try:
+    from PIL import Image
+except ImportError:  # optional: see above
+    Image = None
+
+IMAGE_THUMBNAILS = os.environ.get("IMAGE_THUMBNAILS", "1").lower() in ("1", "true")
+IMAGE_CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR", os.path.join("instance", "image_cache"))
+IMAGE_CACHE_MAX_MB = int(os.environ.get("IMAGE_CACHE_MAX_MB", 256))
+IMAGE_THREADS = int(os.environ.get("IMAGE_THREADS", 4))
+IMAGE_WIDTHS = (64, 150, 500)
+PREFETCH_WIDTHS = (64, 150)   # what search, favorites and playlist cards use
+DEFAULT_IMAGE = "default_album.png"
+JPEG_QUALITY = 82
+FETCH_TIMEOUT = 10
+
+SAAVN_SIZES = (50, 150, 500)
+_SAAVN_SIZE = re.compile(r"-(\d+)x(\d+)(\.\w+)$")
+
+
+def bucket(width):
+    """The smallest width bucket that covers ``width`` (150 when missing or bad)."""
+    if not width or width <= 0:
+        return 150
+    return next((w for w in IMAGE_WIDTHS if w >= width), IMAGE_WIDTHS[-1])
+
+
+def saavn_variant(url, width):
+    """saavn.dev's own rendition of ``url`` that is at least ``width`` px, when the url names its size."""
+    if not url:
+        return url
+    size = next((s for s in SAAVN_SIZES if s >= width), SAAVN_SIZES[-1])
+    return _SAAVN_SIZE.sub(f"-{size}x{size}\\g<3>", url)
+
+
+def thumbnail(data, width):
+    """(bytes, content type) for ``data`` scaled down to ``width``; unchanged without Pillow."""
+    if Image is None:
+        return data, None
+    image = Image.open(BytesIO(data))
+    if image.width <= width and image.height <= width:
+        return data, Image.MIME.get(image.format)
+    image.thumbnail((width, width), Image.LANCZOS)
+    out = BytesIO()
+    image.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    return out.getvalue(), "image/jpeg"
+
+
+# ----------------- Store -----------------
+class ImageStore:
+    def __init__(self, directory=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._blobs = OrderedDict()   # digest -> size, oldest first
+        self._keys = {}               # key -> (digest, content type)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        os.makedirs(os.path.join(directory, "keys"), exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        blobs = []
+        for sub in os.listdir(self.directory):
+            if len(sub) != 2:
+                continue
+            for name in os.listdir(os.path.join(self.directory, sub)):
+                st = os.stat(os.path.join(self.directory, sub, name))
+                blobs.append((st.st_mtime, name, st.st_size))
+        for _, digest, size in sorted(blobs):
+            self._blobs[digest] = size
+            self.used += size
+
+    def blob_path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _key_path(self, key):
+        return os.path.join(self.directory, "keys", key)
+
+    def _lookup(self, key):
+        entry = self._keys.get(key)
+        if entry is None:
+            try:
+                with open(self._key_path(key)) as f:
+                    digest, content_type = f.read().split()
+            except (OSError, ValueError):
+                return None
+            entry = self._keys[key] = (digest, content_type)
+        with self._lock:
+            if entry[0] not in self._blobs:
+                return None   # evicted
+            self._blobs.move_to_end(entry[0])
+        return entry
+
+    def get(self, url, width):
+        """(file path, digest, content type) of ``url`` at ``width``, fetching it at most once at a time."""
+        key = hashlib.sha1(f"{url} {width}".encode()).hexdigest()
+        entry = self._lookup(key)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            return self.blob_path(entry[0]), *entry
+
+        with self._lock:
+            self.misses += 1
+            done = self._inflight.get(key)
+            leader = done is None
+            if leader:
+                done = self._inflight[key] = threading.Event()
+        if not leader:
+            done.wait(FETCH_TIMEOUT * 2)
+            entry = self._lookup(key)
+            if entry is None:
+                raise UpstreamError(f"image {url} could not be fetched")
+            return self.blob_path(entry[0]), *entry
+
+        try:
+            entry = self._fetch(key, url, width)
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+        return self.blob_path(entry[0]), *entry
+
+    def _fetch(self, key, url, width):
+        source = saavn_variant(url, width)
+        try:
+            res = saavn.session.get(source, timeout=FETCH_TIMEOUT)
+            if res.status_code == 404 and source != url:
+                res = saavn.session.get(url, timeout=FETCH_TIMEOUT)   # no such rendition
+            res.raise_for_status()
+        except Exception as e:
+            raise UpstreamError(f"GET {source} failed: {e}") from e
+
+        data, content_type = thumbnail(res.content, width)
+        content_type = content_type or res.headers.get("Content-Type", "image/jpeg").split(";")[0]
+        digest = hashlib.sha256(data).hexdigest()[:32]
+
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        with open(self._key_path(key), "w") as f:
+            f.write(f"{digest} {content_type}")
+
+        entry = self._keys[key] = (digest, content_type)
+        with self._lock:
+            if digest not in self._blobs:
+                self._blobs[digest] = len(data)
+                self.used += len(data)
+            self._blobs.move_to_end(digest)
+            self._evict(keep=digest)
+        return entry
+
+    def _evict(self, keep):
+        while self.used > self.max_bytes and len(self._blobs) > 1:
+            digest, size = next(iter(self._blobs.items()))
+            if digest == keep:
+                self._blobs.move_to_end(digest)
+                continue
+            del self._blobs[digest]
+            self.used -= size
+            self.evictions += 1
+            try:
+                os.remove(self.blob_path(digest))
+            except OSError:
+                pass
+
+    # ---------- background ----------
+    def prefetch(self, urls, widths=PREFETCH_WIDTHS):
+        """Generate thumbnails for ``urls`` on the background pool (best effort)."""
+        if not urls:
+            return
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(IMAGE_THREADS, thread_name_prefix="thumbnails")
+        for url in dict.fromkeys(urls):
+            for width in widths:
+                self._pool.submit(self._prefetch_one, url, width)
+
+    def _prefetch_one(self, url, width):
+        try:
+            self.get(url, width)
+        except Exception:
+            pass  # the page request retries and reports it
+
+    def stats(self):
+        return {
+            "files": len(self._blobs),
+            "used_bytes": self.used,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "resizer": "pillow" if Image is not None else "saavn renditions",
+        }
+
+
+store = None
+_init_lock = threading.Lock()
+
+
+def get_store():
+    global store
+    if store is None:
+        with _init_lock:
+            if store is None:
+                if Image is None:
+                    print("[WARN] Pillow is not installed: thumbnails are saavn.dev renditions, not resized")
+                store = ImageStore()
+    return store
+
+
+def prefetch(urls):
+    if IMAGE_THUMBNAILS:
+        get_store().prefetch([url for url in urls if url])
+
+
+# ----------------- URLs and responses -----------------
+def thumb_url(song_id, image_url, width):
+    """URL for a song's art at ``width``; versioned by the source, so it is safe to cache forever."""
+    if not image_url:
+        return url_for("static", filename=DEFAULT_IMAGE)
+    if not IMAGE_THUMBNAILS or not song_id:
+        return image_url
+    version = hashlib.sha1(image_url.encode()).hexdigest()[:10]
+    return url_for("library.song_image", song_id=song_id, w=bucket(width), v=version)
+
+
+def serve(url, width):
+    """Response for ``url`` at ``width`` (304 on a matching If-None-Match); raises UpstreamError."""
+    path, digest, content_type = get_store().get(url, width)
+    res = send_file(path, mimetype=content_type, etag=digest, conditional=True, max_age=365 * 24 * 3600)
+    res.cache_control.public = False   # /img needs a session, so only the browser's own cache may keep it
+    res.cache_control.private = True
+    res.cache_control.immutable = True
+    return res
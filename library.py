@@ -0,0 +1,120 @@
+import random
+
+from sqlalchemy import func, select
+
+from models import db, Song, Artist, QueueItem, RecentSong, UserFavorites
+
+# Every list page costs one statement regardless of its length: songs are
+# read as a single song+artist column projection instead of ORM objects
+# whose artist is lazy-loaded row by row.
+
+
+def song_columns():
+    """Columns list pages need, with the artist name already joined in."""
+    return (
+        Song.id,
+        Song.name,
+        Song.album,
+        Song.youtube_url,
+        Song.image_url,
+        func.coalesce(Artist.name, "Unknown Artist").label("artist"),
+    )
+
+
+def _songs_via(model, *where):
+    return (
+        select(*song_columns())
+        .join(model, model.song_id == Song.id)
+        .outerjoin(Artist, Artist.id == Song.artist_id)
+        .where(*where)
+    )
+
+
+def queue_songs(user_id):
+    """The user's queue in play order, with each entry's ``item_id``."""
+    return db.session.execute(
+        _songs_via(QueueItem, QueueItem.user_id == user_id)
+        .add_columns(QueueItem.id.label("item_id"), QueueItem.position)
+        .order_by(QueueItem.position.asc(), QueueItem.id.asc())
+    ).all()
+
+
+def favorite_songs(user_id):
+    """The user's liked songs, oldest first."""
+    return db.session.execute(
+        _songs_via(UserFavorites, UserFavorites.user_id == user_id)
+        .order_by(UserFavorites.id.asc())
+    ).all()
+
+
+def recently_played_songs(user_id, limit=25):
+    """The user's recent songs (each once), most recently played first."""
+    return db.session.execute(
+        _songs_via(RecentSong, RecentSong.user_id == user_id)
+        .add_columns(RecentSong.played_at)
+        .order_by(RecentSong.played_at.desc(), RecentSong.id.desc())
+        .limit(limit)
+    ).all()
+
+
+def songs_by_id(song_ids):
+    """``{song_id: row}`` for the given ids, in one statement."""
+    rows = db.session.execute(
+        select(*song_columns())
+        .outerjoin(Artist, Artist.id == Song.artist_id)
+        .where(Song.id.in_(list(song_ids)))
+    ).all()
+    return {row.id: row for row in rows}
+
+
+# ----------------- Catalog browsing -----------------
+CATALOG_PAGE_SIZE = 50
+CATALOG_MAX_PAGE_SIZE = 200
+
+
+def catalog_page(after_id=0, limit=CATALOG_PAGE_SIZE):
+    """Keyset page of the catalog in id order.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    Cost is independent of how deep into the catalog the page is.
+    """
+    rows = db.session.execute(
+        select(*song_columns())
+        .outerjoin(Artist, Artist.id == Song.artist_id)
+        .where(Song.id > after_id)
+        .order_by(Song.id.asc())
+        .limit(limit + 1)
+    ).all()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+def next_catalog_song_id(after_id):
+    """Song after ``after_id`` in id order, wrapping to the first song."""
+    song_id = db.session.execute(
+        select(Song.id).where(Song.id > after_id).order_by(Song.id.asc()).limit(1)
+    ).scalar()
+    if song_id is None:
+        song_id = db.session.execute(select(func.min(Song.id))).scalar()
+    return song_id
+
+
+def previous_catalog_song_id(before_id):
+    """Song before ``before_id`` in id order, wrapping to the last song."""
+    song_id = db.session.execute(
+        select(Song.id).where(Song.id < before_id).order_by(Song.id.desc()).limit(1)
+    ).scalar()
+    if song_id is None:
+        song_id = db.session.execute(select(func.max(Song.id))).scalar()
+    return song_id
+
+
+def random_catalog_song_id():
+    """A random song id via an index seek instead of ORDER BY random()."""
+    low, high = db.session.execute(select(func.min(Song.id), func.max(Song.id))).one()
+    if low is None:
+        return None
+    return db.session.execute(
+        select(Song.id).where(Song.id >= random.randint(low, high)).order_by(Song.id.asc()).limit(1)
+    ).scalar()
@@ -0,0 +1,305 @@
+# Home/player pages, catalog browsing, profile, playlists, favorites and history.
+from flask import Blueprint, request, render_template, stream_template, session, redirect, url_for, jsonify
+from sqlalchemy import select
+
+from extensions import db
+from models import Song, Playlist, PlaylistSong, Favorite, UserFavorites
+from saavn import UpstreamError
+from library import favorite_songs, catalog_page, CATALOG_PAGE_SIZE, CATALOG_MAX_PAGE_SIZE
+import audio_cache
+import conditional
+import favorites
+import images
+import play_events
+import stats
+
+library_bp = Blueprint('library', __name__)
+
+
+@library_bp.route('/')
+def index():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    # the sidebar loads the user's playlists itself, only when its cached fragment is stale
+    return render_template("player.html")
+
+@library_bp.route('/player')
+def player():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    songs, next_cursor = catalog_page(limit=CATALOG_PAGE_SIZE)
+    return stream_template('player.html', songs=songs, next_cursor=next_cursor)
+
+
+# Catalog browsing (AJAX), keyset-paginated by song id
+@library_bp.route('/api/songs')
+def api_songs():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Login required'}), 403
+
+    after = request.args.get('after', 0, type=int)
+    limit = min(max(request.args.get('limit', CATALOG_PAGE_SIZE, type=int), 1), CATALOG_MAX_PAGE_SIZE)
+    songs, next_cursor = catalog_page(after, limit)
+    return jsonify({
+        'songs': [{
+            'id': s.id,
+            'name': s.name,
+            'artist': s.artist,
+            'album': s.album,
+            'youtube_url': s.youtube_url,
+            'image_url': s.image_url,
+        } for s in songs],
+        'next': next_cursor,
+    })
+
+# ----------------- Album art thumbnails (see images.py) -----------------
+@library_bp.route('/img/<int:song_id>')
+def song_image(song_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Login required'}), 401
+    width = request.args.get('w', type=int)
+    if width not in images.IMAGE_WIDTHS:
+        return jsonify({'error': f"w must be one of {', '.join(map(str, images.IMAGE_WIDTHS))}"}), 400
+
+    url = db.session.scalar(select(Song.image_url).where(Song.id == song_id))
+    if not url:
+        return redirect(url_for('static', filename=images.DEFAULT_IMAGE))
+    try:
+        return images.serve(url, width)
+    except UpstreamError as e:
+        print(f"[ERROR] Thumbnail failed: {e}")
+        return redirect(url)
+
+
+@library_bp.app_template_global('thumb_url')
+def thumb_url(song_id, image_url, width):
+    return images.thumb_url(song_id, image_url, width)
+
+
+@library_bp.route('/profile')
+def user_profile():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    row = stats.user_with_stats(session['user_id'])
+    if row is None:
+        return redirect(url_for('auth.login'))
+    user, user_stats = row
+
+    return render_template('profile.html',
+                           user=user,
+                           liked_count=user_stats.liked_count if user_stats else 0,
+                           recently_played_count=user_stats.play_count if user_stats else 0,
+                           playlist_count=user_stats.playlist_count if user_stats else 0)
+
+# --------------CREATE PLAYLIST 
+
+
+@library_bp.route('/playlists/create', methods=['POST'])
+def create_playlist():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    name = request.form.get('name')
+    if not name:
+        return "Playlist name required", 400
+
+    playlist = Playlist(name=name, user_id=session['user_id'])
+    db.session.add(playlist)
+    db.session.commit()
+    return redirect(url_for('library.list_playlists'))
+
+@library_bp.route('/playlists')
+def list_playlists():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    playlists = Playlist.query.filter_by(user_id=session['user_id']).all()
+    return render_template('playlists.html', playlists=playlists)
+
+@library_bp.route('/playlists/<int:playlist_id>/add', methods=['POST'])
+def add_to_playlist(playlist_id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    song_id = request.form.get('song_id')
+    song_name = request.form.get('name')
+    artist = request.form.get('artist')
+    album = request.form.get('album')
+    youtube_url = request.form.get('youtube_url') or ""
+    image_url = request.form.get('image_url') or ""
+
+    if not song_id or not song_name:
+        return "Missing song ID or name", 400
+
+    song = Song.query.get(song_id)
+    if not song:
+        song = Song(
+            id=song_id,
+            name=song_name,
+            artist=artist,
+            album=album,
+            youtube_url=youtube_url,
+            image_url=image_url
+        )
+        db.session.add(song)
+        db.session.commit()
+
+    existing = PlaylistSong.query.filter_by(playlist_id=playlist_id, song_id=song.id).first()
+    if not existing:
+        entry = PlaylistSong(playlist_id=playlist_id, song_id=song.id)
+        db.session.add(entry)
+        db.session.commit()
+
+    return redirect(url_for('library.view_playlist', playlist_id=playlist_id))
+
+@library_bp.route('/playlists/<int:playlist_id>')
+@conditional.etag(conditional.playlist_version)
+def view_playlist(playlist_id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    playlist = Playlist.query.get_or_404(playlist_id)
+    songs = playlist.songs
+    return render_template('playlist_detail.html', playlist=playlist, songs=songs)
+#...........playlist id.......
+
+@library_bp.route('/playlists/<int:playlist_id>/delete', methods=['POST'])
+def delete_playlist(playlist_id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    playlist = Playlist.query.filter_by(id=playlist_id, user_id=session['user_id']).first()
+    if playlist:
+        db.session.delete(playlist)
+        db.session.commit()
+
+    return redirect(url_for('library.list_playlists'))
+
+@library_bp.route('/playlists/<int:playlist_id>/songs/<int:song_id>/remove', methods=['POST'])
+def remove_song_from_playlist(playlist_id, song_id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    playlist_song = PlaylistSong.query.filter_by(playlist_id=playlist_id, song_id=song_id).first()
+    if playlist_song:
+        db.session.delete(playlist_song)
+        db.session.commit()
+
+    return redirect(url_for('library.view_playlist', playlist_id=playlist_id))
+
+@library_bp.route('/create_default_playlist')
+def create_default_playlist():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    existing = Playlist.query.filter_by(user_id=session['user_id']).first()
+    if not existing:
+        playlist = Playlist(name="My Default Playlist", user_id=session['user_id'])
+        db.session.add(playlist)
+        db.session.commit()
+        return "Default playlist created!"
+    return "Playlist already exists!"
+
+
+
+
+
+
+
+
+
+@library_bp.route('/recently-played')
+@conditional.etag(conditional.history_version)
+def recently_played():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    songs = play_events.recent_plays(session['user_id'], limit=25)
+    return render_template('recently_played.html', songs=songs)
+
+# ----------------- Toggle Favorite Route -----------------
+@library_bp.route("/toggle_favorite", methods=["POST"])
+def toggle_favorite():
+    if "user_id" not in session:
+        return jsonify({"error": "Login required"}), 403
+
+    data = request.get_json()
+    song_id = data.get("song_id")
+
+    if not str(song_id).isdigit():
+        return jsonify({"error": "Song ID required"}), 400
+    song_id = int(song_id)
+
+    if song_id in favorites.favorite_ids(session["user_id"], fresh=True):
+        fav = UserFavorites.query.filter_by(user_id=session["user_id"], song_id=song_id).first()
+        if fav:
+            db.session.delete(fav)
+            db.session.commit()
+        return jsonify({"status": "removed"})
+    else:
+        new_fav = UserFavorites(user_id=session["user_id"], song_id=song_id)
+        db.session.add(new_fav)
+        db.session.commit()
+        return jsonify({"status": "added"})
+
+
+
+@library_bp.route('/favorites/add', methods=['POST'])
+def add_to_favorites():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    song_id = request.form.get('song_id')
+    if not song_id or not song_id.isdigit():
+        return "Song ID required", 400
+    song_id = int(song_id)
+
+    # Check if the song is already in favorites
+    if song_id not in favorites.favorite_ids(session['user_id'], fresh=True):
+        fav = UserFavorites(user_id=session['user_id'], song_id=song_id)
+        db.session.add(fav)
+        db.session.commit()
+
+    return redirect(url_for('library.index'))
+
+
+@library_bp.route("/favorites")
+@conditional.etag(conditional.favorites_version)
+def view_favorites():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    user_id = session["user_id"]
+
+    songs = []
+    for s in favorite_songs(user_id):
+        songs.append({
+            "id": s.id,
+            "title": s.name,
+            "artist": s.artist,
+            "image": s.image_url,
+            "url": audio_cache.stream_url(s.id, s.youtube_url),   # 👈 yaha tumhara audio_url
+        })
+
+    return stream_template("favorites.html", songs=songs)
+
+
+    # ----------- ADD THIS LINE ----------------
+    return render_template(
+        "favorites.html",
+        songs=fav_songs,
+        current_song=current_song,
+        song_id=current_song.id if current_song else None,
+        song_favorite=bool(current_song and UserFavorites.query.filter_by(
+            user_id=session["user_id"], song_id=current_song.id
+        ).first())
+    )
+@library_bp.route('/remove_favorite/<int:song_id>', methods=['POST'])
+def remove_favorite(song_id):
+    fav = Favorite.query.filter_by(song_id=song_id).first()
+    if fav:
+        db.session.delete(fav)
+        db.session.commit()
+        return {"success": True}, 200
+    return {"error": "Not found"}, 404
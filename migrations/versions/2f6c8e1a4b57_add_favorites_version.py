@@ -0,0 +1,26 @@
+"""Add favorites version to user stats
+
+Revision ID: 2f6c8e1a4b57
+Revises: 9d3a61f0b7c4
+Create Date: 2026-10-18 21:03:29.880145
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f6c8e1a4b57'
+down_revision = '9d3a61f0b7c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('favorites_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('user_stats', schema=None) as batch_op:
+        batch_op.drop_column('favorites_version')
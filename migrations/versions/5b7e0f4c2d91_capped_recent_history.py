@@ -0,0 +1,64 @@
+"""Capped recent history and daily play aggregates
+
+Revision ID: 5b7e0f4c2d91
+Revises: e81b3c5d9a20
+Create Date: 2026-10-18 19:32:05.114870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e0f4c2d91'
+down_revision = 'e81b3c5d9a20'
+branch_labels = None
+depends_on = None
+
+RECENT_HISTORY_SIZE = 50  # history.RECENT_HISTORY_SIZE
+
+
+def upgrade():
+    op.create_table('recent_song',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('song_id', sa.Integer(), nullable=False),
+        sa.Column('played_at', sa.DateTime(), nullable=False),
+        sa.Column('play_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['song_id'], ['song.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_recent_song_user_id_song_id', 'recent_song', ['user_id', 'song_id'], unique=True)
+    op.create_index('ix_recent_song_user_id_played_at', 'recent_song', ['user_id', 'played_at'])
+    op.create_table('play_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('song_id', sa.Integer(), nullable=False),
+        sa.Column('plays', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['song_id'], ['song.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('day', 'user_id', 'song_id')
+    )
+
+    # seed each user's recent set from the play log, newest songs first
+    bind = op.get_bind()
+    bind.execute(sa.text(
+        "INSERT INTO recent_song (user_id, song_id, played_at, play_count)"
+        " SELECT user_id, song_id, MAX(COALESCE(timestamp, CURRENT_TIMESTAMP)), COUNT(*)"
+        " FROM recently_played WHERE user_id IS NOT NULL AND song_id IS NOT NULL"
+        " GROUP BY user_id, song_id"
+    ))
+    bind.execute(sa.text(
+        "DELETE FROM recent_song WHERE id IN (SELECT id FROM ("
+        " SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY played_at DESC, id DESC) AS rank"
+        " FROM recent_song) ranked WHERE rank > :size)"
+    ), {'size': RECENT_HISTORY_SIZE})
+
+
+def downgrade():
+    # plays already folded into play_daily are not expanded back into recently_played
+    op.drop_table('play_daily')
+    op.drop_index('ix_recent_song_user_id_played_at', table_name='recent_song')
+    op.drop_index('uq_recent_song_user_id_song_id', table_name='recent_song')
+    op.drop_table('recent_song')
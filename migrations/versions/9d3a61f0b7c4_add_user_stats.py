@@ -0,0 +1,41 @@
+"""Add user stats counters
+
+Revision ID: 9d3a61f0b7c4
+Revises: 5b7e0f4c2d91
+Create Date: 2026-10-18 20:14:47.602318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3a61f0b7c4'
+down_revision = '5b7e0f4c2d91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('liked_count', sa.Integer(), nullable=False),
+        sa.Column('play_count', sa.Integer(), nullable=False),
+        sa.Column('playlist_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    # same counts as stats.reconcile()
+    op.get_bind().execute(sa.text(
+        'INSERT INTO user_stats (user_id, liked_count, play_count, playlist_count)'
+        ' SELECT u.id,'
+        ' (SELECT COUNT(*) FROM user_favorites f WHERE f.user_id = u.id),'
+        ' (SELECT COUNT(*) FROM recently_played r WHERE r.user_id = u.id)'
+        ' + (SELECT COALESCE(SUM(d.plays), 0) FROM play_daily d WHERE d.user_id = u.id),'
+        ' (SELECT COUNT(*) FROM playlist p WHERE p.user_id = u.id)'
+        ' FROM "user" u'
+    ))
+
+
+def downgrade():
+    op.drop_table('user_stats')
@@ -0,0 +1,34 @@
+"""Store resolved Saavn record fields on song
+
+Revision ID: a3d5f7b9c1e2
+Revises: 2f6c8e1a4b57
+Create Date: 2026-10-18 23:12:40.512803
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d5f7b9c1e2'
+down_revision = '2f6c8e1a4b57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('song', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('saavn_id', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('saavn_album_id', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('saavn_artist_ids', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('duration', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_song_saavn_id'), ['saavn_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('song', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_song_saavn_id'))
+        batch_op.drop_column('duration')
+        batch_op.drop_column('saavn_artist_ids')
+        batch_op.drop_column('saavn_album_id')
+        batch_op.drop_column('saavn_id')
@@ -0,0 +1,75 @@
+"""Add indexes for hot lookups
+
+Revision ID: c4f2a9d17e35
+Revises: 1db1e3f6a59e
+Create Date: 2026-10-18 10:12:44.203511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f2a9d17e35'
+down_revision = '1db1e3f6a59e'
+branch_labels = None
+depends_on = None
+
+# tables pointing at song.id, with the column that must stay unique next to song_id
+SONG_REFERENCES = [
+    ('playlist_song', 'playlist_id'),
+    ('user_favorites', 'user_id'),
+    ('favorite', 'user_id'),
+    ('queue_item', None),
+    ('recently_played', None),
+    ('song_tag', None),
+]
+
+
+def merge_duplicate_songs(bind):
+    """Fold songs sharing name+artist into the oldest row, repointing references."""
+    duplicates = bind.execute(sa.text(
+        "SELECT s.id, k.keep_id FROM song s JOIN ("
+        " SELECT name, artist_id, MIN(id) AS keep_id FROM song"
+        " WHERE name IS NOT NULL AND artist_id IS NOT NULL"
+        " GROUP BY name, artist_id HAVING COUNT(*) > 1"
+        ") k ON s.name = k.name AND s.artist_id = k.artist_id AND s.id <> k.keep_id"
+    )).all()
+
+    for old_id, keep_id in duplicates:
+        params = {'old': old_id, 'keep': keep_id}
+        for table, owner in SONG_REFERENCES:
+            if owner:
+                # drop rows that would collide with the kept song's row
+                bind.execute(sa.text(
+                    f"DELETE FROM {table} WHERE song_id = :old AND {owner} IN"
+                    f" (SELECT {owner} FROM {table} WHERE song_id = :keep)"
+                ), params)
+            bind.execute(sa.text(f"UPDATE {table} SET song_id = :keep WHERE song_id = :old"), params)
+        bind.execute(sa.text("DELETE FROM song WHERE id = :old"), params)
+
+
+def upgrade():
+    bind = op.get_bind()
+    merge_duplicate_songs(bind)
+    bind.execute(sa.text(
+        "DELETE FROM favorite WHERE id NOT IN"
+        " (SELECT MIN(id) FROM favorite GROUP BY user_id, song_id)"
+    ))
+
+    op.create_index('uq_song_name_artist_id', 'song', ['name', 'artist_id'], unique=True)
+    op.create_index('uq_favorite_user_id_song_id', 'favorite', ['user_id', 'song_id'], unique=True)
+    op.create_index('ix_recently_played_user_id_timestamp', 'recently_played', ['user_id', 'timestamp'])
+    op.create_index('ix_queue_item_user_id_added_at', 'queue_item', ['user_id', 'added_at'])
+    op.create_index(op.f('ix_playlist_user_id'), 'playlist', ['user_id'])
+    op.create_index(op.f('ix_song_tag_song_id'), 'song_tag', ['song_id'])
+
+
+def downgrade():
+    # merged duplicate songs are not restored
+    op.drop_index(op.f('ix_song_tag_song_id'), table_name='song_tag')
+    op.drop_index(op.f('ix_playlist_user_id'), table_name='playlist')
+    op.drop_index('ix_queue_item_user_id_added_at', table_name='queue_item')
+    op.drop_index('ix_recently_played_user_id_timestamp', table_name='recently_played')
+    op.drop_index('uq_favorite_user_id_song_id', table_name='favorite')
+    op.drop_index('uq_song_name_artist_id', table_name='song')
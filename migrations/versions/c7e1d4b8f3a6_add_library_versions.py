@@ -0,0 +1,30 @@
+"""Add queue, playlists and history versions to user stats
+
+Revision ID: c7e1d4b8f3a6
+Revises: a3d5f7b9c1e2
+Create Date: 2026-10-18 23:12:41.507318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e1d4b8f3a6'
+down_revision = 'a3d5f7b9c1e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('queue_version', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('playlists_version', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('history_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('user_stats', schema=None) as batch_op:
+        batch_op.drop_column('history_version')
+        batch_op.drop_column('playlists_version')
+        batch_op.drop_column('queue_version')
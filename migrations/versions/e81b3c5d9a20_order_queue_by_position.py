@@ -0,0 +1,41 @@
+"""Order queue by position
+
+Revision ID: e81b3c5d9a20
+Revises: c4f2a9d17e35
+Create Date: 2026-10-18 16:40:12.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81b3c5d9a20'
+down_revision = 'c4f2a9d17e35'
+branch_labels = None
+depends_on = None
+
+GAP = 1024  # play_queue.GAP
+
+
+def upgrade():
+    bind = op.get_bind()
+    # number every queue in its old added_at order, GAP apart
+    rows = bind.execute(sa.text(
+        "SELECT id, user_id FROM queue_item ORDER BY user_id, added_at, id"
+    )).all()
+    updates, last_user, n = [], None, 0
+    for item_id, user_id in rows:
+        n = n + 1 if user_id == last_user else 1
+        last_user = user_id
+        updates.append({'id': item_id, 'position': GAP * n})
+    if updates:
+        bind.execute(sa.text("UPDATE queue_item SET position = :position WHERE id = :id"), updates)
+
+    op.drop_index('ix_queue_item_user_id_added_at', table_name='queue_item')
+    op.create_index('ix_queue_item_user_id_position', 'queue_item', ['user_id', 'position'])
+
+
+def downgrade():
+    op.drop_index('ix_queue_item_user_id_position', table_name='queue_item')
+    op.create_index('ix_queue_item_user_id_added_at', 'queue_item', ['user_id', 'added_at'])
@@ -1,8 +1,7 @@
-from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
-db = SQLAlchemy()
+from extensions import db
 
 # ----------------- User Model -----------------
 class User(db.Model):
@@ -39,16 +38,24 @@ class Song(db.Model):
     image_url = db.Column(db.String(500))
     lyrics = db.Column(db.Text)
     is_public = db.Column(db.Boolean, default=True)
+    # resolved from the Saavn payload at ingest (see records.py)
+    saavn_id = db.Column(db.String(64), index=True)
+    saavn_album_id = db.Column(db.String(64))
+    saavn_artist_ids = db.Column(db.String(255))
+    duration = db.Column(db.Integer)  # seconds
 
     tags = db.relationship('SongTag', backref='song', lazy=True)
     favorites = db.relationship('Favorite', backref='song', lazy=True)
     played_recently = db.relationship("RecentlyPlayed", backref="song", lazy=True)
 
+    # One row per title+artist so catalog upserts can insert-or-ignore
+    __table_args__ = (db.Index('uq_song_name_artist_id', 'name', 'artist_id', unique=True),)
+
 # ----------------- Playlist Model -----------------
 class Playlist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100))
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
     songs = db.relationship('Song', secondary='playlist_song', backref='playlists')
 
 class PlaylistSong(db.Model):
@@ -59,7 +66,7 @@ class PlaylistSong(db.Model):
 # ----------------- Song-Tag (Category) -----------------
 class SongTag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    song_id = db.Column(db.Integer, db.ForeignKey('song.id'), nullable=False)
+    song_id = db.Column(db.Integer, db.ForeignKey('song.id'), nullable=False, index=True)
     tag = db.Column(db.String(50), nullable=False)
 
 # ----------------- Favorite Songs -----------------
@@ -68,6 +75,8 @@ class Favorite(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     song_id = db.Column(db.Integer, db.ForeignKey('song.id'), nullable=False)
 
+    __table_args__ = (db.Index('uq_favorite_user_id_song_id', 'user_id', 'song_id', unique=True),)
+
 # ----------------- Recently Played Songs -----------------
 class RecentlyPlayed(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -75,14 +84,63 @@ class RecentlyPlayed(db.Model):
     song_id = db.Column(db.Integer, db.ForeignKey('song.id'))
     timestamp = db.Column(db.DateTime, server_default=db.func.now())
 
+    # raw play log (archive); old rows are folded into PlayDaily by history.compact()
+    __table_args__ = (db.Index('ix_recently_played_user_id_timestamp', 'user_id', 'timestamp'),)
+
+# ----------------- Recent Songs (capped, one row per song) -----------------
+class RecentSong(db.Model):
+    __tablename__ = 'recent_song'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    song_id = db.Column(db.Integer, db.ForeignKey('song.id'), nullable=False)
+    played_at = db.Column(db.DateTime, nullable=False)
+    play_count = db.Column(db.Integer, nullable=False, default=1)
+
+    # /recently-played reads the newest k rows of one user
+    __table_args__ = (
+        db.Index('uq_recent_song_user_id_song_id', 'user_id', 'song_id', unique=True),
+        db.Index('ix_recent_song_user_id_played_at', 'user_id', 'played_at'),
+    )
+
+# ----------------- User Stats (denormalized counters, see stats.py) -----------------
+class UserStats(db.Model):
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    liked_count = db.Column(db.Integer, nullable=False, default=0)
+    play_count = db.Column(db.Integer, nullable=False, default=0)
+    playlist_count = db.Column(db.Integer, nullable=False, default=0)
+    # bumped on every like/unlike so other workers can tell their favorites cache is stale
+    favorites_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # bumped with every write to the user's queue, playlists and play history; they
+    # version the ETags of /queue, /playlists/<id> and /recently-played (see conditional.py)
+    queue_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    playlists_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    history_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    user = db.relationship('User', backref=db.backref('stats', uselist=False))
+
+# ----------------- Daily Play Aggregates -----------------
+class PlayDaily(db.Model):
+    __tablename__ = 'play_daily'
+
+    day = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    song_id = db.Column(db.Integer, db.ForeignKey('song.id'), primary_key=True)
+    plays = db.Column(db.Integer, nullable=False, default=0)
+
 # ----------------- Playback Queue -----------------
 class QueueItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     song_id = db.Column(db.Integer, db.ForeignKey('song.id'))
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
-    position = db.Column(db.Integer, nullable=True)  # Order in queue
+    position = db.Column(db.Integer, nullable=True)  # Order in queue, sparse keys (see play_queue.py)
     song = db.relationship('Song')
+
+    # /queue and /queue/next: one user's queue in play order
+    __table_args__ = (db.Index('ix_queue_item_user_id_position', 'user_id', 'position'),)
     # ----------------- Playback Settings -----------------
 class PlaybackSettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
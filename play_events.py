@@ -0,0 +1,185 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from models import db
+from library import recently_played_songs, songs_by_id
+import history
+
+PLAY_BUFFER_SIZE = int(os.environ.get("PLAY_BUFFER_SIZE", 10000))
+PLAY_FLUSH_MS = int(os.environ.get("PLAY_FLUSH_MS", 250))
+PLAY_FLUSH_BATCH = int(os.environ.get("PLAY_FLUSH_BATCH", 500))
+PLAY_BUFFER_WAIT = 2.0    # seconds a request waits for room before writing inline
+INLINE_WRITE_ATTEMPTS = 3
+INLINE_RETRY_DELAY = 0.1  # seconds, doubled per attempt
+
+
+# ----------------- Write-behind buffer -----------------
+class PlayEventBuffer:
+    """Bounded in-process buffer of play events flushed by a background thread.
+
+    Requests append ``(user_id, song_id, played_at)`` and return; the
+    flusher writes them with one executemany INSERT every ``flush_ms`` or
+    once ``batch`` events are waiting, so SQLite sees one writer
+    transaction per batch instead of one per play. When the buffer is full,
+    :meth:`record` blocks until the flusher catches up (back-pressure) and
+    then writes its event inline, retrying a few times; if the database
+    stays down the event is dropped and counted rather than blocking the
+    request.
+    """
+
+    def __init__(self, max_size=PLAY_BUFFER_SIZE, flush_ms=PLAY_FLUSH_MS, batch=PLAY_FLUSH_BATCH,
+                 compact_every=history.PLAY_COMPACT_INTERVAL):
+        self.max_size = max_size
+        self.flush_interval = flush_ms / 1000
+        self.batch = min(batch, max_size)
+        self.compact_every = compact_every
+        self.engine = None
+        self._events = deque()
+        self._inflight = []          # taken by the flusher, not yet committed
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self.flushed = 0
+        self.inline_flushes = 0
+        self.dropped = 0
+
+    def init_app(self, app):
+        with app.app_context():
+            self.engine = db.engine
+
+    def _ensure_thread(self):
+        # started lazily so forked workers each get their own flusher
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="play-event-flusher", daemon=True)
+            self._thread.start()
+
+    def record(self, user_id, song_id, played_at=None):
+        event = (user_id, song_id, played_at or datetime.utcnow())
+        with self._cond:
+            if self._closed or self.engine is None:
+                self._write([event])
+                return
+            self._ensure_thread()
+            if len(self._events) >= self.max_size:
+                self._cond.notify_all()
+                self._cond.wait_for(lambda: len(self._events) < self.max_size, PLAY_BUFFER_WAIT)
+            if len(self._events) >= self.max_size:
+                self.inline_flushes += 1
+                full = True
+            else:
+                self._events.append(event)
+                full = False
+                if len(self._events) >= self.batch:
+                    self._cond.notify_all()
+        if full:
+            self._write_inline(event)
+
+    def _write_inline(self, event):
+        delay = INLINE_RETRY_DELAY
+        for attempt in range(INLINE_WRITE_ATTEMPTS):
+            try:
+                self._write([event])
+                return True
+            except Exception as e:
+                error = e
+            if attempt + 1 < INLINE_WRITE_ATTEMPTS:
+                time.sleep(delay)
+                delay *= 2
+        with self._cond:
+            self.dropped += 1
+        print(f"[ERROR] Dropping play event, buffer full and database unavailable: {error}")
+        return False
+
+    def pending(self, user_id):
+        """Unflushed ``(song_id, played_at)`` events of one user, newest first."""
+        with self._cond:
+            events = self._inflight + list(self._events)
+        return [(song_id, played_at) for uid, song_id, played_at in reversed(events) if uid == user_id]
+
+    def flush(self):
+        """Write everything buffered so far; False if the database write failed."""
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    if not self._events:
+                        return True
+                    n = min(len(self._events), max(self.batch, 1))
+                    self._inflight = [self._events.popleft() for _ in range(n)]
+                    self._cond.notify_all()
+                try:
+                    self._write(self._inflight)
+                    self.flushed += n
+                except Exception as e:
+                    print(f"[ERROR] Flushing {n} play events failed: {e}")
+                    with self._cond:
+                        self._events.extendleft(reversed(self._inflight))
+                        self._inflight = []
+                    return False
+                with self._cond:
+                    self._inflight = []
+
+    def _write(self, events):
+        with (self.engine or db.engine).begin() as conn:
+            history.record_batch(conn, events)
+
+    def _compact(self):
+        try:
+            history.compact(self.engine)
+        except Exception as e:
+            print(f"[ERROR] Compacting play history failed: {e}")
+
+    def _run(self):
+        next_compact = time.monotonic() + self.compact_every
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._events) >= self.batch,
+                                    self.flush_interval)
+                if self._closed:
+                    return
+            if not self.flush():
+                time.sleep(1)  # database unavailable; back off before retrying
+            if self.compact_every and time.monotonic() >= next_compact:
+                self._compact()
+                next_compact = time.monotonic() + self.compact_every
+
+    def close(self):
+        """Stop the flusher and write whatever is left."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+buffer = PlayEventBuffer()
+atexit.register(buffer.close)
+
+
+def init_app(app):
+    buffer.init_app(app)
+
+
+def record_play(user_id, song_id):
+    buffer.record(user_id, song_id)
+
+
+# ----------------- Read path -----------------
+def recent_plays(user_id, limit=25):
+    """Recent songs newest first, with unflushed plays moved to the front."""
+    pending = buffer.pending(user_id)
+    rows = recently_played_songs(user_id, limit=limit)
+    if not pending:
+        return rows
+
+    fresh_ids = list(dict.fromkeys(song_id for song_id, _ in pending))[:limit]
+    songs = songs_by_id(fresh_ids)
+    fresh = [songs[song_id] for song_id in fresh_ids if song_id in songs]
+    return (fresh + [row for row in rows if row.id not in songs])[:limit]
@@ -0,0 +1,183 @@
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, literal, select, update
+
+from models import db, QueueItem, Playlist, PlaylistSong
+import stats
+
+# Queue order lives in QueueItem.position as sparse integer keys GAP apart.
+# Inserting between two items takes the midpoint, so insert-next, move and
+# remove touch one row; only when two neighbours run out of room is the
+# user's queue renumbered (respace), which is rare and amortized.
+GAP = 1024
+MAX_POSITION = 2**31 - 1      # positions must fit a 32-bit INTEGER on Postgres
+INSERT_CHUNK = 5000           # rows per multi-VALUES insert (SQLite bind limit)
+
+
+def queue_song_ids(user_id):
+    """Song ids of the user's queue in play order (index-only scan)."""
+    return db.session.execute(
+        select(QueueItem.song_id)
+        .where(QueueItem.user_id == user_id, QueueItem.song_id.isnot(None))
+        .order_by(QueueItem.position.asc(), QueueItem.id.asc())
+    ).scalars().all()
+
+
+def _position_of(user_id, item_id):
+    return db.session.execute(
+        select(QueueItem.position).where(QueueItem.id == item_id, QueueItem.user_id == user_id)
+    ).scalar()
+
+
+def _slot(user_id, after_item_id=None, exclude_item_id=None):
+    """``(low, high)`` positions to insert between; ``high`` is None at the tail.
+
+    ``after_item_id=None`` means the front of the queue. Raises LookupError
+    if ``after_item_id`` is not one of the user's items.
+    """
+    if after_item_id is None:
+        low = 0
+    else:
+        low = _position_of(user_id, after_item_id)
+        if low is None:
+            raise LookupError(after_item_id)
+
+    following = select(func.min(QueueItem.position)).where(
+        QueueItem.user_id == user_id, QueueItem.position > low
+    )
+    if exclude_item_id is not None:
+        following = following.where(QueueItem.id != exclude_item_id)
+    return low, db.session.execute(following).scalar()
+
+
+def _tail(user_id):
+    return db.session.execute(
+        select(func.coalesce(func.max(QueueItem.position), 0)).where(QueueItem.user_id == user_id)
+    ).scalar()
+
+
+def _positions(user_id, count, after_item_id, at_end, exclude_item_id=None):
+    """``(first, step)`` for ``count`` new/moved items, respacing once if needed."""
+    for attempt in range(2):
+        if at_end:
+            low, high = _tail(user_id), None
+        else:
+            low, high = _slot(user_id, after_item_id, exclude_item_id)
+
+        if high is None:
+            step = GAP
+            fits = low + step * count <= MAX_POSITION
+        else:
+            step = (high - low) // (count + 1)
+            fits = step >= 1
+        if fits:
+            return low + step, step
+        if attempt == 0:
+            respace(user_id)
+    raise OverflowError("queue is too long to renumber into integer positions")
+
+
+def respace(user_id):
+    """Renumber the user's queue to GAP, 2*GAP, ... keeping its order."""
+    item_ids = db.session.execute(
+        select(QueueItem.id)
+        .where(QueueItem.user_id == user_id)
+        .order_by(QueueItem.position.asc(), QueueItem.id.asc())
+    ).scalars().all()
+    if item_ids:
+        db.session.execute(
+            update(QueueItem),
+            [{"id": item_id, "position": GAP * (i + 1)} for i, item_id in enumerate(item_ids)],
+        )
+
+
+# ----------------- Mutations (caller commits) -----------------
+def _changed(user_id):
+    # same transaction as the write, so the queue's ETag can't go stale (see conditional.py)
+    stats.touch(db.session.connection(), user_id, "queue_version")
+
+
+def enqueue(user_id, song_ids, after_item_id=None, at_end=True):
+    """Add ``song_ids`` in order, at the tail or right after ``after_item_id``.
+
+    Returns how many items were added.
+    """
+    song_ids = list(song_ids)
+    if not song_ids:
+        return 0
+    first, step = _positions(user_id, len(song_ids), after_item_id, at_end)
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "song_id": song_id, "position": first + step * i, "added_at": now}
+        for i, song_id in enumerate(song_ids)
+    ]
+    for start in range(0, len(rows), INSERT_CHUNK):
+        db.session.execute(insert(QueueItem).values(rows[start:start + INSERT_CHUNK]))
+    _changed(user_id)
+    return len(rows)
+
+
+def enqueue_playlist(user_id, playlist_id, after_item_id=None, at_end=True):
+    """Queue a whole playlist of the user's with a single INSERT ... SELECT (0 if it isn't theirs)."""
+    owned = (PlaylistSong.playlist_id == playlist_id) & PlaylistSong.playlist_id.in_(
+        select(Playlist.id).where(Playlist.id == playlist_id, Playlist.user_id == user_id)
+    )
+    count = db.session.execute(select(func.count()).select_from(PlaylistSong).where(owned)).scalar()
+    if not count:
+        return 0
+    first, step = _positions(user_id, count, after_item_id, at_end)
+    rank = func.row_number().over(order_by=PlaylistSong.song_id) - 1
+
+    db.session.execute(
+        insert(QueueItem).from_select(
+            ["user_id", "song_id", "position", "added_at"],
+            select(
+                literal(user_id),
+                PlaylistSong.song_id,
+                literal(first) + rank * literal(step),
+                literal(datetime.utcnow(), QueueItem.added_at.type),
+            ).where(owned),
+        )
+    )
+    _changed(user_id)
+    return count
+
+
+def move(user_id, item_id, after_item_id=None):
+    """Move one item to just after ``after_item_id`` (None: to the front).
+
+    A single-row UPDATE unless the target gap is exhausted. Returns False if
+    ``item_id`` is not in the user's queue.
+    """
+    if item_id == after_item_id:
+        return True
+    if _position_of(user_id, item_id) is None:
+        return False
+    position, _ = _positions(user_id, 1, after_item_id, at_end=False, exclude_item_id=item_id)
+    db.session.execute(
+        update(QueueItem)
+        .where(QueueItem.id == item_id, QueueItem.user_id == user_id)
+        .values(position=position)
+    )
+    _changed(user_id)
+    return True
+
+
+def remove(user_id, item_id):
+    """Delete one queue entry by its item id; False if it isn't the user's."""
+    result = db.session.execute(
+        delete(QueueItem).where(QueueItem.id == item_id, QueueItem.user_id == user_id)
+    )
+    if result.rowcount:
+        _changed(user_id)
+    return result.rowcount > 0
+
+
+def first_item_id(user_id, song_id):
+    """Id of the earliest queue entry for ``song_id``, or None."""
+    return db.session.execute(
+        select(QueueItem.id)
+        .where(QueueItem.user_id == user_id, QueueItem.song_id == song_id)
+        .order_by(QueueItem.position.asc(), QueueItem.id.asc())
+        .limit(1)
+    ).scalar()
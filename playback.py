@@ -0,0 +1,290 @@
+import os
+import random
+import sqlite3
+import struct
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from models import db, PlaybackSettings
+from play_queue import queue_song_ids
+from library import next_catalog_song_id, previous_catalog_song_id, random_catalog_song_id
+
+PLAYBACK_TTL = int(os.environ.get("PLAYBACK_TTL", 12 * 60 * 60))
+REPEAT_MODES = ("off", "one", "all")
+
+_HEADER = struct.Struct("<B?iiII")  # flags, shuffle, cursor, catalog song, len(song_ids), len(order)
+_REPEAT_CODES = {mode: code for code, mode in enumerate(REPEAT_MODES)}
+
+
+# ----------------- Playback state -----------------
+class PlaybackState:
+    """What a user is playing: song ids, a cursor, and shuffle/repeat.
+
+    Song ids live in an ``array('i')`` and shuffle is a precomputed
+    permutation of positions, so next/previous/current are O(1). With an
+    empty queue the user plays the whole catalog and only the current song
+    id is kept (see library.next_catalog_song_id).
+    """
+
+    __slots__ = ("song_ids", "order", "cursor", "shuffle", "repeat", "catalog_song_id")
+
+    def __init__(self, song_ids=(), cursor=0, shuffle=False, repeat="off", catalog_song_id=None):
+        self.song_ids = array("i", song_ids)
+        self.order = None
+        self.cursor = cursor
+        self.shuffle = False
+        self.repeat = repeat if repeat in REPEAT_MODES else "off"
+        self.catalog_song_id = catalog_song_id
+        if shuffle:
+            self.set_shuffle(True)
+
+    @classmethod
+    def for_catalog(cls, shuffle=False, repeat="off"):
+        return cls(shuffle=shuffle, repeat=repeat, catalog_song_id=0)
+
+    @property
+    def is_catalog(self):
+        return self.catalog_song_id is not None
+
+    def _position(self):
+        return self.order[self.cursor] if self.order is not None else self.cursor
+
+    def current(self):
+        """Song id under the cursor, or None."""
+        if self.is_catalog:
+            return self.catalog_song_id or None
+        if not self.song_ids:
+            return None
+        return self.song_ids[self._position()]
+
+    def step(self, delta):
+        """Move the cursor by ``delta`` (wrapping) and return the new song id.
+
+        Repeat 'one' stays on the current song; 'off' and 'all' wrap at
+        either end of the queue.
+        """
+        if not self.song_ids:
+            return None
+        if self.repeat != "one":
+            self.cursor = (self.cursor + delta) % len(self.song_ids)
+        return self.current()
+
+    def play(self, song_id):
+        """Jump to ``song_id``, appending it to the queue if it isn't in it."""
+        self.catalog_song_id = None
+        try:
+            position = self.song_ids.index(song_id)
+        except ValueError:
+            position = len(self.song_ids)
+            self.song_ids.append(song_id)
+            if self.order is not None:
+                self.order.append(position)
+        self.cursor = self.order.index(position) if self.order is not None else position
+
+    def set_shuffle(self, on):
+        """Turn shuffle on (new permutation, current song first) or off, keeping the current song."""
+        position = self._position() if self.song_ids else 0
+        if on and self.song_ids:
+            positions = list(range(len(self.song_ids)))
+            positions.remove(position)
+            random.shuffle(positions)
+            self.order = array("i", [position] + positions)
+            self.cursor = 0
+        else:
+            self.order = None
+            self.cursor = position
+        self.shuffle = bool(on)
+
+    def copy(self):
+        state = PlaybackState.__new__(PlaybackState)
+        state.song_ids = array("i", self.song_ids)
+        state.order = array("i", self.order) if self.order is not None else None
+        state.cursor = self.cursor
+        state.shuffle = self.shuffle
+        state.repeat = self.repeat
+        state.catalog_song_id = self.catalog_song_id
+        return state
+
+    # ---------- compact encoding for out-of-process stores ----------
+    def to_bytes(self):
+        order = self.order if self.order is not None else array("i")
+        header = _HEADER.pack(
+            _REPEAT_CODES[self.repeat] | (0x80 if self.is_catalog else 0),
+            self.shuffle, self.cursor, self.catalog_song_id or 0,
+            len(self.song_ids), len(order),
+        )
+        return header + self.song_ids.tobytes() + order.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        flags, shuffle, cursor, catalog_song_id, n_songs, n_order = _HEADER.unpack_from(data)
+        state = cls(cursor=cursor, repeat=REPEAT_MODES[flags & 0x7F],
+                    catalog_song_id=catalog_song_id if flags & 0x80 else None)
+        offset = _HEADER.size
+        state.song_ids.frombytes(data[offset:offset + 4 * n_songs])
+        if shuffle:
+            state.order = array("i")
+            state.order.frombytes(data[offset + 4 * n_songs:offset + 4 * (n_songs + n_order)])
+        state.shuffle = shuffle
+        return state
+
+
+# ----------------- Stores -----------------
+class MemoryStore:
+    """Per-process state keyed by user id, expiring after ``ttl`` idle seconds.
+
+    Like the sqlite store, ``get`` hands out a copy: concurrent requests for
+    one user each step their own state, and the last ``put`` wins.
+    """
+
+    def __init__(self, ttl=PLAYBACK_TTL):
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None or entry[1] <= now:
+                self._data.pop(user_id, None)
+                return None
+            return entry[0].copy()
+
+    def put(self, user_id, state):
+        now = time.time()
+        with self._lock:
+            self._data[user_id] = (state, now + self.ttl)
+            self._data.move_to_end(user_id)
+            # entries are in last-touched order, so expired ones sit at the front
+            while self._data:
+                oldest = next(iter(self._data.values()))
+                if oldest[1] > now:
+                    break
+                self._data.popitem(last=False)
+
+    def delete(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+
+class SQLiteStore:
+    """State shared by every worker process pointing at the same file."""
+
+    def __init__(self, path, ttl=PLAYBACK_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS playback_state ("
+            " user_id INTEGER PRIMARY KEY, state BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id):
+        row = self._conn().execute(
+            "SELECT state FROM playback_state WHERE user_id = ? AND expires_at > ?", (user_id, time.time())
+        ).fetchone()
+        return PlaybackState.from_bytes(row[0]) if row else None
+
+    def put(self, user_id, state):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO playback_state (user_id, state, expires_at) VALUES (?, ?, ?)",
+            (user_id, state.to_bytes(), time.time() + self.ttl),
+        )
+
+    def delete(self, user_id):
+        self._conn().execute("DELETE FROM playback_state WHERE user_id = ?", (user_id,))
+
+
+def store_from_env():
+    """Build the store selected by ``PLAYBACK_STORE`` (memory or sqlite)."""
+    if os.environ.get("PLAYBACK_STORE", "memory").lower() == "sqlite":
+        path = os.environ.get("PLAYBACK_STORE_PATH", os.path.join("instance", "playback_state.db"))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return SQLiteStore(path)
+    return MemoryStore()
+
+
+store = store_from_env()
+
+
+# ----------------- Helpers for views -----------------
+def normalize_repeat(value):
+    """Accept the old boolean flag as well as 'off'/'one'/'all'."""
+    if value is True:
+        return "all"
+    if value in REPEAT_MODES:
+        return value
+    return "off"
+
+
+def user_settings(user_id):
+    """The user's PlaybackSettings row, created on first use."""
+    settings = PlaybackSettings.query.filter_by(user_id=user_id).first()
+    if settings is None:
+        settings = PlaybackSettings(user_id=user_id, shuffle=False, repeat_mode="off")
+        db.session.add(settings)
+    return settings
+
+
+def new_state(user_id, song_ids=()):
+    """Fresh state with the user's saved shuffle/repeat settings."""
+    settings = PlaybackSettings.query.filter_by(user_id=user_id).first()
+    shuffle = bool(settings and settings.shuffle)
+    repeat = settings.repeat_mode if settings else "off"
+    if song_ids:
+        return PlaybackState(song_ids, shuffle=shuffle, repeat=repeat)
+    return PlaybackState.for_catalog(shuffle=shuffle, repeat=repeat)
+
+
+def load_state(user_id, create=False):
+    """The user's stored state; with ``create``, start one from their queue (or the catalog)."""
+    state = store.get(user_id)
+    if state is not None or not create:
+        return state
+    return new_state(user_id, queue_song_ids(user_id))
+
+
+def save_state(user_id, state):
+    store.put(user_id, state)
+
+
+def queue_changed(user_id):
+    """Re-read an edited queue into the user's state, staying on the current song."""
+    state = store.get(user_id)
+    if state is None:
+        return
+    current = state.current()
+    fresh = new_state(user_id, queue_song_ids(user_id))
+    if current is not None and current in fresh.song_ids:
+        fresh.play(current)
+    store.put(user_id, fresh)
+
+
+def advance(state, delta):
+    """Step ``state`` forward (1) or back (-1) and return the song id to play."""
+    if not state.is_catalog:
+        return state.step(delta)
+
+    if state.repeat == "one" and state.catalog_song_id:
+        return state.catalog_song_id
+    if state.shuffle:
+        song_id = random_catalog_song_id()
+    elif delta > 0:
+        song_id = next_catalog_song_id(state.catalog_song_id)
+    else:
+        song_id = previous_catalog_song_id(state.catalog_song_id)
+    if song_id is not None:
+        state.catalog_song_id = song_id
+    return song_id
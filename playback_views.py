@@ -0,0 +1,263 @@
+# The play queue, next/previous/current song, shuffle/repeat and /play.
+from flask import Blueprint, request, render_template, session, redirect, url_for, jsonify
+from sqlalchemy import select
+
+from extensions import db
+from models import Song, Playlist
+from library import queue_songs
+from saavn import UpstreamError
+import audio_cache
+import conditional
+import favorites
+import playback
+import play_events
+import play_queue
+
+playback_bp = Blueprint('playback', __name__)
+
+
+#..........queue next 
+@playback_bp.route('/queue/next', methods=['GET'])
+def get_next_song():
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'message': 'User not logged in'}), 403
+    session.pop('playback_context', None)  # now kept server-side
+
+    # Queue (or the whole catalog when the queue is empty), kept per user server-side
+    state = playback.load_state(user_id, create=True)
+    next_song_id = playback.advance(state, 1)
+    if next_song_id is None:
+        return jsonify({'message': 'No songs available'}), 404
+    playback.save_state(user_id, state)
+    play_events.record_play(user_id, next_song_id)
+
+    next_song = Song.query.get_or_404(next_song_id)
+
+    return jsonify({
+        'id': next_song.id,
+        'name': next_song.name,
+        'artist': next_song.artist_obj.name if next_song.artist_obj else "Unknown Artist",
+        'album': getattr(next_song, 'album', ''),
+        'lyrics': getattr(next_song, 'lyrics', 'Lyrics not available'),
+        'image_url': getattr(next_song, 'image_url', '/static/default_album.png'),
+        'youtube_url': next_song.youtube_url,
+        'stream_url': audio_cache.stream_url(next_song.id, next_song.youtube_url)
+    })
+
+
+
+
+
+# queue previous song
+@playback_bp.route('/queue/previous', methods=['GET'])
+def get_previous_song():
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'message': 'User not logged in'}), 403
+    session.pop('playback_context', None)
+
+    state = playback.load_state(user_id, create=True)
+    prev_song_id = playback.advance(state, -1)
+    if prev_song_id is None:
+        return jsonify({'message': 'Queue is empty'}), 404
+    playback.save_state(user_id, state)
+    play_events.record_play(user_id, prev_song_id)
+
+    prev_song = Song.query.get_or_404(prev_song_id)
+
+    return jsonify({
+        'id': prev_song.id,
+        'title': prev_song.name,
+        'artist': prev_song.artist_obj.name if prev_song.artist_obj else "Unknown Artist",
+        'url': prev_song.youtube_url,
+        'stream_url': audio_cache.stream_url(prev_song.id, prev_song.youtube_url)
+    })
+
+
+
+
+# current song
+@playback_bp.route('/queue/current', methods=['GET'])
+def current_song():
+    user_id = session.get('user_id')
+    state = playback.load_state(user_id) if user_id else None
+    song = Song.query.get(state.current()) if state and state.current() else None
+    if not song:
+        return jsonify({'message': 'No playback context'}), 404
+
+    return jsonify({
+        'id': song.id,
+        'title': song.name,
+        'artist': song.artist_obj.name if song.artist_obj else "Unknown Artist",
+        'url': song.youtube_url,
+        'stream_url': audio_cache.stream_url(song.id, song.youtube_url)
+    })
+# Toggle Shuffle & Repeat
+@playback_bp.route('/playback/settings', methods=['POST'])
+def update_playback_settings():
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'message': 'User not logged in'}), 403
+
+    data = request.get_json() or {}
+    settings = playback.user_settings(user_id)
+    if 'shuffle' in data:
+        settings.shuffle = bool(data['shuffle'])
+    if 'repeat' in data:
+        settings.repeat_mode = playback.normalize_repeat(data['repeat'])
+    db.session.commit()
+
+    state = playback.load_state(user_id)
+    if state:
+        if state.shuffle != settings.shuffle:
+            state.set_shuffle(settings.shuffle)
+        state.repeat = settings.repeat_mode
+        playback.save_state(user_id, state)
+
+    return jsonify({'message': 'Playback settings updated', 'shuffle': settings.shuffle, 'repeat': settings.repeat_mode})
+
+@playback_bp.route('/queue', methods=['POST'])
+def add_to_queue():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    user_id = session['user_id']
+
+    # {"song_id": 1} | {"song_ids": [1, 2, ...]} | {"playlist_id": 3}
+    # placed at the end, after queue item "after", or right after the current song with "next"
+    data = request.get_json() or {}
+    after = data.get('after')
+    at_end = after is None and not data.get('next')
+    if data.get('next'):
+        state = playback.load_state(user_id)
+        current = state.current() if state and not state.is_catalog else None
+        after = play_queue.first_item_id(user_id, current) if current else None
+
+    try:
+        if data.get('playlist_id'):
+            Playlist.query.filter_by(id=data['playlist_id'], user_id=user_id).first_or_404()
+            added = play_queue.enqueue_playlist(user_id, data['playlist_id'], after, at_end)
+        elif data.get('song_ids') or data.get('song_id'):
+            song_ids = data.get('song_ids') or [data['song_id']]
+            added = play_queue.enqueue(user_id, song_ids, after, at_end)
+        else:
+            return jsonify({'error': 'song_id, song_ids or playlist_id is required'}), 400
+    except LookupError:
+        return jsonify({'error': 'Queue item not found'}), 404
+    except OverflowError:
+        return jsonify({'error': 'Queue is full'}), 409
+
+    db.session.commit()
+    playback.queue_changed(user_id)
+    return jsonify({'message': 'Song added to queue', 'added': added}), 201
+
+@playback_bp.route('/queue', methods=['GET'])
+@conditional.etag(conditional.queue_version)
+def get_queue():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    songs = []
+    for song in queue_songs(session['user_id']):
+        songs.append({
+            'item_id': song.item_id,
+            'position': song.position,
+            'id': song.id,
+            'name': song.name,
+            'artist': song.artist,
+            'youtube_url': song.youtube_url,
+            'stream_url': audio_cache.stream_url(song.id, song.youtube_url),
+            'image_url': song.image_url
+        })
+    return jsonify({'queue': songs})
+
+@playback_bp.route('/queue/items/<int:item_id>', methods=['PATCH'])
+def move_queue_item(item_id):
+    """Drag and drop: {"after": <item_id>} or {"after": null} for the front."""
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    data = request.get_json() or {}
+    try:
+        moved = play_queue.move(session['user_id'], item_id, data.get('after'))
+    except LookupError:
+        moved = False
+    except OverflowError:
+        return jsonify({'error': 'Queue is full'}), 409
+    if not moved:
+        return jsonify({'error': 'Queue item not found'}), 404
+
+    db.session.commit()
+    playback.queue_changed(session['user_id'])
+    return jsonify({'message': 'Queue item moved'})
+
+@playback_bp.route('/queue/items/<int:item_id>', methods=['DELETE'])
+def remove_queue_item(item_id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    if not play_queue.remove(session['user_id'], item_id):
+        return jsonify({'error': 'Queue item not found'}), 404
+    db.session.commit()
+    playback.queue_changed(session['user_id'])
+    return jsonify({'message': 'Song removed from queue'})
+
+@playback_bp.route('/queue/<int:song_id>', methods=['DELETE'])
+def remove_from_queue(song_id):
+    """Removes the earliest entry for the song; use /queue/items/<id> for a specific one."""
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    item_id = play_queue.first_item_id(session['user_id'], song_id)
+    if not item_id:
+        return jsonify({'error': 'Song not found in queue'}), 404
+    return remove_queue_item(item_id)
+
+@playback_bp.route('/play/<int:song_id>')
+def play_song(song_id):
+    song = Song.query.get_or_404(song_id)
+
+    # Jump to this song in the user's server-side playback state
+    if 'user_id' in session:
+        session.pop('playback_context', None)
+        state = playback.load_state(session['user_id']) or playback.new_state(session['user_id'])
+        state.play(song.id)
+        playback.save_state(session['user_id'], state)
+        play_events.record_play(session['user_id'], song.id)
+
+    # ----- FAVORITE LOGIC -----
+    song_favorite = False
+    if 'user_id' in session:
+        song_favorite = favorites.is_favorite(session['user_id'], song.id)
+
+    return render_template('player.html',
+                           title=song.name,
+                           artist=song.artist_obj.name if song.artist_obj else "Unknown Artist",
+                           album=song.album,
+                           lyrics=song.lyrics,
+                           image=song.image_url,
+                           audio_url=song.youtube_url,
+                           stream_url=audio_cache.stream_url(song.id, song.youtube_url),
+                           song_id=song.id,
+                           song_favorite=song_favorite)  # <-- Pass to template
+
+
+# ----------------- Audio stream (Range-capable caching proxy, see audio_cache.py) -----------------
+@playback_bp.app_template_global('stream_url')
+def stream_url(song_id, audio_url):
+    return audio_cache.stream_url(song_id, audio_url)
+
+
+@playback_bp.route('/stream/<int:song_id>')
+def stream_song(song_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Login required'}), 401
+
+    url = db.session.scalar(select(Song.youtube_url).where(Song.id == song_id))
+    if not url:
+        return jsonify({'error': 'Song not found'}), 404
+    try:
+        return audio_cache.serve(url)
+    except UpstreamError as e:
+        print(f"[ERROR] Stream failed: {e}")
+        return jsonify({'error': 'Audio unavailable'}), 502
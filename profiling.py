@@ -0,0 +1,277 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import Response, g, request, before_render_template, template_rendered
+from sqlalchemy import event
+
+from models import db
+from saavn import saavn
+import templating
+
+# Per-request profiling: SQL statements, saavn.dev calls and template
+# rendering (with fragment cache hits, see templating.py), reported as a Server-Timing header, one JSON log line per
+# request and Prometheus metrics on /metrics. Off unless PROFILING=1; when
+# off, init_app() registers nothing, so requests pay for none of it.
+
+PROFILING = os.environ.get("PROFILING", "0").lower() in ("1", "true", "yes", "on")
+PROFILING_LOG = os.environ.get("PROFILING_LOG", "1").lower() in ("1", "true", "yes", "on")
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger("profiling")
+
+
+# ----------------- Per-request counters -----------------
+class RequestProfile:
+    """Counters for one request. Shared with saavn pool threads, hence the lock."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.upstream_count = 0
+        self.upstream_time = 0.0
+        self.upstream_errors = 0
+        self.cache = Counter()
+        self.template_time = 0.0
+        self.fragments = Counter()
+        self.status = 500
+        self._lock = threading.Lock()
+
+    def add_sql(self, seconds):
+        with self._lock:
+            self.sql_count += 1
+            self.sql_time += seconds
+
+    def add_upstream(self, seconds, cache_status, ok):
+        with self._lock:
+            self.upstream_count += 1
+            self.upstream_time += seconds
+            self.cache[cache_status] += 1
+            if not ok:
+                self.upstream_errors += 1
+
+    def add_template(self, seconds):
+        with self._lock:
+            self.template_time += seconds
+
+    def add_fragment(self, hit):
+        with self._lock:
+            self.fragments["hit" if hit else "miss"] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self):
+        hits = self.cache["hit"]
+        return ", ".join((
+            f'sql;dur={self.sql_time * 1000:.1f};desc="{self.sql_count} queries"',
+            f'upstream;dur={self.upstream_time * 1000:.1f};desc="{self.upstream_count} calls, {hits} cached"',
+            f'tpl;dur={self.template_time * 1000:.1f};desc="{self.fragments["hit"]} fragments cached, {self.fragments["miss"]} rendered"',
+            f"total;dur={self.elapsed() * 1000:.1f}",
+        ))
+
+
+_current = contextvars.ContextVar("request_profile", default=None)
+
+
+def current():
+    """The profile of the request being served, or None."""
+    return _current.get()
+
+
+# ----------------- Prometheus metrics (per process) -----------------
+class Histogram:
+    """Cumulative bucket counts, as Prometheus exposes them."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+_HISTOGRAMS = {
+    "spoti_request_duration_seconds": "Wall time to serve a request, including streaming.",
+    "spoti_request_sql_seconds": "Time spent in SQL statements per request.",
+    "spoti_request_upstream_seconds": "Time spent in saavn.dev calls per request (summed over parallel calls).",
+    "spoti_request_template_seconds": "Time spent rendering templates per request.",
+}
+_COUNTERS = {
+    "spoti_sql_statements_total": "SQL statements executed, by endpoint.",
+    "spoti_upstream_calls_total": "saavn.dev calls, by endpoint and response-cache status.",
+}
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = defaultdict(Histogram)   # (name, endpoint) -> Histogram
+        self.counters = Counter()                  # (name, labels) -> value
+
+    def record(self, endpoint, profile):
+        with self._lock:
+            for name, value in (
+                ("spoti_request_duration_seconds", profile.elapsed()),
+                ("spoti_request_sql_seconds", profile.sql_time),
+                ("spoti_request_upstream_seconds", profile.upstream_time),
+                ("spoti_request_template_seconds", profile.template_time),
+            ):
+                self.histograms[(name, endpoint)].observe(value)
+            self.counters[("spoti_sql_statements_total", (("endpoint", endpoint),))] += profile.sql_count
+            for status, n in profile.cache.items():
+                labels = (("endpoint", endpoint), ("cache", status))
+                self.counters[("spoti_upstream_calls_total", labels)] += n
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            for name, help_text in _HISTOGRAMS.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (metric, endpoint), hist in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    label = f'endpoint="{_escape(endpoint)}"'
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        lines.append(f'{name}_bucket{{{label},le="{bound}"}} {n}')
+                    lines.append(f'{name}_bucket{{{label},le="+Inf"}} {hist.count}')
+                    lines.append(f"{name}_sum{{{label}}} {hist.sum:.6f}")
+                    lines.append(f"{name}_count{{{label}}} {hist.count}")
+            for name, help_text in _COUNTERS.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (metric, labels), value in sorted(self.counters.items()):
+                    if metric == name:
+                        label = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+                        lines.append(f"{name}{{{label}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+
+
+# ----------------- Hooks -----------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profiling_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    starts = conn.info.get("profiling_start")
+    if profile is not None and starts:
+        profile.add_sql(time.perf_counter() - starts.pop())
+
+
+def _handle_error(context):
+    starts = context.connection.info.get("profiling_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def _observe_upstream(path, seconds, cache_status, ok):
+    profile = _current.get()
+    if profile is not None:
+        profile.add_upstream(seconds, cache_status, ok)
+
+
+def _observe_fragment(hit):
+    profile = _current.get()
+    if profile is not None:
+        profile.add_fragment(hit)
+
+
+def _before_render(sender, template, context, **extra):
+    if _current.get() is not None:
+        g.setdefault("_profiling_renders", []).append(time.perf_counter())
+
+
+def _rendered(sender, template, context, **extra):
+    profile = _current.get()
+    starts = g.get("_profiling_renders")
+    if profile is not None and starts:
+        profile.add_template(time.perf_counter() - starts.pop())
+
+
+def _start_profile():
+    _current.set(RequestProfile())
+
+
+def _add_header(response):
+    profile = _current.get()
+    if profile is not None:
+        profile.status = response.status_code
+        # streamed templates finish after this; the log line and /metrics include them
+        response.headers["Server-Timing"] = profile.server_timing()
+    return response
+
+
+def _finish_profile(exc):
+    # teardown runs after a streamed body has been generated (stream_with_context)
+    profile = _current.get()
+    if profile is None:
+        return
+    _current.set(None)
+    endpoint = request.endpoint or "unmatched"
+    metrics.record(endpoint, profile)
+    if PROFILING_LOG:
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "endpoint": endpoint,
+            "status": profile.status,
+            "ms": round(profile.elapsed() * 1000, 2),
+            "sql": {"count": profile.sql_count, "ms": round(profile.sql_time * 1000, 2)},
+            "upstream": {"count": profile.upstream_count, "ms": round(profile.upstream_time * 1000, 2),
+                         "errors": profile.upstream_errors, "cache": dict(profile.cache)},
+            "template_ms": round(profile.template_time * 1000, 2),
+            "fragments": dict(profile.fragments),
+        }, sort_keys=True))
+
+
+def metrics_view():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app, enabled=None):
+    """Install the profiling hooks on ``app`` if PROFILING is on (or ``enabled``)."""
+    if not (PROFILING if enabled is None else enabled):
+        return False
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(engine, "handle_error", _handle_error)
+    saavn.observer = _observe_upstream
+    templating.fragments.observer = _observe_fragment
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+
+    app.before_request(_start_profile)
+    app.after_request(_add_header)
+    app.teardown_request(_finish_profile)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return True
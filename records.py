@@ -0,0 +1,161 @@
+# records.py
+# Saavn song payload -> SongRecord. This is the one place that knows the
+# payload's quirks (image/downloadUrl lists keyed "url" or "link",
+# primary_artists as a string or a list, the v4 "artists" object), so the
+# search, artist and album views all pick the same audio and image.
+#
+# Records are memoized by Saavn song id: the same hit songs come back on
+# every search and artist page, and a cached upstream response would
+# otherwise be re-parsed per request. ingest_search_results() persists the
+# resolved fields onto Song, so stored songs are never parsed again.
+# Artist topSongs and album songs carry no artist fields; a record parsed
+# from one is replaced the next time a payload with artists comes along,
+# so it never reaches ingestion as "Unknown Artist".
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+LYRICS_PLACEHOLDER = "Lyrics not available"
+UNKNOWN_ARTIST = "Unknown Artist"
+_ARTIST_FIELDS = ("primary_artists", "primaryArtists", "artists")
+RECORD_MEMO_SIZE = int(os.environ.get("RECORD_MEMO_SIZE", 8192))
+
+
+class SongRecord(NamedTuple):
+    saavn_id: Optional[str]
+    title: str
+    artist: str                # display name, "A, B" for several
+    artist_ids: str            # Saavn artist ids, comma separated
+    album: str
+    album_id: Optional[str]
+    audio_url: str             # best quality download
+    image_url: str             # largest cover
+    duration: Optional[int]    # seconds
+    lyrics: str
+    page_url: Optional[str]    # jiosaavn.com song page
+
+
+# ----------------- Field pickers -----------------
+def _link(item):
+    if isinstance(item, dict):
+        return item.get("url") or item.get("link") or ""
+    return item if isinstance(item, str) else ""
+
+
+def pick_image(images, largest=True):
+    """URL of the largest (or smallest) entry of a Saavn ``image`` field."""
+    if isinstance(images, list):
+        for item in (reversed(images) if largest else images):
+            link = _link(item)
+            if link:
+                return link
+        return ""
+    return images if isinstance(images, str) else ""
+
+
+def pick_audio(downloads):
+    """URL of the best-quality entry of a Saavn ``downloadUrl`` field."""
+    if isinstance(downloads, list):
+        for item in reversed(downloads):
+            link = _link(item)
+            if link:
+                return link
+        return ""
+    if isinstance(downloads, dict):
+        return downloads.get("320") or downloads.get("128", "")
+    return downloads if isinstance(downloads, str) else ""
+
+
+def _artists(payload):
+    """(display name, comma-separated ids) from whichever artist fields are present."""
+    get = payload.get
+    names = get("primary_artists") or get("primaryArtists")
+    if isinstance(names, str):
+        return names, _artist_ids(get("primary_artists_id") or get("primaryArtistsId"))
+
+    artists = get("artists")
+    primary = artists.get("primary") if isinstance(artists, dict) else None
+    if primary:
+        names = [a["name"] for a in primary if a.get("name")]
+        ids = [str(a["id"]) for a in primary if a.get("id")]
+        return ", ".join(names) or UNKNOWN_ARTIST, ",".join(ids)
+
+    if isinstance(names, list):
+        name = ", ".join(n if isinstance(n, str) else n.get("name", "") for n in names)
+        return name or UNKNOWN_ARTIST, _artist_ids(get("primary_artists_id") or get("primaryArtistsId"))
+    return UNKNOWN_ARTIST, ""
+
+
+def _artist_ids(ids):
+    if isinstance(ids, str):
+        return ids.replace(" ", "")
+    return ",".join(map(str, ids)) if isinstance(ids, list) else ""
+
+
+_new_record = tuple.__new__  # skips NamedTuple's keyword handling, ~3x cheaper per record
+
+
+def parse_song(payload):
+    """Build a SongRecord from one Saavn song object (search result, topSongs or album song)."""
+    get = payload.get
+    artist, artist_ids = _artists(payload)
+    album = get("album")
+    if isinstance(album, dict):
+        album_name, album_id = album.get("name"), album.get("id")
+    else:
+        album_name, album_id = album, get("albumid")
+    duration = get("duration")
+    if not isinstance(duration, int):
+        try:
+            duration = int(duration)
+        except (TypeError, ValueError):
+            duration = None
+    # field order of SongRecord
+    return _new_record(SongRecord, (
+        get("id"),
+        get("name") or "Unknown Title",
+        artist,
+        artist_ids,
+        album_name or "Unknown Album",
+        album_id,
+        pick_audio(get("downloadUrl")),
+        pick_image(get("image")),
+        duration,
+        get("lyrics") or LYRICS_PLACEHOLDER,
+        get("url"),
+    ))
+
+
+# ----------------- Memo -----------------
+# Insertion-ordered, evicted oldest-first under the lock; hits are a plain
+# dict lookup with no lock or reordering, since they are the common case.
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def song_record(payload):
+    """Memoized :func:`parse_song`, keyed by Saavn song id (payloads without one are parsed every time).
+
+    A memoized record without an artist is re-parsed when ``payload`` has one.
+    """
+    saavn_id = payload.get("id")
+    record = _memo.get(saavn_id)
+    if record is not None and (record.artist != UNKNOWN_ARTIST or not _has_artists(payload)):
+        return record
+    record = parse_song(payload)
+    if saavn_id is not None:
+        with _memo_lock:
+            _memo[saavn_id] = record
+            if len(_memo) > RECORD_MEMO_SIZE:
+                _memo.popitem(last=False)
+    return record
+
+
+def _has_artists(payload):
+    return any(payload.get(field) for field in _ARTIST_FIELDS)
+
+
+def clear_memo():
+    with _memo_lock:
+        _memo.clear()
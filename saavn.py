@@ -0,0 +1,219 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from cache import cache_from_env
+
+SAAVN_BASE_URL = os.environ.get("SAAVN_BASE_URL", "https://saavn.dev/api")
+POOL_SIZE = int(os.environ.get("SAAVN_POOL_SIZE", 20))
+MAX_PER_HOST = int(os.environ.get("SAAVN_MAX_PER_HOST", 10))
+# one event loop multiplexes many requests, so the async path allows far more in flight
+ASYNC_MAX_PER_HOST = int(os.environ.get("SAAVN_ASYNC_MAX_PER_HOST", 512))
+DEFAULT_TIMEOUT = 10
+
+
+class UpstreamError(Exception):
+    """A saavn.dev call failed (connection, timeout, HTTP status or bad JSON)."""
+
+
+# ----------------- Shared upstream client -----------------
+class SaavnClient:
+    """One pooled, keep-alive client for every saavn.dev call.
+
+    The sync path shares a ``requests.Session`` and a bounded thread pool for
+    fan-out; the async path shares one ``aiohttp.ClientSession`` per event
+    loop. Both cap in-flight requests per upstream host. When a
+    ``ResponseCache`` is given, cacheable endpoints are served from it.
+
+    ``observer``, if set, is called as ``observer(path, seconds, cache_status,
+    ok)`` after every call (see profiling.py); cache_status is "hit", "miss"
+    or "off".
+    """
+
+    def __init__(self, base_url=SAAVN_BASE_URL, pool_size=POOL_SIZE,
+                 max_per_host=MAX_PER_HOST, async_max_per_host=ASYNC_MAX_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.pool_size = pool_size
+        self.max_per_host = max_per_host
+        self.async_max_per_host = async_max_per_host
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._session = None
+        self._executor = None
+        self._host_slots = {}
+        self._async_sessions = {}
+        self.observer = None
+
+    def url(self, path):
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    # ---------- sync ----------
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    # imported on first use: requests is a large import most workers need late
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def _slots(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def _cache_status(self, fetched):
+        if self.cache is None:
+            return "off"
+        return "miss" if fetched else "hit"
+
+    def get_json(self, path, params=None, timeout=None):
+        """GET ``path`` and return the decoded JSON body; raises UpstreamError."""
+        if self.observer is None:
+            return self._get_json(path, params, timeout)
+
+        fetched, ok = [], False
+        start = time.perf_counter()
+        try:
+            result = self._get_json(path, params, timeout, fetched)
+            ok = True
+            return result
+        finally:
+            self.observer(path, time.perf_counter() - start, self._cache_status(fetched), ok)
+
+    def _get_json(self, path, params, timeout, fetched=None):
+        def fetch():
+            if fetched is not None:
+                fetched.append(True)
+            return self._fetch_json(path, params, timeout)
+
+        if self.cache is not None:
+            return self.cache.get_or_fetch(path, params, fetch)
+        return fetch()
+
+    def _fetch_json(self, path, params, timeout):
+        import requests
+
+        url = self.url(path)
+        try:
+            with self._slots(url):
+                res = self.session.get(url, params=params, timeout=timeout or self.timeout)
+            res.raise_for_status()
+            return res.json()
+        except requests.RequestException as e:
+            raise UpstreamError(str(e) or e.__class__.__name__) from e
+
+    def get_many(self, calls, timeout=None):
+        """Run several ``(path, params)`` calls concurrently.
+
+        Returns results in call order; a failed call yields its exception
+        instead of a payload so one bad upstream call doesn't sink the page.
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.pool_size, thread_name_prefix="saavn")
+        # each call runs in the caller's context so per-request state (profiling) follows it
+        futures = [
+            self._executor.submit(contextvars.copy_context().run, self.get_json, path, params, timeout)
+            for path, params in calls
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    # ---------- async ----------
+    def _async_session(self):
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        session = self._async_sessions.get(loop)
+        if session is None or session.closed:
+            for stale in [l for l in self._async_sessions if l.is_closed()]:
+                del self._async_sessions[stale]
+            connector = aiohttp.TCPConnector(limit=self.async_max_per_host,
+                                             limit_per_host=self.async_max_per_host)
+            session = aiohttp.ClientSession(connector=connector)
+            self._async_sessions[loop] = session
+        return session
+
+    async def aget_json(self, path, params=None, timeout=None):
+        """Async counterpart of :meth:`get_json`; raises UpstreamError."""
+        if self.observer is None:
+            return await self._aget_json(path, params, timeout)
+
+        fetched, ok = [], False
+        start = time.perf_counter()
+        try:
+            result = await self._aget_json(path, params, timeout, fetched)
+            ok = True
+            return result
+        finally:
+            self.observer(path, time.perf_counter() - start, self._cache_status(fetched), ok)
+
+    async def _aget_json(self, path, params, timeout, fetched=None):
+        def fetch():
+            if fetched is not None:
+                fetched.append(True)
+            return self._afetch_json(path, params, timeout)
+
+        if self.cache is not None:
+            return await self.cache.aget_or_fetch(path, params, fetch)
+        return await fetch()
+
+    async def _afetch_json(self, path, params, timeout):
+        import aiohttp
+
+        session = self._async_session()
+        try:
+            async with session.get(self.url(path), params=params,
+                                   timeout=aiohttp.ClientTimeout(total=timeout or self.timeout)) as res:
+                res.raise_for_status()
+                return await res.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise UpstreamError(str(e) or e.__class__.__name__) from e
+
+    async def aget_many(self, calls, timeout=None):
+        """Async counterpart of :meth:`get_many`."""
+        return await asyncio.gather(
+            *(self.aget_json(path, params, timeout) for path, params in calls),
+            return_exceptions=True,
+        )
+
+    async def aclose(self):
+        session = self._async_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+saavn = SaavnClient(cache=cache_from_env())
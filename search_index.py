@@ -0,0 +1,124 @@
+import os
+import re
+import threading
+
+from sqlalchemy import text
+
+from models import db, Song
+from records import LYRICS_PLACEHOLDER
+
+# FTS5 table over the local catalog; rowid is song.id.
+FTS_TABLE = "song_fts"
+SEARCH_MODE = os.environ.get("SEARCH_MODE", "upstream")  # upstream, local
+LOCAL_SEARCH_MIN_HITS = int(os.environ.get("LOCAL_SEARCH_MIN_HITS", 5))
+
+# bm25 column weights: name, album, artist, lyrics
+_WEIGHTS = "10.0, 3.0, 6.0, 0.5"
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+_ready_engines = set()
+_ensure_lock = threading.Lock()  # first searches on several threads race to create the table
+
+_SOURCE_ROWS = f"""
+    SELECT song.id, coalesce(song.name, ''), coalesce(song.album, ''),
+           coalesce(artist.name, ''),
+           CASE WHEN song.lyrics = '{LYRICS_PLACEHOLDER}' THEN '' ELSE coalesce(song.lyrics, '') END
+    FROM song LEFT JOIN artist ON artist.id = song.artist_id
+"""
+
+
+def is_supported():
+    return db.engine.dialect.name == "sqlite"
+
+
+def ensure_index():
+    """Create the FTS table on first use and backfill it from the catalog.
+
+    Returns False when the database has no FTS5 (e.g. Postgres), in which
+    case callers fall back to upstream search. Call it before writing in a
+    transaction: creating the table commits the session.
+    """
+    engine = db.engine
+    if engine in _ready_engines:
+        return True
+    if not is_supported():
+        return False
+
+    with _ensure_lock:
+        if engine not in _ready_engines:
+            _create_index()
+            _ready_engines.add(engine)
+    return True
+
+
+def _create_index():
+    # Runs on the session's connection so it never waits on our own write lock.
+    exists = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first()
+    if not exists:
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            " name, album, artist, lyrics,"
+            " tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+        db.session.execute(text(f"INSERT INTO {FTS_TABLE} (rowid, name, album, artist, lyrics) {_SOURCE_ROWS}"))
+        db.session.commit()
+
+
+def rebuild_index():
+    """Drop and rebuild the whole index from the song/artist tables."""
+    if not is_supported():
+        return
+    db.session.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    db.session.commit()
+    _ready_engines.discard(db.engine)
+    ensure_index()
+
+
+def index_songs(song_ids):
+    """Add or refresh index rows for ``song_ids`` inside the current session."""
+    if not song_ids or not ensure_index():
+        return
+    params = {f"id{i}": song_id for i, song_id in enumerate(song_ids)}
+    placeholders = ", ".join(f":{name}" for name in params)
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})"), params)
+    db.session.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, name, album, artist, lyrics)"
+        f" {_SOURCE_ROWS} WHERE song.id IN ({placeholders})"
+    ), params)
+
+
+def to_match_query(query):
+    """Turn free text into a safe FTS5 query: every word required, last one as a prefix."""
+    tokens = _TOKEN.findall(query.lower())
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens[:-1]]
+    terms.append(f'"{tokens[-1]}"*')
+    return " ".join(terms)
+
+
+def search_song_ids(query, limit=10, offset=0):
+    """Ranked song ids matching ``query`` in the local catalog."""
+    match = to_match_query(query)
+    if match is None or not ensure_index():
+        return []
+    rows = db.session.execute(text(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        f" ORDER BY bm25({FTS_TABLE}, {_WEIGHTS}) LIMIT :limit OFFSET :offset"
+    ), {"match": match, "limit": limit, "offset": offset})
+    return [row[0] for row in rows]
+
+
+def search_songs(query, limit=10, offset=0):
+    """Ranked Song rows (artist preloaded) for ``query``."""
+    song_ids = search_song_ids(query, limit, offset)
+    if not song_ids:
+        return []
+    songs = {
+        song.id: song
+        for song in Song.query.options(db.joinedload(Song.artist_obj)).filter(Song.id.in_(song_ids))
+    }
+    return [songs[song_id] for song_id in song_ids if song_id in songs]
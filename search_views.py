@@ -0,0 +1,205 @@
+# Song/artist search, autocomplete and the saavn.dev-backed artist and album pages.
+from flask import Blueprint, request, render_template, session, redirect, url_for, jsonify
+
+from catalog import ingest_search_results, local_search_results
+from search_index import SEARCH_MODE, LOCAL_SEARCH_MIN_HITS
+import autocomplete as autocomplete_index
+from saavn import saavn, UpstreamError
+from records import song_record, pick_image
+from images import saavn_variant
+import conditional
+
+search_bp = Blueprint('search', __name__)
+
+
+# -----------------------FOR SEARCHING SONGS
+@search_bp.route('/search')
+def search():
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    query, page, sort_by, mode = search_params(request.args)
+
+    if not query:
+        return "No search query provided", 400
+
+    # Local mode: answer from our own catalog when it has enough hits
+    local_songs = []
+    if mode == 'local':
+        local_songs = local_search_results(query, session['user_id'], page)
+        if len(local_songs) >= LOCAL_SEARCH_MIN_HITS:
+            return render_search_results(query, local_songs, page, sort_by)
+
+    try:
+        # Saavn API with pagination (assuming API supports start/limit)
+        data = saavn.get_json("search/songs", {"query": query, "page": page})
+
+        results = data.get("data", {}).get("results", [])
+        if not results:
+            return render_search_results(query, local_songs, page, sort_by)
+
+        songs = ingest_search_results(results, session['user_id'])
+        return render_search_results(query, songs, page, sort_by)
+
+    except UpstreamError as re:
+        print(f"[ERROR] HTTP Request failed: {re}")
+        if local_songs:
+            return render_search_results(query, local_songs, page, sort_by)
+        return "Failed to fetch data from Saavn API", 500
+    except Exception as e:
+        print(f"[ERROR] General error in /search: {e}")
+        return "An error occurred while searching", 500
+
+
+def search_params(args):
+    query = args.get('q', '').strip()
+    page = int(args.get('page', 1))
+    sort_by = args.get('sort', 'default')  # default, name, popularity
+    mode = args.get('mode', SEARCH_MODE)  # upstream, local
+    return query, page, sort_by, mode
+
+
+def render_search_results(query, songs, page, sort_by):
+    # Sorting
+    if sort_by == "name":
+        songs.sort(key=lambda x: x['title'])
+    elif sort_by == "popularity":
+        songs.sort(key=lambda x: x.get('popularity', 0), reverse=True)
+
+    return render_template("search_results.html", query=query, songs=songs, page=page, sort_by=sort_by)
+
+
+# Auto-complete endpoint (AJAX)
+@search_bp.route('/autocomplete')
+def autocomplete():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify([])
+
+    suggestions = autocomplete_index.suggest(query, 5)
+    if suggestions:
+        return jsonify(suggestions)
+
+    # Cold miss: nothing local starts with this, ask upstream
+    try:
+        data = saavn.get_json("search/songs", {"query": query, "limit": 5}, timeout=5)
+        suggestions = [song.get("name") for song in data.get("data", {}).get("results", []) if song.get("name")]
+        return jsonify(suggestions)
+    except:
+        return jsonify([])
+
+@search_bp.route('/cache/stats')
+def cache_stats():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Login required'}), 403
+    if saavn.cache is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(enabled=True, **saavn.cache.stats()))
+
+#.....................SEARCH ARTIST
+@search_bp.route("/search/artist")
+def search_artist():
+    query = request.args.get("q", "").strip()
+    artists = []
+    error = None
+
+    if query:
+        try:
+            artists = artist_results(saavn.get_json("search/artists", {"query": query, "page": 0, "limit": 10}))
+        except UpstreamError:
+            error = "Error fetching artists. Please try again later."
+
+    return render_template("search_artist.html", artists=artists, query=query, error=error)
+
+
+# ----------------- ARTIST DETAIL PAGE -----------------
+@search_bp.route("/artist/<artist_id>")
+def artist_detail(artist_id):
+    try:
+        # Artist and its album list are fetched concurrently
+        artist_res, albums_res = saavn.get_many(artist_calls(artist_id))
+        # Ab template me render karenge
+        return render_template("artist_detail.html", artist=artist_page(artist_id, artist_res, albums_res))
+
+    except Exception as e:
+        # Error bhi template me show karenge
+        return render_template("artist_detail.html", error=f"Error fetching artist: {str(e)}")
+
+
+#--------------ALBUM_-----------
+@search_bp.route("/album/<album_id>")
+def album_detail(album_id):
+    try:
+        res = jsonify(album_page(album_id, saavn.get_json("albums", {"id": album_id})))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    # same for every user and rarely changes: revalidate by the body's hash
+    res.set_etag(conditional.body_etag(res.get_data()))
+    res.cache_control.public = True
+    res.cache_control.no_cache = True
+    return res.make_conditional(request)
+
+
+# ----------------- Payload -> page data (shared with async_app.py) -----------------
+def artist_results(payload):
+    return [{
+        "id": a.get("id"),
+        "name": a.get("name"),
+        "image": pick_image(a.get("image"), largest=False) or None
+    } for a in payload.get("data", {}).get("results", [])]
+
+
+def artist_calls(artist_id):
+    return [
+        ("artists", {"id": artist_id}),
+        (f"artists/{artist_id}/albums", None),
+    ]
+
+
+def song_card(payload):
+    """Artist/album page entry for one Saavn song, from its memoized record."""
+    r = song_record(payload)
+    return {
+        "id": r.saavn_id,
+        "name": r.title,
+        "album": r.album,
+        "duration": r.duration,
+        "image": saavn_variant(r.image_url, 150) or None,   # cards are 60 px, not the 500 px original
+        "audio_url": r.audio_url or None,
+        "url": r.page_url,
+    }
+
+
+def artist_page(artist_id, artist_res, albums_res):
+    """Artist page data from the two artist_calls() results; raises if the artist call failed."""
+    if isinstance(artist_res, Exception):
+        raise artist_res
+    data = artist_res.get("data", {})
+    album_list = None
+    if not isinstance(albums_res, Exception):
+        album_list = (albums_res.get("data") or {}).get("albums")
+
+    albums = [{
+        "id": a.get("id"),
+        "name": a.get("name"),
+        "url": a.get("url")
+    } for a in album_list or data.get("topAlbums", [])]
+
+    return {
+        "id": artist_id,
+        "name": data.get("name"),
+        "image": saavn_variant(pick_image(data.get("image")), 150) or None,
+        "albums": albums,
+        "songs": [song_card(s) for s in data.get("topSongs", [])]
+    }
+
+
+def album_page(album_id, payload):
+    data = payload.get("data", {})
+    return {
+        "id": album_id,
+        "name": data.get("name"),
+        "year": data.get("year"),
+        "image": pick_image(data.get("image")) or None,
+        "songs": [song_card(s) for s in data.get("songs", [])]
+    }
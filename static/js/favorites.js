@@ -0,0 +1,147 @@
+// favorites.html: card grid player with its own queue.
+let queue = [];
+let currentIndex = -1;
+let isShuffle = false;
+let isRepeat = false;
+
+const audioPlayer = document.getElementById("audioPlayer");
+const playerBar = document.getElementById("playerBar");
+const playerImg = document.getElementById("playerImg");
+const playerTitle = document.getElementById("playerTitle");
+const playerArtist = document.getElementById("playerArtist");
+const playPauseBtn = document.getElementById("playPauseBtn");
+const seekBar = document.getElementById("seekBar");
+const currentTimeEl = document.getElementById("currentTime");
+const totalTimeEl = document.getElementById("totalTime");
+const volumeBar = document.getElementById("volumeBar");
+
+function loadSong(index) {
+    let song = queue[index];
+    if (!song) return;
+    currentIndex = index;
+    audioPlayer.src = song.url;
+    playerImg.src = song.image;
+    playerTitle.textContent = song.title;
+    playerArtist.textContent = song.artist;
+    playerBar.style.display = "flex";
+    audioPlayer.play();
+    playPauseBtn.textContent = "⏸";
+}
+
+// Individual play buttons
+document.querySelectorAll(".playBtn").forEach((btn, idx) => {
+    btn.addEventListener("click", () => {
+        queue = [];
+        document.querySelectorAll(".song-card").forEach(card => {
+            queue.push({
+                url: card.dataset.url,
+                title: card.dataset.title,
+                artist: card.dataset.artist,
+                image: card.dataset.image
+            });
+        });
+        loadSong(idx);
+    });
+});
+
+// Play all button
+document.getElementById("playAllBtn").addEventListener("click", () => {
+    queue = [];
+    document.querySelectorAll(".song-card").forEach(card => {
+        queue.push({
+            url: card.dataset.url,
+            title: card.dataset.title,
+            artist: card.dataset.artist,
+            image: card.dataset.image
+        });
+    });
+    loadSong(0);
+});
+
+// Remove song button
+document.querySelectorAll(".removeBtn").forEach(btn => {
+    btn.addEventListener("click", () => {
+        const songCard = btn.closest(".song-card");
+        const songId = songCard.dataset.id;
+
+        fetch("/toggle_favorite", {
+                method: "POST",
+                headers: {
+                    "Content-Type": "application/json"
+                },
+                body: JSON.stringify({
+                    song_id: songId
+                })
+            })
+            .then(res => res.json())
+            .then(data => {
+                if (data.status === "removed") {
+                    songCard.remove(); // remove from DOM
+                } else {
+                    alert("Could not remove song");
+                }
+            })
+            .catch(err => console.error(err));
+    });
+});
+
+// Bottom player controls
+playPauseBtn.addEventListener("click", () => {
+    if (audioPlayer.paused) {
+        audioPlayer.play();
+        playPauseBtn.textContent = "⏸";
+    } else {
+        audioPlayer.pause();
+        playPauseBtn.textContent = "▶";
+    }
+});
+
+document.getElementById("nextBtn").addEventListener("click", () => {
+    if (isShuffle) {
+        loadSong(Math.floor(Math.random() * queue.length));
+    } else if (currentIndex < queue.length - 1) {
+        loadSong(currentIndex + 1);
+    } else if (isRepeat) {
+        loadSong(0);
+    }
+});
+
+document.getElementById("prevBtn").addEventListener("click", () => {
+    if (currentIndex > 0) loadSong(currentIndex - 1);
+});
+
+document.getElementById("shuffleBtn").addEventListener("click", () => {
+    isShuffle = !isShuffle;
+    alert("Shuffle " + (isShuffle ? "On" : "Off"));
+});
+
+document.getElementById("repeatBtn").addEventListener("click", () => {
+    isRepeat = !isRepeat;
+    alert("Repeat " + (isRepeat ? "On" : "Off"));
+});
+
+audioPlayer.addEventListener("timeupdate", () => {
+    seekBar.max = audioPlayer.duration || 0;
+    seekBar.value = audioPlayer.currentTime;
+    currentTimeEl.textContent = formatTime(audioPlayer.currentTime);
+    totalTimeEl.textContent = formatTime(audioPlayer.duration);
+});
+
+seekBar.addEventListener("input", () => {
+    audioPlayer.currentTime = seekBar.value;
+});
+volumeBar.addEventListener("input", () => {
+    audioPlayer.volume = volumeBar.value;
+});
+
+audioPlayer.addEventListener("ended", () => {
+    if (isRepeat) loadSong(currentIndex);
+    else if (currentIndex < queue.length - 1 || isShuffle) document.getElementById("nextBtn").click();
+});
+
+function formatTime(sec) {
+    if (isNaN(sec)) return "0:00";
+    let minutes = Math.floor(sec / 60);
+    let seconds = Math.floor(sec % 60).toString().padStart(2, "0");
+    return `${minutes}:${seconds}`;
+}
@@ -0,0 +1,8 @@
+// playlist_detail.html and recently_played.html: play a song in #mainPlayer.
+function playSong(url) {
+    const player = document.getElementById('mainPlayer');
+    if (player.src !== url) {
+        player.src = url;
+    }
+    player.play();
+}
@@ -53,8 +53,8 @@ function loadSongFrontend(song, index = null) {
     document.getElementById('bottom-song-title').innerText = song.name || '';
     document.getElementById('bottom-song-artist').innerText = song.artist || '';
 
-    if (song.youtube_url) {
-        audio.src = song.youtube_url; // Must be playable URL
+    if (song.stream_url || song.youtube_url) {
+        audio.src = song.stream_url || song.youtube_url; // cached proxy when the server offers one
         audio.load();
         audio.play();
     }
@@ -235,4 +235,34 @@ document.querySelectorAll(".removeBtn").forEach((btn) => {
             console.error(err);
         }
     });
-});
\ No newline at end of file
+});
+// =======================
+// CATALOG BROWSER (keyset paging via /api/songs)
+// =======================
+const catalogMore = document.getElementById("catalog-more");
+if (catalogMore) {
+    catalogMore.addEventListener("click", async() => {
+        const list = document.getElementById("catalog-list");
+        catalogMore.disabled = true;
+        try {
+            const res = await fetch(`/api/songs?after=${catalogMore.dataset.next}`);
+            const data = await res.json();
+            data.songs.forEach((song) => {
+                const li = document.createElement("li");
+                const link = document.createElement("a");
+                link.href = `/play/${song.id}`;
+                link.innerText = song.name || "";
+                const artist = document.createElement("span");
+                artist.innerText = song.artist || "";
+                li.append(link, " ", artist);
+                list.appendChild(li);
+            });
+            catalogMore.dataset.next = data.next || "";
+            if (!data.next) catalogMore.style.display = "none";
+        } catch (err) {
+            console.error(err);
+        } finally {
+            catalogMore.disabled = false;
+        }
+    });
+}
@@ -0,0 +1,93 @@
+// popular_artists.html: artist search and the popular artists grid.
+const searchBox = document.getElementById('searchBox');
+const searchSection = document.getElementById('searchSection');
+const searchGrid = document.getElementById('searchGrid');
+const noSearchMsg = document.getElementById('noSearchMsg');
+const popularGrid = document.getElementById('popularGrid');
+const popularError = document.getElementById('popularError');
+
+const imgFallback = '/static/default-artist.png';
+
+function normalizeId(id) {
+    if (typeof id === 'object' && id !== null) {
+        return id.id || Object.values(id)[0];
+    }
+    if (Array.isArray(id)) {
+        return id[0];
+    }
+    return id;
+}
+
+function cardFor(artist) {
+    const div = document.createElement('div');
+    div.className = 'card';
+    div.innerHTML = `
+    <img src="${artist.image_url || imgFallback}" alt="${artist.name}">
+    <div class="name">${artist.name}</div>
+`;
+    div.addEventListener('click', () => {
+        const safeId = normalizeId(artist.id);
+        window.location.href = '/artist/' + encodeURIComponent(String(safeId));
+    });
+    return div;
+}
+
+function renderList(container, artists) {
+    container.innerHTML = '';
+    artists.forEach(a => container.appendChild(cardFor(a)));
+}
+
+async function loadPopular() {
+    try {
+        const res = await fetch('/api/popular-artists');
+        if (!res.ok) throw new Error('HTTP ' + res.status);
+        const data = await res.json();
+        renderList(popularGrid, data.artists || []);
+    } catch (e) {
+        console.error('Popular artists error:', e);
+        popularError.style.display = 'block';
+    }
+}
+
+async function doSearch(query) {
+    if (!query) {
+        searchSection.style.display = 'none';
+        searchGrid.innerHTML = '';
+        noSearchMsg.style.display = 'none';
+        return;
+    }
+    try {
+        const res = await fetch('/search-artists?q=' + encodeURIComponent(query));
+        if (!res.ok) throw new Error('HTTP ' + res.status);
+        const data = await res.json();
+        const artists = data.artists || [];
+        searchSection.style.display = 'block';
+        if (artists.length === 0) {
+            searchGrid.innerHTML = '';
+            noSearchMsg.style.display = 'block';
+        } else {
+            noSearchMsg.style.display = 'none';
+            renderList(searchGrid, artists);
+        }
+    } catch (e) {
+        console.error('Search error:', e);
+        searchSection.style.display = 'block';
+        searchGrid.innerHTML = '';
+        noSearchMsg.textContent = 'Error searching artists.';
+        noSearchMsg.style.display = 'block';
+    }
+}
+
+function debounce(fn, delay) {
+    let t;
+    return (...args) => {
+        clearTimeout(t);
+        t = setTimeout(() => fn(...args), delay);
+    };
+}
+
+searchBox.addEventListener('input', debounce(e => {
+    doSearch(e.target.value.trim());
+}, 300));
+
+loadPopular();
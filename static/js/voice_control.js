@@ -0,0 +1,198 @@
+// Voice control for the player in base.html.
+(() => {
+    const audio = document.getElementById('audio');
+    const voiceBtn = document.getElementById('voiceControlBtn');
+    const volumeSlider = document.getElementById('volume');
+    let recognition = null;
+    let listening = false;
+
+    // Setup SpeechRecognition
+    function setupRecognition() {
+        const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
+        if (!SpeechRecognition) {
+            alert('Your browser does not support Speech Recognition');
+            return null;
+        }
+        const recog = new SpeechRecognition();
+        recog.lang = 'en-IN'; // Indian English + Hindi mix
+        recog.interimResults = true; // better realtime feedback
+        recog.maxAlternatives = 1;
+        recog.continuous = false;
+        return recog;
+    }
+
+    recognition = setupRecognition();
+
+    // Text to speech female voice pick
+    const synth = window.speechSynthesis;
+    let femaleVoice = null;
+
+    function pickFemaleVoice() {
+        const voices = synth.getVoices();
+        if (!voices.length) return;
+        const priorities = ['Google UK English Female', 'Google US English', 'Microsoft Zira', 'female'];
+        for (const p of priorities) {
+            const v = voices.find(voice => voice.name.toLowerCase().includes(p.toLowerCase()));
+            if (v) {
+                femaleVoice = v;
+                return;
+            }
+        }
+        femaleVoice = voices.find(v => /female/i.test(v.name)) || voices[0];
+    }
+    if (speechSynthesis.onvoiceschanged !== undefined) {
+        speechSynthesis.onvoiceschanged = pickFemaleVoice;
+    }
+    pickFemaleVoice();
+
+    function speak(text) {
+        if (!synth) return;
+        const utter = new SpeechSynthesisUtterance(text);
+        if (femaleVoice) utter.voice = femaleVoice;
+        utter.lang = femaleVoice && femaleVoice.lang ? femaleVoice.lang : 'en-IN';
+        utter.rate = 1;
+        utter.pitch = 1;
+        synth.cancel();
+        synth.speak(utter);
+    }
+
+    function playSong() {
+        if (audio.src) {
+            audio.play();
+            speak("Playing song");
+        } else {
+            speak("No song loaded to play");
+        }
+    }
+
+    function pauseSong() {
+        audio.pause();
+        speak("Paused");
+    }
+
+    function nextSong() {
+        const nextBtn = document.getElementById('nextBtn');
+        if (nextBtn) {
+            nextBtn.click();
+            speak("Skipping to next song");
+        }
+    }
+
+    function prevSong() {
+        const prevBtn = document.getElementById('prevBtn');
+        if (prevBtn) {
+            prevBtn.click();
+            speak("Playing previous song");
+        }
+    }
+
+    function changeVolume(delta) {
+        let vol = parseInt(volumeSlider.value) + delta;
+        vol = Math.min(100, Math.max(0, vol));
+        volumeSlider.value = vol;
+        volumeSlider.dispatchEvent(new Event('input'));
+        speak(`Volume set to ${vol} percent`);
+    }
+
+    function setVolume(percent) {
+        let vol = Math.min(100, Math.max(0, percent));
+        volumeSlider.value = vol;
+        volumeSlider.dispatchEvent(new Event('input'));
+        speak(`Volume set to ${vol} percent`);
+    }
+
+    function processCommand(command) {
+        command = command.toLowerCase().trim();
+        console.log('Voice command:', command);
+
+        // Remove "song" keyword to avoid confusion
+        command = command.replace(/\bsong\b/g, '').trim();
+
+        if (command.includes('play')) {
+            if (command.includes('pause')) {
+                pauseSong();
+            } else {
+                playSong();
+            }
+            return;
+        }
+        if (command.includes('pause') || command.includes('stop')) {
+            pauseSong();
+            return;
+        }
+        if (command.includes('next') || command.includes('skip')) {
+            if (command.includes('twice') || command.includes('two times')) {
+                nextSong();
+                setTimeout(nextSong, 700);
+            } else {
+                nextSong();
+            }
+            return;
+        }
+        if (command.includes('previous') || command.includes('prev') || command.includes('back')) {
+            prevSong();
+            return;
+        }
+        if (command.includes('volume up') || command.includes('increase volume') || command.includes('turn up the volume')) {
+            changeVolume(10);
+            return;
+        }
+        if (command.includes('volume down') || command.includes('decrease volume') || command.includes('turn down the volume')) {
+            changeVolume(-10);
+            return;
+        }
+        const setVolMatch = command.match(/set volume to (\d+)/);
+        if (setVolMatch) {
+            let volNum = parseInt(setVolMatch[1]);
+            setVolume(volNum);
+            return;
+        }
+        if (command.startsWith('play')) {
+            let searchTerm = command.replace('play', '').trim();
+            if (searchTerm) {
+                const searchInput = document.querySelector('form.search input[name="q"]');
+                if (searchInput) {
+                    searchInput.value = searchTerm;
+                    searchInput.form.submit();
+                    speak(`Searching and playing ${searchTerm}`);
+                    return;
+                }
+            }
+        }
+
+        speak("Sorry, I didn't understand that. Try play, pause, next, previous, or volume commands.");
+    }
+
+    if (!recognition) return;
+
+    recognition.onstart = () => {
+        listening = true;
+        voiceBtn.textContent = '🔴 Listening...';
+    };
+    recognition.onresult = (e) => {
+        const text = e.results[0][0].transcript;
+        console.log('Recognized text:', text);
+        voiceBtn.textContent = '🎤 Voice';
+        listening = false;
+        processCommand(text);
+    };
+    recognition.onerror = (e) => {
+        console.error('Speech recognition error:', e.error);
+        speak("Sorry, I couldn't hear you. Please try again.");
+        voiceBtn.textContent = '🎤 Voice';
+        listening = false;
+    };
+    recognition.onend = () => {
+        listening = false;
+        voiceBtn.textContent = '🎤 Voice';
+    };
+
+    voiceBtn.addEventListener('click', () => {
+        if (listening) {
+            recognition.stop();
+            return;
+        }
+        recognition.start();
+    });
+
+})();
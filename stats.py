@@ -0,0 +1,108 @@
+from collections import defaultdict
+
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session
+
+from models import db, User, UserStats, UserFavorites, Playlist, PlaylistSong, QueueItem, RecentlyPlayed, PlayDaily
+
+# Per-user counters for the profile page, kept in user_stats so rendering
+# it is a single primary-key read. Likes and playlists are counted by a
+# flush hook on every ORM session; plays are counted by history.record_batch
+# next to the raw insert. reconcile() recomputes everything with COUNT(*).
+# The *_version columns change with every write to that part of the user's
+# library: favorites_version on like/unlike (see favorites.py), the others
+# version the ETags of the library pages (see conditional.py). Queue and
+# history writes that bypass the ORM bump theirs next to the statement.
+
+COUNTERS = ("liked_count", "play_count", "playlist_count")
+VERSIONS = ("favorites_version", "queue_version", "playlists_version", "history_version")
+_COLUMNS = COUNTERS + VERSIONS
+_TRACKED = {UserFavorites: "liked_count", Playlist: "playlist_count"}
+_VERSIONED = {UserFavorites: "favorites_version", QueueItem: "queue_version", Playlist: "playlists_version"}
+
+
+def _upsert(conn):
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(UserStats)
+    if dialect == "postgresql":
+        from sqlalchemy.dialects import postgresql
+
+        return postgresql.insert(UserStats)
+    raise NotImplementedError(f"user stats need upserts, not available on {dialect}")
+
+
+def bump(conn, deltas):
+    """Apply ``{user_id: {counter: delta}}`` on ``conn``, creating missing rows."""
+    rows = [
+        {"user_id": user_id, **{name: changes.get(name, 0) for name in _COLUMNS}}
+        for user_id, changes in deltas.items()
+        if user_id is not None and any(changes.values())
+    ]
+    if not rows:
+        return
+    stmt = _upsert(conn)
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={name: getattr(UserStats, name) + getattr(stmt.excluded, name) for name in _COLUMNS},
+    ), rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _count_flushed(session, flush_context):
+    deltas = defaultdict(lambda: defaultdict(int))
+    playlist_ids = set()
+    for objects, sign in ((session.new, 1), (session.deleted, -1), (session.dirty, 0)):
+        for obj in objects:
+            counter = _TRACKED.get(type(obj))
+            if counter and sign:
+                deltas[obj.user_id][counter] += sign
+            version = _VERSIONED.get(type(obj))
+            if version:
+                deltas[obj.user_id][version] += 1
+            elif isinstance(obj, PlaylistSong):
+                playlist_ids.add(obj.playlist_id)
+    if playlist_ids:
+        # a deleted playlist's own row is gone by now, but it bumped its owner above
+        owners = session.connection().execute(
+            select(Playlist.user_id).where(Playlist.id.in_(playlist_ids))
+        ).scalars()
+        for user_id in owners:
+            deltas[user_id]["playlists_version"] += 1
+    if deltas:
+        bump(session.connection(), deltas)
+
+
+def touch(conn, user_id, version):
+    """Bump one of the user's *_version columns on ``conn`` (for writes made with Core statements)."""
+    bump(conn, {user_id: {version: 1}})
+
+
+def reconcile(engine):
+    """Recompute every user's counters from the source tables in one statement."""
+    def count(model):
+        return select(func.count()).where(model.user_id == User.id).scalar_subquery()
+
+    compacted = select(func.coalesce(func.sum(PlayDaily.plays), 0)).where(
+        PlayDaily.user_id == User.id
+    ).scalar_subquery()
+
+    with engine.begin() as conn:
+        stmt = _upsert(conn).from_select(
+            ["user_id", *COUNTERS],
+            select(User.id, count(UserFavorites), count(RecentlyPlayed) + compacted, count(Playlist))
+            .where(User.id.isnot(None)),  # SQLite needs a WHERE before ON CONFLICT in INSERT ... SELECT
+        )
+        result = conn.execute(stmt.on_conflict_do_update(
+            index_elements=[UserStats.user_id],
+            set_={name: getattr(stmt.excluded, name) for name in COUNTERS},
+        ))
+    return result.rowcount
+
+
+def user_with_stats(user_id):
+    """The user and their counters in one primary-key read."""
+    return db.session.execute(
+        select(User, UserStats).outerjoin(UserStats, UserStats.user_id == User.id).where(User.id == user_id)
+    ).first()
@@ -0,0 +1,146 @@
+# templating.py
+# Template-level caching.
+#
+# Bytecode cache: compiled templates are written to JINJA_CACHE_DIR, keyed
+# by template name and source checksum, so a new worker loads them instead
+# of compiling. `flask --app app compile-templates` fills it at deploy time.
+#
+# Fragment cache: {% cache "name", key, ... %}...{% endcache %} renders the
+# body once per key and keeps the markup in a per-process LRU. Keys carry
+# whatever the fragment depends on: the sidebar and playlist dropdown use
+# the user and their playlists version from user_stats (see stats.py), so
+# a write to their playlists moves them to a new key; search result cards
+# use the fields they show. The template name is always part of the key.
+import os
+import threading
+from collections import OrderedDict
+
+from flask import g, session
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import select
+
+from models import db, Playlist, UserStats
+
+JINJA_CACHE_DIR = os.environ.get("JINJA_CACHE_DIR", os.path.join("instance", "jinja_cache"))  # "" disables
+FRAGMENT_CACHE_SIZE = int(os.environ.get("FRAGMENT_CACHE_SIZE", 4096))  # 0 disables
+
+
+# ----------------- Fragment cache -----------------
+class FragmentCache:
+    def __init__(self, max_entries=FRAGMENT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.observer = None   # profiling: called with True on a hit, False on a miss
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        if not self.max_entries:
+            return render()
+        markup = self._entries.get(key)
+        hit = markup is not None
+        if hit:
+            with self._lock:
+                self.hits += 1
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+        else:
+            # rendered outside the lock; two requests missing together both render, one entry wins
+            markup = render()
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = markup
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        if self.observer is not None:
+            self.observer(hit)
+        return markup
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+fragments = FragmentCache()
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache "name", key... %}body{% endcache %}``, stored in ``fragments``."""
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [nodes.Const(parser.name), parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_render", [nodes.Tuple(key, "load")]), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        return fragments.get_or_render(key, lambda: Markup(caller()))
+
+
+# ----------------- Library state for the page chrome -----------------
+class Library:
+    """What the sidebar and playlist dropdown depend on, from one user_stats read."""
+
+    __slots__ = ("user_id", "playlists_version", "playlist_count")
+
+    def __init__(self, user_id=None, playlists_version=0, playlist_count=0):
+        self.user_id = user_id
+        self.playlists_version = playlists_version
+        self.playlist_count = playlist_count
+
+
+def library():
+    """The signed-in user's Library, read once per request."""
+    if "library" not in g:
+        user_id = session.get("user_id")
+        row = None
+        if user_id is not None:
+            row = db.session.execute(
+                select(UserStats.playlists_version, UserStats.playlist_count).where(UserStats.user_id == user_id)
+            ).first()
+        g.library = Library(user_id, *row) if row is not None else Library(user_id)
+    return g.library
+
+
+def user_playlists():
+    """The signed-in user's playlists; only called where a fragment misses."""
+    if "user_playlists" not in g:
+        user_id = session.get("user_id")
+        g.user_playlists = Playlist.query.filter_by(user_id=user_id).all() if user_id is not None else []
+    return g.user_playlists
+
+
+# ----------------- Flask integration -----------------
+def init_app(app):
+    if JINJA_CACHE_DIR:
+        os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.add_template_global(library)
+    app.add_template_global(user_playlists)
+
+
+def compile_all(app):
+    """Load every template once, so the bytecode cache holds all of them; returns how many."""
+    names = app.jinja_env.list_templates(extensions=("html",))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
@@ -1,11 +1,10 @@
 # print_users.py
 
-from db import db
+from app import create_app
 from models import User
-from flask import Flask
 
 # Create the Flask app context if needed
-app = Flask(__name__)
+app = create_app()
 app.app_context().push()
 
 # Query and print all users